@@ -0,0 +1,381 @@
+"""
+Almacenamiento por meses: un archivo SQLite de encuestas por mes para consultas en paralelo.
+
+La base principal sigue siendo la única que recibe escrituras: el índice de hash_unico,
+la carga por fusión y los id_encuesta son globales. De ella se derivan, en un directorio:
+
+- encuestas_YYYY_MM.db: las encuestas del mes con el mismo esquema y el índice de fecha,
+  más una tabla control_archivo con la marca de agua del mes (filas, máximo id_encuesta,
+  último cambio de la fusión y generación de la carga, ver generacion_datos.py).
+- dimensiones.db: usuarios y las tres dimensiones, que cada consulta adjunta con ATTACH,
+  más una tabla control_dimensiones con su propia versión (generación, version_dimensiones
+  y cantidad de estados y cuestionarios, que la carga de encuestas solo agrega).
+
+sincronizar_archivos_mensuales reescribe solo los meses cuya marca de agua cambió y
+dimensiones.db solo si cambió su versión. Una carga completa cambia la generación, así
+que reescribe todo aunque vuelva con los mismos id_encuesta y conteos. Cada
+archivo se arma en un temporal y se reemplaza de una vez (os.replace), así quien lo esté
+leyendo nunca ve un archivo a medias. Los meses anteriores al último mes con datos están
+cerrados: se compactan con VACUUM, quedan de solo lectura y se abren con immutable=1
+(SQLite no toma bloqueos ni revisa cambios), así cada archivo se puede copiar, comprimir
+o guardar en caché por separado.
+
+resumen_archivos_mensuales reparte la consulta de un rango de fechas en un grupo de
+procesos, un archivo por tarea, y une los agregados parciales. Los usuarios únicos son
+exactos (unión de conjuntos), a diferencia de la estimación HyperLogLog de los resúmenes.
+
+Uso (sincroniza y compara contra la base única):
+    python archivos_mensuales.py --desde 2025-06-01 --hasta 2025-09-01 --procesos 4
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import stat
+import time
+from datetime import datetime
+
+from almacenamiento import ruta_sqlite, ddl_dimensiones, ddl_encuestas, INDICES_ENCUESTAS
+from claves_dedup import detectar_estrategia, tipo_sql
+from cambios_encuestas import ultimo_cambio
+from rollups_encuestas import limites_mes
+from generacion_datos import generacion_actual
+
+# Directorio por defecto, junto a la base principal
+NOMBRE_DIRECTORIO = 'encuestas_mensuales'
+
+ARCHIVO_DIMENSIONES = 'dimensiones.db'
+
+PATRON_ARCHIVO = re.compile(r'^encuestas_(\d{4})_(\d{2})\.db$')
+
+TABLAS_DIMENSIONES = ['usuarios', 'dimension_calificaciones', 'dimension_estados', 'dimension_cuestionarios']
+
+# Agregados de un archivo dentro de [desde, hasta), con las mismas filas que la tabla unificada
+# (encuestas con calificación y usuario existente); se agrupa por usuario y cuestionario para
+# unir los conjuntos de ambos sin traer cada fila
+SELECT_AGREGADOS = '''
+    SELECT
+        e.usuario_id,
+        e.id_cuestionario,
+        COUNT(*),
+        SUM(dc.calificacion),
+        COUNT(dc.calificacion),
+        MIN(e.fecha_insercion),
+        MAX(e.fecha_insercion)
+    FROM encuestas e
+    INNER JOIN {dimensiones}usuarios u ON e.usuario_id = u.id_usuario
+    LEFT JOIN {dimensiones}dimension_calificaciones dc ON e.id_calificacion = dc.id_calificacion
+    WHERE e.fecha_insercion >= ? AND e.fecha_insercion < ? AND e.id_calificacion IS NOT NULL
+    GROUP BY e.usuario_id, e.id_cuestionario
+'''
+
+def directorio_por_defecto():
+    """Directorio de los archivos mensuales junto a la base configurada"""
+    return os.path.join(os.path.dirname(os.path.abspath(ruta_sqlite())), NOMBRE_DIRECTORIO)
+
+def ruta_archivo_mes(directorio, anio_mes):
+    return os.path.join(directorio, f"encuestas_{anio_mes.replace('-', '_')}.db")
+
+def abrir_solo_lectura(ruta, inmutable=False):
+    """Conexión de solo lectura; inmutable=True para los meses cerrados (sin bloqueos)"""
+    return sqlite3.connect(f"file:{ruta}?mode=ro{'&immutable=1' if inmutable else ''}", uri=True)
+
+def meses_con_datos(cursor):
+    """Meses 'YYYY-MM' con encuestas, saltando de mes en mes por el índice de fecha"""
+    meses = []
+    cursor.execute("SELECT MIN(fecha_insercion) FROM encuestas")
+    fecha = cursor.fetchone()[0]
+    while fecha is not None:
+        meses.append(fecha[:7])
+        cursor.execute("SELECT MIN(fecha_insercion) FROM encuestas WHERE fecha_insercion >= ?",
+                       (limites_mes(fecha[:7])[1],))
+        fecha = cursor.fetchone()[0]
+    return meses
+
+def marca_agua_mes(cursor, anio_mes):
+    """Filas, máximo id_encuesta, último cambio de la fusión y generación de la carga de un mes"""
+    cursor.execute("SELECT COUNT(*), MAX(id_encuesta) FROM encuestas WHERE fecha_insercion >= ? "
+                   "AND fecha_insercion < ?", limites_mes(anio_mes))
+    return tuple(cursor.fetchone()) + (ultimo_cambio(cursor.connection, anio_mes),
+                                       generacion_actual(cursor.connection)[0])
+
+def version_dimensiones(cursor):
+    """Versión del contenido de dimensiones.db: generación, version_dimensiones y tamaño de estados y cuestionarios"""
+    cursor.execute("SELECT (SELECT COUNT(*) FROM dimension_estados), (SELECT COUNT(*) FROM dimension_cuestionarios)")
+    return generacion_actual(cursor.connection) + tuple(cursor.fetchone())
+
+def leer_control(ruta):
+    """(filas, max_id_encuesta, ultimo_cambio, generacion, cerrado) guardados en el archivo, o None"""
+    if not os.path.exists(ruta):
+        return None
+    conn = abrir_solo_lectura(ruta)
+    try:
+        fila = conn.execute("SELECT filas, max_id_encuesta, ultimo_cambio, generacion, cerrado "
+                            "FROM control_archivo").fetchone()
+        return (fila[0], fila[1], fila[2], fila[3], bool(fila[4])) if fila else None
+    except sqlite3.DatabaseError:
+        # Archivo incompleto o de otra versión: se vuelve a escribir
+        return None
+    finally:
+        conn.close()
+
+def escribir_archivo_mes(conn, directorio, anio_mes, marca, cerrado):
+    """Escribe las encuestas del mes en su archivo (temporal + reemplazo atómico)"""
+    ruta = ruta_archivo_mes(directorio, anio_mes)
+    temporal = ruta + '.tmp'
+    if os.path.exists(temporal):
+        os.remove(temporal)
+    conn.commit()
+    cursor = conn.cursor()
+    # Las llaves foráneas del archivo apuntan a dimensiones.db, que no está adjunta aquí
+    llaves_foraneas = cursor.execute("PRAGMA foreign_keys").fetchone()[0]
+    cursor.execute("PRAGMA foreign_keys = OFF")
+    cursor.execute("ATTACH DATABASE ? AS mes", (temporal,))
+    try:
+        cursor.execute(ddl_encuestas('mes.encuestas', tipo_sql(detectar_estrategia(conn))))
+        cursor.execute("""
+            INSERT INTO mes.encuestas SELECT * FROM main.encuestas
+            WHERE fecha_insercion >= ? AND fecha_insercion < ?
+            ORDER BY id_encuesta
+        """, limites_mes(anio_mes))
+        for nombre, definicion in INDICES_ENCUESTAS.items():
+            cursor.execute(f"CREATE INDEX mes.{nombre} ON {definicion}")
+        cursor.execute("""
+            CREATE TABLE mes.control_archivo (
+                año_mes TEXT NOT NULL,
+                filas INTEGER NOT NULL,
+                max_id_encuesta INTEGER,
+                ultimo_cambio INTEGER NOT NULL,
+                generacion TEXT NOT NULL,
+                cerrado INTEGER NOT NULL,
+                fecha_escritura TEXT NOT NULL
+            )
+        """)
+        cursor.execute("INSERT INTO mes.control_archivo VALUES (?, ?, ?, ?, ?, ?, ?)",
+                       (anio_mes, *marca, int(cerrado), datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        conn.commit()
+    finally:
+        # Si algo falló, la transacción se descarta antes de soltar el archivo
+        conn.rollback()
+        cursor.execute("DETACH DATABASE mes")
+        cursor.execute(f"PRAGMA foreign_keys = {'ON' if llaves_foraneas else 'OFF'}")
+
+    if cerrado:
+        compactar = sqlite3.connect(temporal)
+        compactar.execute("VACUUM")
+        compactar.close()
+        os.chmod(temporal, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    os.replace(temporal, ruta)
+
+def leer_version_dimensiones(ruta):
+    """Versión guardada en dimensiones.db, o None si no existe o es de otra versión"""
+    if not os.path.exists(ruta):
+        return None
+    conn = abrir_solo_lectura(ruta)
+    try:
+        fila = conn.execute("SELECT generacion, version_dimensiones, estados, cuestionarios "
+                            "FROM control_dimensiones").fetchone()
+        return tuple(fila) if fila else None
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        conn.close()
+
+def escribir_dimensiones(conn, directorio, version):
+    """Copia usuarios y las dimensiones a dimensiones.db (temporal + reemplazo atómico)"""
+    ruta = os.path.join(directorio, ARCHIVO_DIMENSIONES)
+    temporal = ruta + '.tmp'
+    if os.path.exists(temporal):
+        os.remove(temporal)
+    conn.commit()
+    cursor = conn.cursor()
+    cursor.execute("ATTACH DATABASE ? AS dim", (temporal,))
+    try:
+        for ddl in ddl_dimensiones():
+            cursor.execute(ddl.replace('CREATE TABLE IF NOT EXISTS ', 'CREATE TABLE dim.', 1))
+        for tabla in TABLAS_DIMENSIONES:
+            cursor.execute(f"INSERT INTO dim.{tabla} SELECT * FROM main.{tabla}")
+        cursor.execute("""
+            CREATE TABLE dim.control_dimensiones (
+                generacion TEXT NOT NULL,
+                version_dimensiones INTEGER NOT NULL,
+                estados INTEGER NOT NULL,
+                cuestionarios INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("INSERT INTO dim.control_dimensiones VALUES (?, ?, ?, ?)", version)
+        conn.commit()
+    finally:
+        # Si algo falló, la transacción se descarta antes de soltar el archivo
+        conn.rollback()
+        cursor.execute("DETACH DATABASE dim")
+    os.replace(temporal, ruta)
+
+def sincronizar_archivos_mensuales(conn, directorio=None, meses=None):
+    """Reescribe los archivos de los meses cuya marca de agua cambió, y dimensiones.db si cambió su versión
+
+    Sin meses se revisan todos los meses con datos y se borran los archivos de meses que
+    ya no tienen encuestas. Devuelve la lista de meses escritos.
+    """
+    directorio = directorio or directorio_por_defecto()
+    os.makedirs(directorio, exist_ok=True)
+    cursor = conn.cursor()
+    con_datos = meses_con_datos(cursor)
+    # Solo el último mes con datos sigue recibiendo encuestas nuevas
+    ultimo_mes = con_datos[-1] if con_datos else None
+
+    escritos = []
+    for anio_mes in (con_datos if meses is None else [m for m in meses if m in con_datos]):
+        marca = marca_agua_mes(cursor, anio_mes)
+        cerrado = anio_mes < ultimo_mes
+        if leer_control(ruta_archivo_mes(directorio, anio_mes)) == marca + (cerrado,):
+            continue
+        escribir_archivo_mes(conn, directorio, anio_mes, marca, cerrado)
+        escritos.append(anio_mes)
+
+    if meses is None:
+        for anio_mes in set(meses_en_directorio(directorio)) - set(con_datos):
+            os.remove(ruta_archivo_mes(directorio, anio_mes))
+    version = version_dimensiones(cursor)
+    if leer_version_dimensiones(os.path.join(directorio, ARCHIVO_DIMENSIONES)) != version:
+        escribir_dimensiones(conn, directorio, version)
+    return escritos
+
+def meses_en_directorio(directorio):
+    """Meses 'YYYY-MM' con archivo en el directorio, en orden"""
+    if not os.path.isdir(directorio):
+        return []
+    meses = []
+    for nombre in os.listdir(directorio):
+        coincidencia = PATRON_ARCHIVO.match(nombre)
+        if coincidencia:
+            meses.append(f"{coincidencia.group(1)}-{coincidencia.group(2)}")
+    return sorted(meses)
+
+def agregados_vacios():
+    return {'total': 0, 'suma': 0, 'con_calificacion': 0, 'usuarios': set(), 'cuestionarios': set(),
+            'fecha_minima': None, 'fecha_maxima': None}
+
+def acumular_agregados(agregados, cursor):
+    """Suma a agregados las filas de SELECT_AGREGADOS"""
+    for usuario_id, id_cuestionario, total, suma, con_calificacion, minima, maxima in cursor:
+        agregados['total'] += total
+        agregados['suma'] += suma or 0
+        agregados['con_calificacion'] += con_calificacion
+        agregados['usuarios'].add(usuario_id)
+        if id_cuestionario is not None:
+            agregados['cuestionarios'].add(id_cuestionario)
+        agregados['fecha_minima'] = minima if agregados['fecha_minima'] is None else min(agregados['fecha_minima'], minima)
+        agregados['fecha_maxima'] = maxima if agregados['fecha_maxima'] is None else max(agregados['fecha_maxima'], maxima)
+    return agregados
+
+def unir_agregados(destino, origen):
+    destino['total'] += origen['total']
+    destino['suma'] += origen['suma']
+    destino['con_calificacion'] += origen['con_calificacion']
+    destino['usuarios'] |= origen['usuarios']
+    destino['cuestionarios'] |= origen['cuestionarios']
+    for clave, elegir in (('fecha_minima', min), ('fecha_maxima', max)):
+        if origen[clave] is not None:
+            destino[clave] = origen[clave] if destino[clave] is None else elegir(destino[clave], origen[clave])
+    return destino
+
+def agregar_archivo(tarea):
+    """Trabajador: agregados parciales de un archivo mensual dentro de [desde, hasta)"""
+    ruta, ruta_dimensiones, cerrado, desde, hasta = tarea
+    conn = abrir_solo_lectura(ruta, inmutable=cerrado)
+    try:
+        conn.execute("ATTACH DATABASE ? AS dim", (f"file:{ruta_dimensiones}?mode=ro",))
+        cursor = conn.execute(SELECT_AGREGADOS.format(dimensiones='dim.'), (desde, hasta))
+        return acumular_agregados(agregados_vacios(), cursor)
+    finally:
+        conn.close()
+
+def resumen_desde_agregados(agregados):
+    """Mismo diccionario que rollups_encuestas.resumen_meses, con usuarios únicos exactos"""
+    return {
+        'total_registros': agregados['total'],
+        'usuarios_unicos': len(agregados['usuarios']),
+        'tipos_cuestionario': len(agregados['cuestionarios']),
+        'calificacion_promedio': (agregados['suma'] / agregados['con_calificacion']
+                                  if agregados['con_calificacion'] else None),
+        'fecha_minima': agregados['fecha_minima'],
+        'fecha_maxima': agregados['fecha_maxima'],
+    }
+
+def resumen_archivos_mensuales(desde, hasta, directorio=None, procesos=None):
+    """Estadísticas de [desde, hasta) repartidas por archivo mensual en un grupo de procesos
+
+    Cada proceso abre un mes en solo lectura, adjunta dimensiones.db y devuelve sus
+    agregados; aquí se unen. Con un solo proceso (o un solo mes) no se crea el grupo.
+    """
+    directorio = directorio or directorio_por_defecto()
+    ruta_dimensiones = os.path.join(directorio, ARCHIVO_DIMENSIONES)
+    tareas = []
+    for anio_mes in meses_en_directorio(directorio):
+        inicio, fin = limites_mes(anio_mes)
+        if inicio < hasta and fin > desde:
+            ruta = ruta_archivo_mes(directorio, anio_mes)
+            tareas.append((ruta, ruta_dimensiones, leer_control(ruta)[4], max(desde, inicio), min(hasta, fin)))
+
+    total = agregados_vacios()
+    procesos = min(procesos or os.cpu_count() or 1, len(tareas))
+    if procesos <= 1:
+        for parcial in map(agregar_archivo, tareas):
+            unir_agregados(total, parcial)
+        return resumen_desde_agregados(total)
+
+    # multiprocessing solo se carga si hay más de un proceso
+    from multiprocessing import Pool
+    with Pool(procesos) as pool:
+        for parcial in pool.imap_unordered(agregar_archivo, tareas):
+            unir_agregados(total, parcial)
+    return resumen_desde_agregados(total)
+
+def resumen_base_unica(conn, desde, hasta):
+    """Las mismas estadísticas con una sola consulta sobre la base principal (para comparar)"""
+    cursor = conn.execute(SELECT_AGREGADOS.format(dimensiones=''), (desde, hasta))
+    return resumen_desde_agregados(acumular_agregados(agregados_vacios(), cursor))
+
+def main():
+    """Sincroniza los archivos mensuales y compara la consulta repartida con la base única"""
+    parser = argparse.ArgumentParser(description="Archivos SQLite por mes y consultas en paralelo")
+    parser.add_argument('--directorio', default=None,
+                        help=f"Directorio de los archivos (por defecto {NOMBRE_DIRECTORIO} junto a la base)")
+    parser.add_argument('--desde', default='2025-01-01', help="Fecha inicial incluida (por defecto 2025-01-01)")
+    parser.add_argument('--hasta', default='2026-01-01', help="Fecha final excluida (por defecto 2026-01-01)")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Procesos de la consulta repartida (por defecto, núcleos disponibles)")
+    args = parser.parse_args()
+    directorio = args.directorio or directorio_por_defecto()
+
+    conn = sqlite3.connect(ruta_sqlite())
+    try:
+        inicio = time.perf_counter()
+        escritos = sincronizar_archivos_mensuales(conn, directorio)
+        print(f"Archivos mensuales en '{directorio}': {', '.join(escritos) if escritos else 'sin cambios'} "
+              f"({time.perf_counter() - inicio:.2f} s)")
+
+        inicio = time.perf_counter()
+        unica = resumen_base_unica(conn, args.desde, args.hasta)
+        segundos_unica = time.perf_counter() - inicio
+    finally:
+        conn.close()
+
+    inicio = time.perf_counter()
+    repartida = resumen_archivos_mensuales(args.desde, args.hasta, directorio, args.procesos)
+    segundos_repartida = time.perf_counter() - inicio
+
+    print(f"\nEstadísticas de {args.desde} a {args.hasta} (sin incluir):")
+    for clave, valor in repartida.items():
+        print(f"- {clave}: {valor}")
+    print(f"\nBase única: {segundos_unica:.3f} s; archivos mensuales "
+          f"({args.procesos or os.cpu_count() or 1} procesos como máximo): {segundos_repartida:.3f} s")
+    if repartida != unica:
+        print("Error: la consulta repartida no coincide con la base única")
+        raise SystemExit(1)
+    print("Los resultados coinciden con la base única")
+
+if __name__ == "__main__":
+    main()
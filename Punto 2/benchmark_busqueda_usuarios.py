@@ -0,0 +1,191 @@
+"""
+Benchmark de la búsqueda de usuarios y de la consulta de sus encuestas (busqueda_usuarios.py).
+
+Arma una base temporal con el esquema del cargador, usuarios sintéticos con nombres,
+emails y teléfonos variados y encuestas repartidas entre ellos, y mide la latencia
+(p50/p95/p99) de:
+
+- buscar_usuarios por email completo, por nombre y apellido y por fragmento de teléfono,
+  con el índice FTS5 trigram y con el recorrido LIKE sobre usuarios;
+- encuestas_de_usuario y resumen_usuario con idx_encuestas_usuario_fecha y sin él.
+
+También informa el tiempo de construcción y el tamaño de cada índice.
+
+Uso:
+    python benchmark_busqueda_usuarios.py --usuarios 1000000 --encuestas 3000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from almacenamiento import ddl_dimensiones, ddl_encuestas, INDICES_ENCUESTAS
+from busqueda_usuarios import (
+    TABLA_BUSQUEDA, crear_indice_usuarios, buscar_usuarios, encuestas_de_usuario, resumen_usuario
+)
+
+NOMBRES = ['Ana', 'Andrés', 'Camila', 'Carlos', 'Daniela', 'David', 'Diana', 'Felipe', 'Gabriela', 'Jorge',
+           'José', 'Juan', 'Julián', 'Laura', 'Luis', 'Manuela', 'María', 'Mateo', 'Natalia', 'Paula',
+           'Santiago', 'Sara', 'Sebastián', 'Sofía', 'Valentina', 'Valeria']
+APELLIDOS = ['Álvarez', 'Castro', 'Díaz', 'Gómez', 'González', 'Gutiérrez', 'Hernández', 'Jiménez', 'López',
+             'Martínez', 'Moreno', 'Muñoz', 'Ortiz', 'Pérez', 'Ramírez', 'Restrepo', 'Rodríguez', 'Rojas',
+             'Ruiz', 'Sánchez', 'Torres', 'Vargas']
+DOMINIOS = ['example.org', 'correo.co', 'mail.com', 'empresa.com.co']
+
+TAMANO_BLOQUE = 100000
+
+def sin_tildes(texto):
+    return texto.translate(str.maketrans('áéíóúñÁÉÍÓÚÑ', 'aeiounAEIOUN'))
+
+def generar_usuarios(cantidad, aleatorio):
+    """(id_usuario, nombre, telefono, email) sintéticos; algunos sin teléfono"""
+    for id_usuario in range(1, cantidad + 1):
+        nombre, apellido = aleatorio.choice(NOMBRES), aleatorio.choice(APELLIDOS)
+        segundo = aleatorio.choice(APELLIDOS)
+        email = f"{sin_tildes(nombre).lower()}.{sin_tildes(apellido).lower()}{id_usuario}@{aleatorio.choice(DOMINIOS)}"
+        telefono = None if aleatorio.random() < 0.02 else f"3{aleatorio.randint(0, 299999999):09d}"
+        yield id_usuario, f"{nombre} {apellido} {segundo}", telefono, email
+
+def generar_encuestas(cantidad, usuarios, aleatorio):
+    """Encuestas sintéticas con la columna hash_unico entera (estrategia de claves 'int64')"""
+    for i in range(1, cantidad + 1):
+        fecha = (f"2025-{aleatorio.randint(1, 12):02d}-{aleatorio.randint(1, 28):02d} "
+                 f"{aleatorio.randint(0, 23):02d}:{aleatorio.randint(0, 59):02d}:"
+                 f"{aleatorio.randint(0, 59):02d}.{i % 1000:03d}")
+        yield (aleatorio.randint(1, 2), aleatorio.randint(1, 3), aleatorio.choice([1, 2, 3, 4, 5, None]),
+               fecha, aleatorio.randint(1, usuarios), i)
+
+def insertar_por_bloques(conn, sql, filas):
+    bloque = []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) == TAMANO_BLOQUE:
+            conn.executemany(sql, bloque)
+            bloque = []
+    conn.executemany(sql, bloque)
+
+def preparar_base(ruta, usuarios, encuestas, semilla=42):
+    """Crea la base con el esquema del cargador y los datos sintéticos, sin índices secundarios"""
+    aleatorio = random.Random(semilla)
+    conn = sqlite3.connect(ruta)
+    conn.execute('PRAGMA journal_mode = OFF;')
+    conn.execute('PRAGMA synchronous = OFF;')
+    for ddl in ddl_dimensiones():
+        conn.execute(ddl)
+    conn.execute(ddl_encuestas(tipo_clave='INTEGER'))
+    conn.executemany("INSERT INTO dimension_calificaciones VALUES (?, ?, ?)",
+                     [(k, k, descripcion) for k, descripcion in
+                      enumerate(['Muy malo', 'Malo', 'Regular', 'Bueno', 'Excelente'], start=1)])
+    conn.executemany("INSERT INTO dimension_estados VALUES (?, ?)", [(1, 'Pendiente'), (2, 'Contestada')])
+    conn.executemany("INSERT INTO dimension_cuestionarios VALUES (?, ?)",
+                     [(1, 'Atencion'), (2, 'Agilidad'), (3, 'Recomendacion')])
+    insertar_por_bloques(conn, "INSERT INTO usuarios (id_usuario, nombre, telefono, email) VALUES (?, ?, ?, ?)",
+                         generar_usuarios(usuarios, aleatorio))
+    insertar_por_bloques(conn, '''
+        INSERT INTO encuestas (id_estado_encuesta, id_cuestionario, id_calificacion, fecha_insercion,
+                               usuario_id, hash_unico)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', generar_encuestas(encuestas, usuarios, aleatorio))
+    conn.commit()
+    return conn
+
+def tamano_objetos(conn, condicion, parametros=()):
+    """Bytes en disco de los objetos de sqlite_master que cumplen la condición (dbstat), o None"""
+    try:
+        cursor = conn.execute(f'''
+            SELECT COALESCE(SUM(pgsize), 0) FROM dbstat
+            WHERE name IN (SELECT name FROM sqlite_master WHERE {condicion})
+        ''', parametros)
+        return cursor.fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+
+def cronometrar(funcion):
+    inicio = time.perf_counter()
+    funcion()
+    return time.perf_counter() - inicio
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def medir_latencias(consultas, funcion):
+    """Latencias en segundos de funcion(consulta) para cada consulta, y filas devueltas en total"""
+    latencias, filas = [], 0
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        filas += len(funcion(consulta))
+        latencias.append(time.perf_counter() - inicio)
+    return latencias, filas
+
+def imprimir_fila(nombre, metodo, latencias, filas):
+    print(f"{nombre:<26}{metodo:<14}{percentil(latencias, 50) * 1000:>10.2f}{percentil(latencias, 95) * 1000:>10.2f}"
+          f"{percentil(latencias, 99) * 1000:>10.2f}{len(latencias):>10}{filas / len(latencias):>10.1f}")
+
+def textos_de_busqueda(conn, cantidad, aleatorio):
+    """Consultas de cada tipo armadas desde usuarios reales de la base"""
+    maximo = conn.execute("SELECT MAX(id_usuario) FROM usuarios").fetchone()[0]
+    ids = [aleatorio.randint(1, maximo) for _ in range(cantidad)]
+    muestras = [conn.execute("SELECT nombre, telefono, email FROM usuarios WHERE id_usuario = ?",
+                             (id_usuario,)).fetchone() for id_usuario in ids]
+    return {
+        'email completo': [email for _, _, email in muestras],
+        'nombre y apellido': [' '.join(nombre.split()[:2]) for nombre, _, _ in muestras],
+        'fragmento de teléfono': [telefono[-7:] for _, telefono, _ in muestras if telefono],
+    }, ids
+
+def main():
+    """Ejecuta el benchmark e imprime los tiempos de construcción y las latencias"""
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda de usuarios y de sus encuestas")
+    parser.add_argument('--usuarios', type=int, default=1000000, help="Cantidad de usuarios sintéticos")
+    parser.add_argument('--encuestas', type=int, default=3000000, help="Cantidad de encuestas sintéticas")
+    parser.add_argument('--consultas', type=int, default=200, help="Consultas por tipo con índice")
+    parser.add_argument('--consultas-recorrido', type=int, default=10,
+                        help="Consultas por tipo sin índice (cada una recorre la tabla)")
+    args = parser.parse_args()
+    aleatorio = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'bench_busqueda.db')
+        print(f"Generando {args.usuarios:,} usuarios y {args.encuestas:,} encuestas sintéticas...")
+        inicio = time.perf_counter()
+        conn = preparar_base(ruta, args.usuarios, args.encuestas)
+        print(f"   - Base generada en {time.perf_counter() - inicio:.1f} s")
+
+        definicion = INDICES_ENCUESTAS['idx_encuestas_usuario_fecha']
+        segundos_fts = cronometrar(lambda: (crear_indice_usuarios(conn), conn.commit()))
+        segundos_usuario = cronometrar(lambda: conn.execute(f"CREATE INDEX idx_encuestas_usuario_fecha ON {definicion}"))
+        conn.commit()
+        tamano_fts = tamano_objetos(conn, "name LIKE ?", (f"{TABLA_BUSQUEDA}%",))
+        tamano_usuario = tamano_objetos(conn, "name = 'idx_encuestas_usuario_fecha'")
+        print(f"\n{'Índice':<34}{'Construcción (s)':>18}{'Tamaño (MB)':>14}")
+        for nombre, segundos, tamano in [(f"{TABLA_BUSQUEDA} (FTS5 trigram)", segundos_fts, tamano_fts),
+                                         ('idx_encuestas_usuario_fecha', segundos_usuario, tamano_usuario)]:
+            print(f"{nombre:<34}{segundos:>18.2f}{'-' if tamano is None else f'{tamano / 1e6:.1f}':>14}")
+
+        busquedas, ids = textos_de_busqueda(conn, args.consultas, aleatorio)
+        print(f"\n{'Consulta':<26}{'Método':<14}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}"
+              f"{'Consultas':>10}{'Filas':>10}")
+        for nombre, textos in busquedas.items():
+            latencias, filas = medir_latencias(textos, lambda texto: buscar_usuarios(conn, texto))
+            imprimir_fila(nombre, 'FTS5 trigram', latencias, filas)
+            latencias, filas = medir_latencias(textos[:args.consultas_recorrido],
+                                               lambda texto: buscar_usuarios(conn, texto, usar_indice=False))
+            imprimir_fila(nombre, 'LIKE', latencias, filas)
+
+        consultas_usuario = {
+            'encuestas del usuario': lambda id_usuario: encuestas_de_usuario(conn, id_usuario),
+            'resumen del usuario': lambda id_usuario: [resumen_usuario(conn, id_usuario)],
+        }
+        for nombre, funcion in consultas_usuario.items():
+            imprimir_fila(nombre, 'índice', *medir_latencias(ids, funcion))
+        conn.execute("DROP INDEX idx_encuestas_usuario_fecha")
+        for nombre, funcion in consultas_usuario.items():
+            imprimir_fila(nombre, 'recorrido', *medir_latencias(ids[:args.consultas_recorrido], funcion))
+        conn.close()
+
+if __name__ == "__main__":
+    main()
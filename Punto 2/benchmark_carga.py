@@ -0,0 +1,199 @@
+"""
+Benchmark de punta a punta: generación, carga, tabla unificada y diccionario de datos.
+
+Arma una copia del proyecto (Punto 2, 3 y 4) en un directorio de trabajo, genera los
+CSV sintéticos con generar_datos_sinteticos.py y ejecuta cada script en su propio
+proceso. Por etapa registra segundos, filas por segundo y memoria pico del proceso
+(en Linux/macOS); al final, el tamaño de la base. Cada corrida se agrega a un archivo
+JSON junto con el commit, para comparar entre versiones; si hay una corrida anterior
+con los mismos parámetros se muestra la diferencia.
+
+La memoria pico del modo paralelo corresponde solo al proceso escritor.
+
+Uso:
+    python benchmark_carga.py --filas 1000000 --modo lotes --perfil masivo
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from generar_datos_sinteticos import agregar_argumentos, parametros_generador, generar_datos
+
+DIRECTORIO_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ARCHIVO_RESULTADOS = 'benchmark_resultados.json'
+
+NOMBRE_DB = 'encuestas_usuarios_simplificada.db'
+
+def preparar_copia_proyecto(destino):
+    """Copia los scripts de los Puntos 2 a 4 (y la dimensión de calificaciones) al destino"""
+    for punto in ['Punto 2', 'Punto 3', 'Punto 4']:
+        origen = os.path.join(DIRECTORIO_PROYECTO, punto)
+        os.makedirs(os.path.join(destino, punto), exist_ok=True)
+        for nombre in os.listdir(origen):
+            if nombre.endswith('.py') or (punto == 'Punto 2' and nombre == 'dimension_calificaciones.csv'):
+                shutil.copy2(os.path.join(origen, nombre), os.path.join(destino, punto, nombre))
+
+def ejecutar_etapa(script, argumentos, directorio, bitacora):
+    """Ejecuta un script en un proceso aparte
+
+    Devuelve (segundos, memoria_pico_mb, salida). La memoria sale de wait4, que da el
+    uso de recursos de ese proceso en particular; donde no existe queda en None.
+    """
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen([sys.executable, script, *argumentos], cwd=directorio,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    salida = proceso.stdout.read()
+    memoria_pico_mb = None
+    if hasattr(os, 'wait4'):
+        _, estado, uso = os.wait4(proceso.pid, 0)
+        proceso.returncode = os.waitstatus_to_exitcode(estado)
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        memoria_pico_mb = uso.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    else:
+        proceso.wait()
+    segundos = time.perf_counter() - inicio
+
+    with open(bitacora, 'a', encoding='utf-8') as archivo:
+        archivo.write(f"$ python {script} {' '.join(argumentos)}\n{salida}\n")
+    if proceso.returncode != 0 or 'Error' in salida:
+        raise RuntimeError(f"{script} falló (código {proceso.returncode}); ver {bitacora}")
+    return segundos, memoria_pico_mb, salida
+
+def ultimo_entero(patron, texto):
+    """Último entero capturado por el patrón en el texto (admite separadores de miles)"""
+    encontrados = re.findall(patron, texto, re.MULTILINE)
+    return int(encontrados[-1].replace(',', '')) if encontrados else None
+
+def resultado_etapa(segundos, filas, memoria_pico_mb, **extra):
+    """Registro de una etapa para el JSON de resultados"""
+    resultado = {
+        'segundos': round(segundos, 3),
+        'filas': filas,
+        'filas_por_segundo': round(filas / segundos) if filas and segundos else None,
+        'memoria_pico_mb': round(memoria_pico_mb, 1) if memoria_pico_mb is not None else None,
+    }
+    resultado.update(extra)
+    return resultado
+
+def commit_actual():
+    """Commit de git del proyecto, o None si no se puede obtener"""
+    try:
+        salida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRECTORIO_PROYECTO,
+                                capture_output=True, text=True, check=True)
+        return salida.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def ejecutar_benchmark(directorio, parametros, modo, perfil):
+    """Corre todas las etapas en el directorio y devuelve el registro de la corrida"""
+    preparar_copia_proyecto(directorio)
+    punto2 = os.path.join(directorio, 'Punto 2')
+    bitacora = os.path.join(directorio, 'benchmark.log')
+    etapas = {}
+
+    print(f"Generando {parametros['filas']:,} encuestas sintéticas...")
+    generado = generar_datos(punto2, **parametros)
+    etapas['generacion'] = resultado_etapa(generado['segundos'], generado['filas'], None,
+                                           duplicadas_generadas=generado['duplicadas_generadas'])
+
+    print(f"Cargando (modo {modo}, perfil {perfil})...")
+    segundos, memoria, salida = ejecutar_etapa('cargar_datos_simplificado.py',
+                                               ['--modo', modo, '--perfil', perfil], punto2, bitacora)
+    etapas['carga'] = resultado_etapa(segundos, parametros['filas'], memoria,
+                                      encuestas_cargadas=ultimo_entero(r'^(\d+) encuestas cargadas', salida))
+    consolidacion = re.search(r'eliminados: (\d+) \(([\d.]+) s\)', salida)
+    etapas['deduplicacion'] = {
+        'duplicadas_omitidas': ultimo_entero(r'Encuestas duplicadas omitidas: (\d+)', salida),
+        # Solo el perfil masivo deduplica en una pasada aparte; en los demás va dentro de la carga
+        'segundos_pasada_final': float(consolidacion.group(2)) if consolidacion else None,
+    }
+    tamano_carga = os.path.getsize(os.path.join(punto2, NOMBRE_DB))
+
+    print("Construyendo la tabla unificada (Punto 3)...")
+    segundos, memoria, salida = ejecutar_etapa('ejecutar_punto3.py', ['--reconstruir'],
+                                               os.path.join(directorio, 'Punto 3'), bitacora)
+    etapas['tabla_unificada'] = resultado_etapa(segundos, ultimo_entero(r'Total de registros: ([\d,]+)', salida),
+                                                memoria)
+
+    print("Generando el diccionario de datos (Punto 4)...")
+    segundos, memoria, salida = ejecutar_etapa('punto4_diccionario_datos.py', [],
+                                               os.path.join(directorio, 'Punto 4'), bitacora)
+    etapas['diccionario'] = resultado_etapa(segundos, ultimo_entero(r'Total registros: ([\d,]+)', salida), memoria)
+
+    return {
+        'fecha': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'commit': commit_actual(),
+        'parametros': dict(parametros, modo=modo, perfil=perfil),
+        'etapas': etapas,
+        'tamano_db_mb': {
+            'tras_carga': round(tamano_carga / 1e6, 2),
+            'final': round(os.path.getsize(os.path.join(punto2, NOMBRE_DB)) / 1e6, 2),
+        }
+    }
+
+def guardar_resultado(ruta, corrida):
+    """Agrega la corrida al archivo JSON y devuelve la corrida anterior con los mismos parámetros"""
+    corridas = []
+    if os.path.exists(ruta):
+        with open(ruta, 'r', encoding='utf-8') as archivo:
+            corridas = json.load(archivo)
+    anteriores = [c for c in corridas if c['parametros'] == corrida['parametros']]
+    corridas.append(corrida)
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(corridas, archivo, ensure_ascii=False, indent=2)
+    return anteriores[-1] if anteriores else None
+
+def imprimir_resultado(corrida, anterior):
+    """Tabla de la corrida, con la variación frente a la anterior si existe"""
+    referencia = f" (vs {anterior['commit'] or anterior['fecha']})" if anterior else ""
+    print(f"\n{'Etapa':<18}{'Segundos':>10}{'Filas/seg':>12}{'Mem. pico MB':>14}{'Variación' + referencia:>24}")
+    for nombre, etapa in corrida['etapas'].items():
+        if 'segundos' not in etapa:
+            continue
+        variacion = ''
+        if anterior and nombre in anterior['etapas']:
+            previo = anterior['etapas'][nombre]['segundos']
+            variacion = f"{100 * (etapa['segundos'] - previo) / previo:+.1f} %" if previo else ''
+        filas_seg = '-' if etapa['filas_por_segundo'] is None else f"{etapa['filas_por_segundo']:,}"
+        memoria = '-' if etapa['memoria_pico_mb'] is None else f"{etapa['memoria_pico_mb']:.1f}"
+        print(f"{nombre:<18}{etapa['segundos']:>10.2f}{filas_seg:>12}{memoria:>14}{variacion:>24}")
+    dedup = corrida['etapas']['deduplicacion']
+    print(f"Duplicadas omitidas: {dedup['duplicadas_omitidas']}"
+          + (f" (pasada final {dedup['segundos_pasada_final']:.2f} s)" if dedup['segundos_pasada_final'] else ""))
+    print(f"Base de datos: {corrida['tamano_db_mb']['tras_carga']} MB tras la carga, "
+          f"{corrida['tamano_db_mb']['final']} MB al final")
+
+def main():
+    """Ejecuta el benchmark con los parámetros de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Benchmark de carga, tabla unificada y diccionario")
+    agregar_argumentos(parser)
+    parser.add_argument('--modo', choices=['fila', 'lotes', 'paralelo'], default='lotes')
+    parser.add_argument('--perfil', choices=['seguro', 'masivo'], default='seguro')
+    parser.add_argument('--resultados', default=ARCHIVO_RESULTADOS,
+                        help=f"Archivo JSON donde se acumulan las corridas (por defecto {ARCHIVO_RESULTADOS})")
+    parser.add_argument('--directorio', default=None,
+                        help="Directorio de trabajo; por defecto uno temporal que se borra al terminar")
+    args = parser.parse_args()
+
+    parametros = parametros_generador(args)
+    if args.directorio:
+        corrida = ejecutar_benchmark(args.directorio, parametros, args.modo, args.perfil)
+    else:
+        with tempfile.TemporaryDirectory() as directorio:
+            corrida = ejecutar_benchmark(directorio, parametros, args.modo, args.perfil)
+
+    anterior = guardar_resultado(args.resultados, corrida)
+    imprimir_resultado(corrida, anterior)
+    print(f"\nResultados agregados a {args.resultados}")
+
+if __name__ == "__main__":
+    main()
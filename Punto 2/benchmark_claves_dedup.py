@@ -0,0 +1,112 @@
+"""
+Benchmark de estrategias de clave de deduplicación.
+
+Para cada estrategia de claves_dedup.py (y la llave natural compuesta como referencia)
+mide la velocidad de generación de claves y el tamaño en disco del índice UNIQUE.
+
+Uso:
+    python benchmark_claves_dedup.py --filas 1000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from claves_dedup import ESTRATEGIAS, clave_md5, tipo_sql
+
+def generar_filas(cantidad, semilla=42):
+    """Genera valores limpios de encuestas sintéticas: (usuario_id, fecha_insercion, id_cuestionario, id_calificacion)"""
+    aleatorio = random.Random(semilla)
+    filas = []
+    for i in range(cantidad):
+        fecha = (f"2025-{aleatorio.randint(1, 12):02d}-{aleatorio.randint(1, 28):02d} "
+                 f"{aleatorio.randint(0, 23):02d}:{aleatorio.randint(0, 59):02d}:"
+                 f"{aleatorio.randint(0, 59):02d}.{i % 1000:03d}")
+        filas.append((aleatorio.randint(1, 100000), fecha, aleatorio.randint(1, 3),
+                      aleatorio.choice([1, 2, 3, 4, 5, None])))
+    return filas
+
+def generar_claves(estrategia, filas):
+    """Genera las claves de todas las filas con la estrategia indicada"""
+    funcion = ESTRATEGIAS[estrategia][1]
+    if funcion is None:
+        # md5 trabaja sobre la fila cruda del CSV
+        return [clave_md5({'usuario_id': str(u), 'Fecha_Insercion': f,
+                           'IdCuestionario': str(c), 'Calificacion': 'NULL' if k is None else str(k)})
+                for u, f, c, k in filas]
+    return [funcion(u, f, c, k) for u, f, c, k in filas]
+
+def tamano_indice(conn, tabla):
+    """Bytes en disco de los índices de la tabla (dbstat), o None si SQLite no trae dbstat"""
+    try:
+        cursor = conn.execute('''
+            SELECT COALESCE(SUM(pgsize), 0) FROM dbstat
+            WHERE name IN (SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?)
+        ''', (tabla,))
+        return cursor.fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+
+def medir_estrategia(nombre, tipo, filas, claves, directorio):
+    """Carga las filas con su clave en una base temporal y mide índice y archivo"""
+    ruta = os.path.join(directorio, f"bench_{nombre}.db")
+    conn = sqlite3.connect(ruta)
+    if claves is None:
+        # Llave natural compuesta: índice UNIQUE sobre las 4 columnas, sin columna extra
+        conn.execute('''
+            CREATE TABLE encuestas (
+                id_encuesta INTEGER PRIMARY KEY, usuario_id INTEGER, fecha_insercion TEXT,
+                id_cuestionario INTEGER, id_calificacion INTEGER,
+                UNIQUE (usuario_id, fecha_insercion, id_cuestionario, id_calificacion)
+            )
+        ''')
+        conn.executemany('''
+            INSERT OR IGNORE INTO encuestas (usuario_id, fecha_insercion, id_cuestionario, id_calificacion)
+            VALUES (?, ?, ?, ?)
+        ''', filas)
+    else:
+        conn.execute(f'''
+            CREATE TABLE encuestas (
+                id_encuesta INTEGER PRIMARY KEY, usuario_id INTEGER, fecha_insercion TEXT,
+                id_cuestionario INTEGER, id_calificacion INTEGER, hash_unico {tipo} UNIQUE
+            )
+        ''')
+        conn.executemany('''
+            INSERT OR IGNORE INTO encuestas (usuario_id, fecha_insercion, id_cuestionario, id_calificacion, hash_unico)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (fila + (clave,) for fila, clave in zip(filas, claves)))
+    conn.commit()
+    indice = tamano_indice(conn, 'encuestas')
+    conn.close()
+    return indice, os.path.getsize(ruta)
+
+def main():
+    """Ejecuta el benchmark e imprime la tabla comparativa"""
+    parser = argparse.ArgumentParser(description="Benchmark de claves de deduplicación")
+    parser.add_argument('--filas', type=int, default=200000, help="Cantidad de encuestas sintéticas")
+    args = parser.parse_args()
+
+    print(f"Generando {args.filas:,} encuestas sintéticas...")
+    filas = generar_filas(args.filas)
+
+    print(f"\n{'Estrategia':<14}{'Tipo':<9}{'Claves/seg':>14}{'Índice (MB)':>14}{'Archivo (MB)':>14}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for nombre in list(ESTRATEGIAS) + ['natural']:
+            if nombre == 'natural':
+                tipo, claves, claves_seg = '4 cols', None, None
+            else:
+                tipo = tipo_sql(nombre)
+                inicio = time.perf_counter()
+                claves = generar_claves(nombre, filas)
+                claves_seg = len(filas) / (time.perf_counter() - inicio)
+            indice, archivo = medir_estrategia(nombre, tipo, filas, claves, directorio)
+            print(f"{nombre:<14}{tipo:<9}"
+                  f"{'-' if claves_seg is None else f'{claves_seg:,.0f}':>14}"
+                  f"{'-' if indice is None else f'{indice / 1e6:.2f}':>14}"
+                  f"{archivo / 1e6:>14.2f}")
+
+if __name__ == "__main__":
+    main()
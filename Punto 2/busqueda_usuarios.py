@@ -0,0 +1,214 @@
+"""
+Búsqueda de usuarios por nombre, email o teléfono y consulta de sus encuestas.
+
+Es la consulta más común de las aplicaciones que leen la tabla unificada: "todas las
+encuestas y calificaciones del usuario X", buscando al usuario por un fragmento de su
+nombre, email o teléfono.
+
+- usuarios_busqueda es una tabla FTS5 con tokenizador trigram y contenido externo
+  (content='usuarios'): no duplica los textos, solo guarda el índice de trigramas, y
+  encuentra subcadenas de 3 o más caracteres sin recorrer usuarios. Los disparadores
+  sobre usuarios la mantienen al día en la carga incremental; en una carga completa se
+  suspenden y el índice se reconstruye una vez al final (como los índices de encuestas).
+- Las encuestas de un usuario salen del índice idx_encuestas_usuario_fecha
+  (almacenamiento.INDICES_ENCUESTAS), ya ordenadas por fecha_insercion.
+
+Si la base no tiene el índice (bases anteriores, PostgreSQL, o un SQLite sin FTS5 o
+anterior a 3.34, que no trae el tokenizador trigram) o alguna palabra buscada tiene menos
+de 3 caracteres, la búsqueda usa LIKE sobre usuarios (recorrido completo).
+
+Uso desde una aplicación:
+    from busqueda_usuarios import buscar_usuarios, encuestas_de_usuario, buscar_encuestas_de_usuarios
+
+    for usuario in buscar_encuestas_de_usuarios(conn, 'maria.gomez'):
+        print(usuario['nombre'], usuario['total_encuestas'], usuario['encuestas'][:3])
+"""
+
+import sqlite3
+
+TABLA_BUSQUEDA = 'usuarios_busqueda'
+
+# Tokenizador de la tabla FTS (SQLite 3.34 o posterior)
+TOKENIZADOR = 'trigram'
+
+# Columnas de usuarios que se indexan (en el orden de la tabla FTS)
+COLUMNAS_BUSQUEDA = ['nombre', 'email', 'telefono']
+
+# Disparadores que mantienen el índice; se eliminan durante una carga completa
+DISPARADORES_BUSQUEDA = {
+    'usuarios_busqueda_ai': f'''
+        AFTER INSERT ON usuarios BEGIN
+            INSERT INTO {TABLA_BUSQUEDA} (rowid, nombre, email, telefono)
+            VALUES (new.id_usuario, new.nombre, new.email, new.telefono);
+        END
+    ''',
+    'usuarios_busqueda_ad': f'''
+        AFTER DELETE ON usuarios BEGIN
+            INSERT INTO {TABLA_BUSQUEDA} ({TABLA_BUSQUEDA}, rowid, nombre, email, telefono)
+            VALUES ('delete', old.id_usuario, old.nombre, old.email, old.telefono);
+        END
+    ''',
+    'usuarios_busqueda_au': f'''
+        AFTER UPDATE ON usuarios BEGIN
+            INSERT INTO {TABLA_BUSQUEDA} ({TABLA_BUSQUEDA}, rowid, nombre, email, telefono)
+            VALUES ('delete', old.id_usuario, old.nombre, old.email, old.telefono);
+            INSERT INTO {TABLA_BUSQUEDA} (rowid, nombre, email, telefono)
+            VALUES (new.id_usuario, new.nombre, new.email, new.telefono);
+        END
+    ''',
+}
+
+# El tokenizador trigram no encuentra palabras más cortas
+LARGO_MINIMO_TRIGRAMA = 3
+
+LIMITE_USUARIOS = 20
+LIMITE_ENCUESTAS = 100
+
+SELECCION_USUARIOS = "SELECT u.id_usuario, u.nombre, u.telefono, u.email FROM usuarios u"
+
+# Encuestas de un usuario con las descripciones de sus dimensiones, de la más reciente a la más antigua
+SELECCION_ENCUESTAS_USUARIO = '''
+    SELECT
+        e.id_encuesta, e.fecha_insercion, e.id_cuestionario, dq.descripcion AS descripcion_cuestionario,
+        e.id_estado_encuesta, de.estado, e.id_calificacion, dc.calificacion,
+        dc.descripcion AS descripcion_calificacion, e.fecha_modificado, e.hora_modificado
+    FROM encuestas e
+    LEFT JOIN dimension_estados de ON de.id_estado_encuesta = e.id_estado_encuesta
+    LEFT JOIN dimension_cuestionarios dq ON dq.id_cuestionario = e.id_cuestionario
+    LEFT JOIN dimension_calificaciones dc ON dc.id_calificacion = e.id_calificacion
+    WHERE e.usuario_id = ?{rango}
+    ORDER BY e.fecha_insercion DESC
+    LIMIT ?
+'''
+
+def indice_usuarios_disponible(conn):
+    """Indica si la base tiene la tabla FTS de búsqueda de usuarios"""
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLA_BUSQUEDA,))
+    return cursor.fetchone() is not None
+
+def crear_disparadores_busqueda(conn):
+    for nombre, definicion in DISPARADORES_BUSQUEDA.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {nombre} {definicion}")
+
+def crear_indice_usuarios(conn):
+    """Crea el índice de búsqueda y sus disparadores si no existen
+
+    Si la tabla FTS es nueva se llena con los usuarios que ya estaban cargados. Devuelve
+    False si este SQLite no puede crearla (sin FTS5 o sin el tokenizador trigram): no se
+    crean los disparadores y buscar_usuarios usa LIKE.
+    """
+    nuevo = not indice_usuarios_disponible(conn)
+    try:
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_BUSQUEDA} USING fts5(
+                {', '.join(COLUMNAS_BUSQUEDA)},
+                content='usuarios', content_rowid='id_usuario', tokenize='{TOKENIZADOR}'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        return False
+    if nuevo:
+        conn.execute(f"INSERT INTO {TABLA_BUSQUEDA} ({TABLA_BUSQUEDA}) VALUES ('rebuild')")
+    crear_disparadores_busqueda(conn)
+    return True
+
+def suspender_indice_usuarios(conn):
+    """Elimina los disparadores del índice para reconstruirlo al final de una carga completa"""
+    for nombre in DISPARADORES_BUSQUEDA:
+        conn.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+
+def reconstruir_indice_usuarios(conn):
+    """Reconstruye el índice desde usuarios en una sola pasada y vuelve a crear los disparadores
+
+    Devuelve False si el índice no está disponible (ver crear_indice_usuarios).
+    """
+    if indice_usuarios_disponible(conn):
+        conn.execute(f"INSERT INTO {TABLA_BUSQUEDA} ({TABLA_BUSQUEDA}) VALUES ('rebuild')")
+    return crear_indice_usuarios(conn)
+
+def eliminar_indice_usuarios(conn):
+    """Elimina el índice (se usa cuando la tabla usuarios se reconstruye)"""
+    suspender_indice_usuarios(conn)
+    conn.execute(f"DROP TABLE IF EXISTS {TABLA_BUSQUEDA}")
+
+def expresion_fts(palabras):
+    """Expresión MATCH: cada palabra es una frase entre comillas y deben aparecer todas"""
+    return ' '.join('"' + palabra.replace('"', '""') + '"' for palabra in palabras)
+
+def patron_like(palabra):
+    """Patrón LIKE de subcadena con los comodines de la palabra escapados"""
+    return '%' + palabra.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+def como_diccionarios(cursor):
+    columnas = [descripcion[0] for descripcion in cursor.description]
+    return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+def buscar_usuarios(conn, texto, limite=LIMITE_USUARIOS, usar_indice=True):
+    """Usuarios cuyo nombre, email o teléfono contienen todas las palabras de texto
+
+    Los resultados vienen por id_usuario con o sin índice. No se ordenan por relevancia
+    (bm25): con nombres comunes habría que puntuar miles de coincidencias antes del LIMIT.
+    usar_indice=False fuerza el recorrido LIKE (para comparar).
+    """
+    palabras = texto.split()
+    if not palabras:
+        return []
+    indexable = min(len(palabra) for palabra in palabras) >= LARGO_MINIMO_TRIGRAMA
+    if usar_indice and indexable and indice_usuarios_disponible(conn):
+        cursor = conn.execute(f'''
+            {SELECCION_USUARIOS}
+            JOIN {TABLA_BUSQUEDA} b ON b.rowid = u.id_usuario
+            WHERE {TABLA_BUSQUEDA} MATCH ?
+            ORDER BY b.rowid
+            LIMIT ?
+        ''', (expresion_fts(palabras), limite))
+    else:
+        condicion = ' OR '.join(f"u.{columna} LIKE ? ESCAPE '\\'" for columna in COLUMNAS_BUSQUEDA)
+        valores = [patron_like(palabra) for palabra in palabras for _ in COLUMNAS_BUSQUEDA]
+        cursor = conn.execute(f'''
+            {SELECCION_USUARIOS}
+            WHERE {' AND '.join(f'({condicion})' for _ in palabras)}
+            ORDER BY u.id_usuario
+            LIMIT ?
+        ''', valores + [limite])
+    return como_diccionarios(cursor)
+
+def encuestas_de_usuario(conn, usuario_id, desde=None, hasta=None, limite=LIMITE_ENCUESTAS):
+    """Encuestas de un usuario con las descripciones de calificación, estado y cuestionario
+
+    desde y hasta filtran fecha_insercion en el rango [desde, hasta). Se devuelven de la
+    más reciente a la más antigua, hasta limite filas.
+    """
+    rango, valores = '', [usuario_id]
+    if desde:
+        rango += " AND e.fecha_insercion >= ?"
+        valores.append(desde)
+    if hasta:
+        rango += " AND e.fecha_insercion < ?"
+        valores.append(hasta)
+    cursor = conn.execute(SELECCION_ENCUESTAS_USUARIO.format(rango=rango), valores + [limite])
+    return como_diccionarios(cursor)
+
+def resumen_usuario(conn, usuario_id):
+    """Total de encuestas, encuestas calificadas, calificación promedio y rango de fechas de un usuario
+
+    Se calcula solo con el índice idx_encuestas_usuario_fecha (y la dimensión de calificaciones).
+    """
+    cursor = conn.execute('''
+        SELECT COUNT(*), COUNT(e.id_calificacion), AVG(dc.calificacion),
+               MIN(e.fecha_insercion), MAX(e.fecha_insercion)
+        FROM encuestas e
+        LEFT JOIN dimension_calificaciones dc ON dc.id_calificacion = e.id_calificacion
+        WHERE e.usuario_id = ?
+    ''', (usuario_id,))
+    total, calificadas, promedio, primera, ultima = cursor.fetchone()
+    return {'total_encuestas': total, 'encuestas_calificadas': calificadas,
+            'calificacion_promedio': promedio, 'primera_encuesta': primera, 'ultima_encuesta': ultima}
+
+def buscar_encuestas_de_usuarios(conn, texto, limite_usuarios=LIMITE_USUARIOS, limite_encuestas=LIMITE_ENCUESTAS):
+    """Busca usuarios por texto y devuelve cada uno con su resumen y sus encuestas más recientes"""
+    usuarios = buscar_usuarios(conn, texto, limite_usuarios)
+    for usuario in usuarios:
+        usuario.update(resumen_usuario(conn, usuario['id_usuario']))
+        usuario['encuestas'] = encuestas_de_usuario(conn, usuario['id_usuario'], limite=limite_encuestas)
+    return usuarios
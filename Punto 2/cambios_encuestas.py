@@ -0,0 +1,163 @@
+"""
+Llave natural y registro de cambios de la carga por fusión (--fusionar).
+
+Una encuesta lógica se identifica por LLAVE_NATURAL: usuario, cuestionario, fecha y hora
+de creación y fecha_insercion. Estos campos no cambian cuando la encuesta cambia de
+estado (Pendiente -> Contestada); lo que sí cambia (estado, calificación, fecha límite,
+fecha y hora de modificación) se actualiza sobre el mismo id_encuesta, solo si
+FechaModificado/HoraModificado es más reciente que lo guardado. Como fecha_insercion es
+parte de la llave, una fila actualizada nunca cambia de mes.
+
+Cada fila insertada o actualizada por la fusión queda en cambios_encuestas con su mes.
+Con ese registro los resúmenes mensuales (rollups_encuestas.py) recalculan solo los
+meses con filas actualizadas, y el Punto 3 refresca esas filas dentro de la partición
+mensual en vez de reconstruirla. Las filas insertadas ya las detectan las marcas de agua
+por id_encuesta; se registran para que el historial de cada carga quede completo.
+
+hash_unico no es parte de la llave natural y tiene un índice UNIQUE: una actualización
+que cambia la calificación puede llevar a la fila a la clave de otra encuesta (misma
+clave de deduplicación, distinta fecha u hora de creación). Esas actualizaciones no se
+aplican (se conserva la versión guardada) y quedan en cambios_encuestas con tipo
+'colision', sin afectar las marcas de agua.
+"""
+
+from datetime import datetime
+
+LLAVE_NATURAL = ['usuario_id', 'id_cuestionario', 'fecha_creado', 'hora_creado', 'fecha_insercion']
+
+INDICE_LLAVE_NATURAL = 'idx_encuestas_llave_natural'
+
+# id_encuesta actualizados que se muestran al final de la carga
+MUESTRA_ACTUALIZADAS = 10
+
+# Filas de la misma llave, la más reciente primero; IS compara también llaves con NULL
+SELECT_POR_LLAVE = f'''
+    SELECT id_encuesta, fecha_modificado, hora_modificado, hash_unico
+    FROM encuestas
+    WHERE {' AND '.join(f"{columna} IS ?" for columna in LLAVE_NATURAL)}
+    ORDER BY fecha_modificado DESC, hora_modificado DESC, id_encuesta DESC
+'''
+
+def crear_indice_llave_natural(conn):
+    """Índice de búsqueda por llave natural (no único: cargas sin --fusionar pueden repetir la llave)"""
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {INDICE_LLAVE_NATURAL} ON encuestas ({', '.join(LLAVE_NATURAL)})")
+
+DDL_CAMBIOS = '''
+    CREATE TABLE {nombre} (
+        id_cambio INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_encuesta INTEGER NOT NULL,
+        año_mes TEXT NOT NULL,
+        tipo TEXT NOT NULL CHECK (tipo IN ('insertada', 'actualizada', 'colision')),
+        fecha_cambio TEXT NOT NULL
+    )
+'''
+
+def crear_tabla_cambios(conn):
+    """Crea el registro de cambios si no existe (o lo pasa a la versión con tipo 'colision')"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'cambios_encuestas'")
+    existente = cursor.fetchone()
+    if existente is None:
+        cursor.execute(DDL_CAMBIOS.format(nombre='cambios_encuestas'))
+    elif "'colision'" not in existente[0]:
+        # Registros creados antes de las colisiones: se copian conservando id_cambio
+        cursor.execute("DROP TABLE IF EXISTS cambios_encuestas_nueva")
+        cursor.execute(DDL_CAMBIOS.format(nombre='cambios_encuestas_nueva'))
+        cursor.execute("INSERT INTO cambios_encuestas_nueva SELECT * FROM cambios_encuestas")
+        cursor.execute("DROP TABLE cambios_encuestas")
+        cursor.execute("ALTER TABLE cambios_encuestas_nueva RENAME TO cambios_encuestas")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_cambios_encuestas_mes
+        ON cambios_encuestas (año_mes, id_cambio)
+    ''')
+
+def eliminar_tabla_cambios(conn):
+    """Elimina el registro (los id_encuesta dejan de valer cuando encuestas se reconstruye)"""
+    conn.execute("DROP TABLE IF EXISTS cambios_encuestas")
+
+def tabla_cambios_existe(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cambios_encuestas'")
+    return cursor.fetchone() is not None
+
+def registrar_actualizadas(cursor, actualizadas):
+    """Registra (id_encuesta, fecha_insercion) de filas actualizadas (sin confirmar la transacción)"""
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor.executemany('''
+        INSERT INTO cambios_encuestas (id_encuesta, año_mes, tipo, fecha_cambio)
+        VALUES (?, substr(?, 1, 7), 'actualizada', ?)
+    ''', [(id_encuesta, fecha_insercion, fecha) for id_encuesta, fecha_insercion in actualizadas])
+
+def registrar_colisiones(cursor, colisiones):
+    """Registra (id_encuesta, fecha_insercion) de actualizaciones omitidas por colisión de hash_unico"""
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor.executemany('''
+        INSERT INTO cambios_encuestas (id_encuesta, año_mes, tipo, fecha_cambio)
+        VALUES (?, substr(?, 1, 7), 'colision', ?)
+    ''', [(id_encuesta, fecha_insercion, fecha) for id_encuesta, fecha_insercion in colisiones])
+
+def registrar_insertadas(cursor, desde_id):
+    """Registra las filas con id_encuesta mayor que desde_id (recién insertadas)"""
+    cursor.execute('''
+        INSERT INTO cambios_encuestas (id_encuesta, año_mes, tipo, fecha_cambio)
+        SELECT id_encuesta, substr(fecha_insercion, 1, 7), 'insertada', ?
+        FROM encuestas WHERE id_encuesta > ?
+    ''', (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), desde_id))
+
+def ultimo_cambio(conn, anio_mes=None):
+    """Último id_cambio registrado (de un mes, si se indica); 0 si no hay registro
+
+    Las colisiones no cambiaron ninguna fila y no cuentan.
+    """
+    if not tabla_cambios_existe(conn):
+        return 0
+    cursor = conn.cursor()
+    if anio_mes is None:
+        cursor.execute("SELECT COALESCE(MAX(id_cambio), 0) FROM cambios_encuestas WHERE tipo != 'colision'")
+    else:
+        cursor.execute("SELECT COALESCE(MAX(id_cambio), 0) FROM cambios_encuestas "
+                       "WHERE año_mes = ? AND tipo != 'colision'", (anio_mes,))
+    return cursor.fetchone()[0]
+
+def meses_actualizados(conn, desde_cambio):
+    """Meses con filas actualizadas después del cambio desde_cambio"""
+    if not tabla_cambios_existe(conn):
+        return []
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT DISTINCT año_mes FROM cambios_encuestas
+        WHERE id_cambio > ? AND tipo = 'actualizada'
+        ORDER BY año_mes
+    ''', (desde_cambio,))
+    return [fila[0] for fila in cursor.fetchall()]
+
+def encuestas_cambiadas(conn, anio_mes, desde_cambio):
+    """id_encuesta del mes insertados o actualizados después del cambio desde_cambio"""
+    if not tabla_cambios_existe(conn):
+        return []
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT DISTINCT id_encuesta FROM cambios_encuestas
+        WHERE año_mes = ? AND id_cambio > ? AND tipo != 'colision'
+    ''', (anio_mes, desde_cambio))
+    return [fila[0] for fila in cursor.fetchall()]
+
+def nuevo_contador_fusion():
+    """Contadores de la carga por fusión (se reportan con reportar_fusion)"""
+    return {'insertadas': 0, 'actualizadas': 0, 'sin_cambios': 0, 'duplicadas': 0, 'colisiones': 0,
+            'muestra_actualizadas': [], 'muestra_colisiones': []}
+
+def reportar_fusion(contador):
+    """Imprime el resumen de la fusión y los primeros id_encuesta actualizados"""
+    print(f"   - Fusión: {contador['insertadas']} insertadas, {contador['actualizadas']} actualizadas, "
+          f"{contador['sin_cambios']} sin cambios (modificación igual o anterior), "
+          f"{contador['duplicadas']} duplicadas, {contador['colisiones']} colisiones de hash_unico")
+    if contador['muestra_actualizadas']:
+        muestra = ', '.join(str(id_encuesta) for id_encuesta in contador['muestra_actualizadas'])
+        print(f"     id_encuesta actualizados: {muestra}"
+              f"{', ...' if contador['actualizadas'] > MUESTRA_ACTUALIZADAS else ''} (detalle en cambios_encuestas)")
+    if contador['muestra_colisiones']:
+        muestra = ', '.join(f"{id_encuesta} -> {id_existente}" for id_encuesta, id_existente in contador['muestra_colisiones'])
+        print(f"     Actualizaciones omitidas porque su hash_unico ya es de otra encuesta (id -> id existente): "
+              f"{muestra}{', ...' if contador['colisiones'] > MUESTRA_ACTUALIZADAS else ''} "
+              f"(tipo 'colision' en cambios_encuestas)")
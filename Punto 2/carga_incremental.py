@@ -0,0 +1,163 @@
+"""
+Carga incremental y reanudable de archivos CSV que solo crecen por el final.
+
+Por cada archivo fuente se guarda una marca de agua en la tabla control_cargas:
+posición en bytes ya procesada, filas leídas y una huella del inicio del archivo.
+Cada lote se escribe junto con su marca de agua en la misma transacción, así
+una carga interrumpida se reanuda desde el último lote confirmado.
+
+La fuente puede ser un patrón glob o un directorio (fuentes_entrada.py): cada archivo
+lleva su propia marca de agua. Un archivo comprimido no se puede retomar por posición,
+así que se carga completo y su marca de agua registra el tamaño comprimido al terminar;
+mientras no cambie se omite en las cargas siguientes.
+"""
+
+import csv
+import hashlib
+import os
+from datetime import datetime
+from itertools import islice
+
+from fuentes_entrada import resolver_fuente, compresion, leer_fuente
+from pipeline_carga import agrupar_en_lotes
+
+# Bytes del inicio del archivo que se usan para la huella
+BYTES_HUELLA = 64 * 1024
+
+def crear_tabla_control(conn):
+    """Crea la tabla de marcas de agua si no existe"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS control_cargas (
+            archivo TEXT PRIMARY KEY,
+            offset_bytes INTEGER NOT NULL,
+            filas_leidas INTEGER NOT NULL,
+            huella TEXT NOT NULL,
+            fecha_actualizacion TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+
+def calcular_huella(ruta, longitud):
+    """MD5 de los primeros `longitud` bytes del archivo (máximo BYTES_HUELLA)"""
+    with open(ruta, 'rb') as file:
+        return hashlib.md5(file.read(min(longitud, BYTES_HUELLA))).hexdigest()
+
+def obtener_marca_agua(conn, ruta):
+    """Devuelve (offset_bytes, filas_leidas) válidos para reanudar, o (0, 0) si hay que empezar de cero
+
+    Si el archivo se reemplazó (cambió su inicio) o es más corto que la marca de agua,
+    se descarta la marca y se vuelve a leer completo; hash_unico evita duplicar filas.
+    """
+    archivo = os.path.abspath(ruta)
+    cursor = conn.cursor()
+    cursor.execute("SELECT offset_bytes, filas_leidas, huella FROM control_cargas WHERE archivo = ?",
+                   (archivo,))
+    marca = cursor.fetchone()
+    if not marca:
+        return 0, 0
+
+    offset_bytes, filas_leidas, huella = marca
+    if os.path.getsize(ruta) < offset_bytes or calcular_huella(ruta, offset_bytes) != huella:
+        print(f"   El archivo {ruta} cambió desde la última carga; se procesa completo")
+        return 0, 0
+    return offset_bytes, filas_leidas
+
+def guardar_marca_agua(conn, ruta, offset_bytes, filas_leidas):
+    """Registra la marca de agua del archivo (sin confirmar la transacción)"""
+    conn.execute('''
+        INSERT INTO control_cargas (archivo, offset_bytes, filas_leidas, huella, fecha_actualizacion)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(archivo) DO UPDATE SET
+            offset_bytes = excluded.offset_bytes,
+            filas_leidas = excluded.filas_leidas,
+            huella = excluded.huella,
+            fecha_actualizacion = excluded.fecha_actualizacion
+    ''', (
+        os.path.abspath(ruta),
+        offset_bytes,
+        filas_leidas,
+        calcular_huella(ruta, offset_bytes),
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    ))
+
+def leer_lotes_desde(ruta, offset_bytes, tamano_lote, limite=None, delimitador=';'):
+    """Lee lotes de filas nuevas a partir de un offset
+
+    Genera (filas, offset_fin) donde offset_fin es la posición en bytes justo después
+    del lote. Una última línea sin salto de línea se considera incompleta (el archivo
+    se sigue escribiendo) y se deja para la próxima carga.
+    """
+    with open(ruta, 'rb') as file:
+        encabezado = file.readline()
+        campos = next(csv.reader([encabezado.decode('utf-8-sig')], delimiter=delimitador))
+        offset_fin = max(offset_bytes, len(encabezado))
+        file.seek(offset_fin)
+
+        restantes = limite
+        while restantes is None or restantes > 0:
+            lineas = list(islice(file, tamano_lote if restantes is None else min(tamano_lote, restantes)))
+            if lineas and not lineas[-1].endswith(b'\n'):
+                lineas.pop()
+            if not lineas:
+                return
+            offset_fin += sum(len(linea) for linea in lineas)
+            if restantes is not None:
+                restantes -= len(lineas)
+            texto = [linea.decode('utf-8') for linea in lineas]
+            yield list(csv.DictReader(texto, fieldnames=campos, delimiter=delimitador)), offset_fin
+
+def cargar_archivo(conn, ruta, escribir_lote, tamano_lote, limite=None):
+    """Procesa solo las filas nuevas de un CSV plano, confirmando cada lote junto con su marca de agua"""
+    crear_tabla_control(conn)
+    offset_bytes, filas_leidas = obtener_marca_agua(conn, ruta)
+    if offset_bytes:
+        print(f"   Reanudando {ruta} desde el byte {offset_bytes:,} ({filas_leidas:,} filas ya cargadas)")
+
+    filas_nuevas = 0
+    for filas, offset_fin in leer_lotes_desde(ruta, offset_bytes, tamano_lote, limite):
+        escribir_lote(filas)
+        filas_nuevas += len(filas)
+        guardar_marca_agua(conn, ruta, offset_fin, filas_leidas + filas_nuevas)
+        conn.commit()
+    return filas_nuevas
+
+def cargar_comprimido(conn, ruta, escribir_lote, tamano_lote, limite=None):
+    """Carga completa de un CSV comprimido que no se haya cargado ya tal como está
+
+    Si una carga anterior se interrumpió o el archivo cambió se procesa de nuevo desde el
+    inicio; hash_unico hace que repetir filas ya cargadas sea idempotente. Con limite no
+    se registra como cargado.
+    """
+    crear_tabla_control(conn)
+    offset_bytes, filas_leidas = obtener_marca_agua(conn, ruta)
+    if offset_bytes == os.path.getsize(ruta):
+        print(f"   {ruta} ya se cargó completo ({filas_leidas:,} filas)")
+        return 0
+
+    filas = leer_fuente(ruta)
+    if limite is not None:
+        filas = islice(filas, limite)
+    filas_nuevas = 0
+    for lote in agrupar_en_lotes(filas, tamano_lote):
+        escribir_lote(lote)
+        filas_nuevas += len(lote)
+        conn.commit()
+    if limite is None:
+        guardar_marca_agua(conn, ruta, os.path.getsize(ruta), filas_nuevas)
+        conn.commit()
+    return filas_nuevas
+
+def cargar_incremental(conn, ruta, escribir_lote, tamano_lote, limite=None):
+    """Procesa solo las filas nuevas de una fuente, archivo por archivo
+
+    escribir_lote(filas) recibe la lista de diccionarios del lote y los escribe en la
+    conexión sin hacer commit. Devuelve la cantidad de filas nuevas leídas.
+    """
+    filas_nuevas = 0
+    for archivo in resolver_fuente(ruta):
+        restantes = None if limite is None else limite - filas_nuevas
+        if restantes is not None and restantes <= 0:
+            break
+        cargar = cargar_comprimido if compresion(archivo) else cargar_archivo
+        filas_nuevas += cargar(conn, archivo, escribir_lote, tamano_lote, restantes)
+    return filas_nuevas
@@ -4,211 +4,855 @@ tablas mediante un script de Python.
 """
 
 import sqlite3
-import csv
 import os
 import hashlib
+import argparse
+import time
+from functools import partial
+from itertools import chain, islice
 
-def conectar_bd():
-    """Conecta a la base de datos SQLite"""
-    conn = sqlite3.connect('encuestas_usuarios_simplificada.db')
+from pipeline_carga import (
+    etapa_por_fila, aplicar_etapas, agrupar_en_lotes, ejecutar_pipeline,
+    reportar_metricas, planificar_shards, leer_shard, calcular_metricas
+)
+from carga_incremental import cargar_incremental
+from claves_dedup import (
+    ESTRATEGIAS, ESTRATEGIA_POR_DEFECTO, clave_md5, clave_desde_encuesta, tipo_sql,
+    detectar_estrategia, migrar_estrategia, crear_indice_hash, indice_hash_separado,
+    suspender_indice_hash, consolidar_claves
+)
+from rollups_encuestas import actualizar_rollups, eliminar_tablas_rollup
+from dimensiones import nuevo_cache_dimensiones, resolver_dimensiones, reportar_dimensiones
+from instrumentacion import (
+    agregar_argumentos as agregar_argumentos_instrumentacion, iniciar_desde_argumentos,
+    finalizar_desde_argumentos, etapa, medir_iterable
+)
+from dedup_externa import MODOS_DEDUP, MEMORIA_DEDUP_MB, nuevo_contador, deduplicar_externo, reportar_dedup_externa
+from limpieza_columnar import MOTORES, leer_csv_por_columnas, leer_shard_por_columnas, preparar_diccionarios
+from almacenamiento import (
+    INDICES_ENCUESTAS, configuracion_bd, ruta_sqlite, abrir_bd, ejecutar, ddl_dimensiones, ddl_encuestas,
+    crear_esquema, insertar_sin_duplicados
+)
+from cambios_encuestas import (
+    LLAVE_NATURAL, MUESTRA_ACTUALIZADAS, SELECT_POR_LLAVE, crear_indice_llave_natural, crear_tabla_cambios,
+    eliminar_tabla_cambios, registrar_insertadas, registrar_actualizadas, registrar_colisiones,
+    nuevo_contador_fusion, reportar_fusion
+)
+from generacion_datos import nueva_generacion, registrar_cambio_dimensiones
+from archivos_mensuales import NOMBRE_DIRECTORIO, sincronizar_archivos_mensuales
+from busqueda_usuarios import (
+    crear_indice_usuarios, suspender_indice_usuarios, reconstruir_indice_usuarios, eliminar_indice_usuarios
+)
+from fuentes_entrada import leer_fuente, resolver_fuente, compresion
+from perfiles_sqlite import (
+    PERFILES, aplicar_perfil_masivo, restaurar_perfil_seguro, verificar_llaves_foraneas
+)
+
+# Número de filas del CSV que se escriben en cada executemany del modo por lotes
+TAMANO_LOTE = 5000
+
+# Tamaño aproximado en bytes de cada shard del modo paralelo
+TAMANO_SHARD = 8 * 1024 * 1024
+
+# Las tuplas que llegan aquí ya pasaron por resolver_dimensiones (solo llaves enteras)
+INSERT_ENCUESTA = '''
+    INSERT INTO encuestas (
+        id_estado_encuesta, id_cuestionario,
+        id_calificacion, fecha_limite, fecha_creado, hora_creado,
+        fecha_modificado, hora_modificado, fecha_insercion,
+        usuario_id, hash_unico
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Posición de id_calificacion en la tupla de INSERT_ENCUESTA
+POS_CALIFICACION_HECHOS = 2
+
+# Columnas de las tuplas de INSERT_ENCUESTA y de preparar_usuario (carga con otros backends)
+COLUMNAS_ENCUESTA = [
+    'id_estado_encuesta', 'id_cuestionario', 'id_calificacion', 'fecha_limite', 'fecha_creado', 'hora_creado',
+    'fecha_modificado', 'hora_modificado', 'fecha_insercion', 'usuario_id', 'hash_unico'
+]
+COLUMNAS_USUARIO = ['id_usuario', 'nombre', 'telefono', 'email']
+
+# Carga por fusión (ver cambios_encuestas.py): posiciones en la tupla de INSERT_ENCUESTA
+POS_LLAVE_NATURAL = [COLUMNAS_ENCUESTA.index(columna) for columna in LLAVE_NATURAL]
+POS_MODIFICADO = (COLUMNAS_ENCUESTA.index('fecha_modificado'), COLUMNAS_ENCUESTA.index('hora_modificado'))
+POS_FECHA_INSERCION = COLUMNAS_ENCUESTA.index('fecha_insercion')
+
+# La fusión actualiza todas las columnas salvo las de la llave natural
+COLUMNAS_ACTUALIZABLES = [columna for columna in COLUMNAS_ENCUESTA if columna not in LLAVE_NATURAL]
+POS_ACTUALIZABLES = [COLUMNAS_ENCUESTA.index(columna) for columna in COLUMNAS_ACTUALIZABLES]
+UPDATE_ENCUESTA = f'''
+    UPDATE encuestas SET {', '.join(f"{columna} = ?" for columna in COLUMNAS_ACTUALIZABLES)}
+    WHERE id_encuesta = ?
+'''
+
+def conectar_bd(perfil='seguro'):
+    """Conecta a la base de datos SQLite configurada (ver almacenamiento.py)
+    
+    perfil='masivo' ajusta la conexión para cargas completas (ver perfiles_sqlite.py).
+    """
+    conn = sqlite3.connect(ruta_sqlite())
+    if perfil == 'masivo':
+        aplicar_perfil_masivo(conn)
+        return conn
     # Habilitar llaves foráneas en SQLite
     conn.execute('PRAGMA foreign_keys = ON;')
     return conn
 
-def crear_tablas_simplificadas(conn):
-    """Crea las 3 tablas con ID AUTOINCREMENTAL en ENCUESTAS"""
-    cursor = conn.cursor()
-    
-    # Reconstruir tablas para asegurar el esquema correcto y llaves foráneas
-    cursor.execute('DROP TABLE IF EXISTS encuestas')
-    cursor.execute('DROP TABLE IF EXISTS usuarios')
-    cursor.execute('DROP TABLE IF EXISTS dimension_calificaciones')
+def crear_indices_encuestas(conn):
+    """Crea los índices secundarios de encuestas si no existen"""
+    for nombre, definicion in INDICES_ENCUESTAS.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {definicion}")
 
-    # Tabla usuarios (sin cambios)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id_usuario INTEGER PRIMARY KEY,
-            nombre TEXT NOT NULL,
-            telefono TEXT,
-            email TEXT
-        )
-    ''')
+def suspender_indices_encuestas(conn):
+    """Elimina los índices secundarios de encuestas para reconstruirlos al final de la carga"""
+    for nombre in INDICES_ENCUESTAS:
+        conn.execute(f"DROP INDEX IF EXISTS {nombre}")
 
-    # Tabla dimension_calificaciones (sin cambios)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS dimension_calificaciones (
-            id_calificacion INTEGER PRIMARY KEY,
-            calificacion INTEGER,
-            descripcion TEXT
-        )
-    ''')
+def crear_tablas_simplificadas(conn, reconstruir=True, estrategia_clave=ESTRATEGIA_POR_DEFECTO):
+    """Crea las 3 tablas con ID AUTOINCREMENTAL en ENCUESTAS
     
-    # Tabla encuestas (CON ID AUTOINCREMENTAL)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS encuestas (
-            id_encuesta INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_estado_encuesta INTEGER,
-            estado TEXT,
-            id_cuestionario INTEGER,
-            descripcion_cuestionario TEXT,
-            id_calificacion INTEGER,
-            fecha_limite TEXT,
-            fecha_creado TEXT,
-            hora_creado TEXT,
-            fecha_modificado TEXT,
-            hora_modificado TEXT,
-            fecha_insercion TEXT,
-            usuario_id INTEGER,
-            hash_unico TEXT UNIQUE,
-            FOREIGN KEY (usuario_id) REFERENCES usuarios (id_usuario),
-            FOREIGN KEY (id_calificacion) REFERENCES dimension_calificaciones (id_calificacion)
-        )
-    ''')
+    Con reconstruir=False se conservan las tablas existentes (carga incremental).
+    estrategia_clave define el tipo de hash_unico (ver claves_dedup.py).
+    """
+    cursor = conn.cursor()
     
+    if reconstruir:
+        # Reconstruir tablas para asegurar el esquema correcto y llaves foráneas
+        cursor.execute('DROP TABLE IF EXISTS encuestas')
+        cursor.execute('DROP TABLE IF EXISTS usuarios')
+        # y el índice de búsqueda de usuarios, que cargar_usuarios vuelve a llenar
+        eliminar_indice_usuarios(conn)
+        cursor.execute('DROP TABLE IF EXISTS dimension_calificaciones')
+        cursor.execute('DROP TABLE IF EXISTS dimension_estados')
+        cursor.execute('DROP TABLE IF EXISTS dimension_cuestionarios')
+        # Las marcas de agua de la carga incremental dejan de ser válidas
+        cursor.execute('DROP TABLE IF EXISTS control_cargas')
+        # y el registro de cambios de la fusión apunta a id_encuesta que ya no existen
+        eliminar_tabla_cambios(conn)
+        # Los resúmenes se recalculan desde cero con la nueva carga
+        eliminar_tablas_rollup(conn)
+        # Los id_encuesta y conteos se repiten entre cargas completas: las marcas de agua de
+        # las particiones y los archivos por mes se distinguen por la generación
+        nueva_generacion(conn)
 
+    # usuarios, dimension_calificaciones y las dimensiones de estado y cuestionario
+    # (estas dos se llenan mientras se cargan las encuestas)
+    for ddl in ddl_dimensiones():
+        cursor.execute(ddl)
+    
+    if not reconstruir and esquema_con_textos(conn):
+        raise RuntimeError("encuestas tiene el esquema anterior (estado y descripcion_cuestionario como texto); "
+                           "ejecuta una carga completa sin --incremental")
+    
+    # Tabla encuestas (CON ID AUTOINCREMENTAL)
+    cursor.execute(ddl_encuestas(tipo_clave=tipo_sql(estrategia_clave)))
+    crear_indice_hash(conn)
+    crear_indices_encuestas(conn)
     
     conn.commit()
-    print("3 tablas creadas exitosamente")
+    print("5 tablas creadas exitosamente")
     print("   - usuarios")
     print("   - encuestas (CON ID AUTOINCREMENTAL)")
     print("   - dimension_calificaciones")
+    print("   - dimension_estados")
+    print("   - dimension_cuestionarios")
+
+def esquema_con_textos(conn):
+    """Indica si encuestas todavía guarda estado y descripcion_cuestionario como columnas de texto"""
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(encuestas)")
+    return any(columna[1] == 'estado' for columna in cursor.fetchall())
 
 def generar_hash_unico(row):
     """Genera un hash único para identificar encuestas duplicadas"""
-    campos_clave = f"{row.get('usuario_id', '')}-{row.get('Fecha_Insercion', '')}-{row.get('IdCuestionario', '')}-{row.get('Calificacion', '')}"
-    return hashlib.md5(campos_clave.encode()).hexdigest()
+    return clave_md5(row)
+
+def limpiar_entero(valor, nulo='NULL'):
+    """Convierte un campo numérico del CSV a int, devolviendo None si está vacío o no es válido"""
+    if not valor or valor == nulo:
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        return None
+
+def preparar_encuesta(row, hash_unico):
+    """Limpia una fila del CSV de encuestas y la convierte en la tupla preparada
+    
+    Es la tupla de INSERT_ENCUESTA más estado (posición 1) y descripción del cuestionario
+    (posición 3); resolver_dimensiones los pasa a sus dimensiones antes de insertar.
+    """
+    # Asumimos que el valor 'Calificacion' del CSV corresponde al id_calificacion
+    id_calificacion = limpiar_entero(row.get('Calificacion'))
+    id_cuestionario = limpiar_entero(row.get('IdCuestionario'))
+    # IdEstadoEncuesta no trae 'NULL' explícito; cualquier valor no numérico queda en None
+    id_estado = limpiar_entero(row.get('IdEstadoEncuesta'), nulo=None)
+    
+    return (
+        id_estado,
+        row.get('Estado', ''),
+        id_cuestionario,
+        row.get('DescripcionCuestionario', ''),
+        id_calificacion,
+        row.get('FechaLimite', ''),
+        row.get('FechaCreado', ''),
+        row.get('HoraCreado', ''),
+        row.get('FechaModificado', ''),
+        row.get('HoraModificado', ''),
+        row.get('Fecha_Insercion', ''),
+        int(row['usuario_id']),
+        hash_unico
+    )
 
-def cargar_usuarios(conn):
-    """Carga los datos de usuarios desde el CSV"""
+def usuario_valido(row):
+    """Etapa de limpieza: descarta usuarios sin id_usuario"""
+    if row.get('id_usuario') and row['id_usuario'].strip():
+        return row
+    return None
+
+def preparar_usuario(row):
+    """Convierte una fila del CSV de usuarios en la tupla del INSERT"""
+    return (
+        int(row['id_usuario']), 
+        row.get('nombre', ''), 
+        row.get('telefono', ''), 
+        row.get('email', '')
+    )
+
+def cargar_usuarios(conn, limite=None, etapas_limpieza=(), reemplazar=True, ruta='usuarios.csv'):
+    """Carga los datos de usuarios desde el CSV (o la fuente ruta, ver fuentes_entrada.py)
+    
+    Con reemplazar=False no se borra la tabla: los usuarios existentes se actualizan
+    y los nuevos se agregan (carga incremental) y los disparadores mantienen el índice de
+    búsqueda; en una carga completa el índice se reconstruye al final (busqueda_usuarios.py).
+    """
     print("📂 Cargando datos de usuarios...")
     
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM usuarios")
+    cambios_previos = conn.total_changes
+    if reemplazar:
+        suspender_indice_usuarios(conn)
+        cursor.execute("DELETE FROM usuarios")
+    else:
+        indice_disponible = crear_indice_usuarios(conn)
     
-    with open('usuarios.csv', 'r', encoding='utf-8-sig') as file:
-        reader = csv.DictReader(file, delimiter=';')
+    def escribir(usuarios):
         count = 0
-        for row in reader:
-            if row.get('id_usuario') and row['id_usuario'].strip():
-                cursor.execute('''
-                    INSERT INTO usuarios (id_usuario, nombre, telefono, email)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    int(row['id_usuario']), 
-                    row.get('nombre', ''), 
-                    row.get('telefono', ''), 
-                    row.get('email', '')
-                ))
-                count += 1
+        for lote in agrupar_en_lotes(usuarios, TAMANO_LOTE):
+            cursor.executemany('''
+                INSERT INTO usuarios (id_usuario, nombre, telefono, email)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(id_usuario) DO UPDATE SET
+                    nombre = excluded.nombre,
+                    telefono = excluded.telefono,
+                    email = excluded.email
+                -- Solo los usuarios que cambiaron: evita reescribir la fila y el disparador del índice
+                WHERE usuarios.nombre IS NOT excluded.nombre
+                   OR usuarios.telefono IS NOT excluded.telefono
+                   OR usuarios.email IS NOT excluded.email
+            ''', lote)
+            count += len(lote)
+        return count
+    
+    etapas = [
+        etapa_por_fila(usuario_valido),
+        *etapas_limpieza,
+        etapa_por_fila(preparar_usuario),
+    ]
+    count, metricas = ejecutar_pipeline(leer_fuente(ruta), etapas, escribir, limite)
+    if reemplazar:
+        indice_disponible = reconstruir_indice_usuarios(conn)
+    # La tabla unificada y los archivos por mes copian nombre, teléfono y email
+    if conn.total_changes != cambios_previos:
+        registrar_cambio_dimensiones(conn)
     
     conn.commit()
     print(f"{count} usuarios cargados")
+    if not indice_disponible:
+        print("   - Este SQLite no tiene FTS5 con tokenizador trigram: la búsqueda de usuarios usará LIKE")
+    reportar_metricas(metricas)
+
+def encuesta_con_usuario(row):
+    """Etapa de limpieza: descarta encuestas sin usuario_id"""
+    if row.get('usuario_id') and row['usuario_id'].strip():
+        return row
+    return None
+
+def hashear_y_preparar_encuesta(row, estrategia_clave=ESTRATEGIA_POR_DEFECTO):
+    """Etapa hash: convierte la fila en tupla y calcula su clave de deduplicación"""
+    if estrategia_clave == 'md5':
+        return preparar_encuesta(row, generar_hash_unico(row))
+    encuesta = preparar_encuesta(row, None)
+    return encuesta[:-1] + (clave_desde_encuesta(estrategia_clave, row, encuesta),)
+
+def etapas_encuestas(etapas_limpieza=(), estrategia_clave=ESTRATEGIA_POR_DEFECTO):
+    """Arma las etapas limpiar -> hash -> preparar del pipeline de encuestas
+
+    Las etapas_limpieza extra reciben y devuelven filas del CSV (diccionarios),
+    y se aplican antes de calcular el hash único.
+    """
+    return [
+        etapa_por_fila(encuesta_con_usuario),
+        *etapas_limpieza,
+        etapa_por_fila(partial(hashear_y_preparar_encuesta, estrategia_clave=estrategia_clave)),
+    ]
+
+def pipeline_encuestas(conn, escritor, limite=None, etapas_limpieza=(), motor='filas', ruta='encuestas.csv',
+                       estrategia_clave=None):
+    """Lee, limpia y hashea el CSV de encuestas con el motor elegido y lo pasa al escritor
+    
+    ruta es un archivo, un patrón glob o un directorio de CSV planos o comprimidos
+    (ver fuentes_entrada.py). Sin estrategia_clave se usa la de la base SQLite (detectar_estrategia).
+    Devuelve (resultado_escritor, metricas) como ejecutar_pipeline.
+    """
+    estrategia_clave = estrategia_clave or detectar_estrategia(conn)
+    if motor == 'filas':
+        return ejecutar_pipeline(leer_fuente(ruta), etapas_encuestas(etapas_limpieza, estrategia_clave),
+                                 escritor, limite)
+    if etapas_limpieza:
+        raise ValueError("Las etapas de limpieza propias solo están disponibles con el motor 'filas'")
+    
+    contador = {'filas_leidas': 0}
+    encuestas = medir_iterable('limpieza_columnar',
+                               leer_csv_por_columnas(ruta, estrategia_clave, contador, limite=limite))
+    inicio = time.perf_counter()
+    with etapa('escritura', sin_iterables=True):
+        resultado = escritor(encuestas)
+    return resultado, calcular_metricas(contador['filas_leidas'], time.perf_counter() - inicio)
 
-def cargar_encuestas_simplificadas(conn):
-    """Carga los datos de encuestas"""
+def escribir_encuestas_por_fila(cursor, encuestas):
+    """Escritor del modo 'fila': verifica el hash e inserta registro por registro"""
+    encuestas_procesadas = 0
+    encuestas_duplicadas = 0
+    encuestas_validas = 0
+    
+    for encuesta in encuestas:
+        # Verificar si ya existe esta encuesta
+        cursor.execute("SELECT COUNT(*) FROM encuestas WHERE hash_unico = ?", (encuesta[-1],))
+        if cursor.fetchone()[0] > 0:
+            encuestas_duplicadas += 1
+            continue
+        
+        cursor.execute(INSERT_ENCUESTA, encuesta)
+        
+        encuestas_procesadas += 1
+        if encuesta[POS_CALIFICACION_HECHOS] is not None:
+            encuestas_validas += 1
+    
+    return encuestas_procesadas, encuestas_validas, encuestas_duplicadas
+
+def cargar_encuestas_simplificadas(conn, limite=None, etapas_limpieza=(), motor='filas', memoria_dedup_mb=None,
+                                   ruta='encuestas.csv'):
+    """Carga los datos de encuestas
+    
+    Con memoria_dedup_mb los duplicados se resuelven con la deduplicación externa
+    (dedup_externa.py) en vez de consultar el índice de hash_unico por cada fila.
+    """
     print("Cargando datos de encuestas ...")
     
     cursor = conn.cursor()
     cursor.execute("DELETE FROM encuestas")
+    dimensiones = nuevo_cache_dimensiones(conn)
     
+    def escribir(encuestas):
+        if memoria_dedup_mb is not None:
+            return escribir_encuestas_dedup_externa(cursor, encuestas, memoria_mb=memoria_dedup_mb)
+        return escribir_encuestas_por_fila(cursor, encuestas)
+    
+    (encuestas_procesadas, encuestas_validas, encuestas_duplicadas), metricas = pipeline_encuestas(
+        conn,
+        lambda encuestas: escribir(medir_iterable('dimensiones', resolver_dimensiones(encuestas, dimensiones))),
+        limite, etapas_limpieza, motor, ruta
+    )
+    
+    with etapa('commit'):
+        conn.commit()
+    print(f"{encuestas_procesadas} encuestas cargadas")
+    print(f"   - Encuestas válidas (con calificación): {encuestas_validas}")
+    print(f"   - Encuestas duplicadas omitidas: {encuestas_duplicadas}")
+    reportar_dimensiones(dimensiones)
+    reportar_metricas(metricas)
+    return encuestas_procesadas, encuestas_validas, encuestas_duplicadas
+
+def insertar_lote_encuestas(cursor, lote):
+    """Inserta un lote con un solo executemany y devuelve (insertadas, válidas, rechazadas)
+    
+    Los choques contra hash_unico los resuelve la restricción UNIQUE (INSERT OR IGNORE);
+    se cuentan como rechazos comparando total_changes antes y después.
+    Nota: con AUTOINCREMENT cada fila ignorada consume un id_encuesta, por lo que los IDs
+    conservan el orden del CSV pero pueden tener huecos respecto al modo 'fila'.
+    """
+    conn = cursor.connection
+    cursor.execute("SELECT COALESCE(MAX(id_encuesta), 0) FROM encuestas")
+    ultimo_id = cursor.fetchone()[0]
+    cambios_antes = conn.total_changes
+    with etapa('insercion', filas=len(lote)):
+        cursor.executemany(INSERT_ENCUESTA.replace('INSERT INTO', 'INSERT OR IGNORE INTO', 1), lote)
+    insertadas = conn.total_changes - cambios_antes
+    
+    # Las filas nuevas quedan por encima del último id, así que contar las válidas es un rango de PK
+    cursor.execute(
+        "SELECT COUNT(*) FROM encuestas WHERE id_encuesta > ? AND id_calificacion IS NOT NULL",
+        (ultimo_id,)
+    )
+    validas = cursor.fetchone()[0]
+    return insertadas, validas, len(lote) - insertadas
+
+def deduplicar_lote(lote):
+    """Descarta en memoria los duplicados de hash dentro de un lote; devuelve (lote_unico, duplicadas)"""
+    hashes_lote = set()
+    lote_unico = []
+    for encuesta in lote:
+        if encuesta[-1] in hashes_lote:
+            continue
+        hashes_lote.add(encuesta[-1])
+        lote_unico.append(encuesta)
+    return lote_unico, len(lote) - len(lote_unico)
+
+def escribir_encuestas_por_lotes(cursor, encuestas, tamano_lote=TAMANO_LOTE):
+    """Escritor del modo 'lotes': deduplica cada lote en memoria y lo inserta con executemany"""
     encuestas_procesadas = 0
     encuestas_duplicadas = 0
     encuestas_validas = 0
     
-    with open('encuestas.csv', 'r', encoding='utf-8-sig') as file:
-        reader = csv.DictReader(file, delimiter=';')
-        
-        for row in reader:
-            if row.get('usuario_id') and row['usuario_id'].strip():
-                # Generar hash único para detectar duplicados
-                hash_unico = generar_hash_unico(row)
-                
-                # Verificar si ya existe esta encuesta
-                cursor.execute("SELECT COUNT(*) FROM encuestas WHERE hash_unico = ?", (hash_unico,))
-                if cursor.fetchone()[0] > 0:
-                    encuestas_duplicadas += 1
-                    continue
-                
-                # Limpiar campos numéricos
-                id_calificacion = None
-                if row.get('Calificacion') and row['Calificacion'] != 'NULL':
-                    try:
-                        # Asumimos que el valor 'Calificacion' del CSV corresponde al id_calificacion
-                        id_calificacion = int(row['Calificacion'])
-                    except:
-                        id_calificacion = None
-                
-                id_cuestionario = None
-                if row.get('IdCuestionario') and row['IdCuestionario'] != 'NULL':
-                    try:
-                        id_cuestionario = int(row['IdCuestionario'])
-                    except:
-                        id_cuestionario = None
-                
-                id_estado = None
-                if row.get('IdEstadoEncuesta'):
-                    try:
-                        id_estado = int(row['IdEstadoEncuesta'])
-                    except:
-                        id_estado = None
-                
-                cursor.execute('''
-                    INSERT INTO encuestas (
-                        id_estado_encuesta, estado, id_cuestionario, descripcion_cuestionario,
-                        id_calificacion, fecha_limite, fecha_creado, hora_creado,
-                        fecha_modificado, hora_modificado, fecha_insercion,
-                        usuario_id, hash_unico
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    id_estado,
-                    row.get('Estado', ''),
-                    id_cuestionario,
-                    row.get('DescripcionCuestionario', ''),
-                    id_calificacion,
-                    row.get('FechaLimite', ''),
-                    row.get('FechaCreado', ''),
-                    row.get('HoraCreado', ''),
-                    row.get('FechaModificado', ''),
-                    row.get('HoraModificado', ''),
-                    row.get('Fecha_Insercion', ''),
-                    int(row['usuario_id']),
-                    hash_unico
-                ))
-                
-                encuestas_procesadas += 1
-                if id_calificacion is not None:
-                    encuestas_validas += 1
-                
-            
-                if encuestas_procesadas >= 100000:
-                    print(f"Procesando solo los primeros 100,000 registros para prueba")
-                    break
+    for lote in agrupar_en_lotes(encuestas, tamano_lote):
+        with etapa('dedup_lote', filas=len(lote)):
+            lote_unico, duplicadas_lote = deduplicar_lote(lote)
+        insertadas, validas, rechazadas = insertar_lote_encuestas(cursor, lote_unico)
+        encuestas_procesadas += insertadas
+        encuestas_validas += validas
+        encuestas_duplicadas += duplicadas_lote + rechazadas
+    
+    return encuestas_procesadas, encuestas_validas, encuestas_duplicadas
+
+def escribir_encuestas_dedup_externa(cursor, encuestas, tamano_lote=TAMANO_LOTE, memoria_mb=MEMORIA_DEDUP_MB):
+    """Escritor con --dedup externa: las claves llegan ya únicas y se insertan sin consultar el índice
+    
+    El índice UNIQUE de hash_unico se mantiene como resguardo (o se construye al final con
+    el perfil masivo). Devuelve (insertadas, válidas, duplicadas).
+    """
+    contador = nuevo_contador()
+    unicas = medir_iterable('dedup_externa', deduplicar_externo(encuestas, contador, memoria_mb))
+    encuestas_procesadas = 0
+    encuestas_validas = 0
+    for lote in agrupar_en_lotes(unicas, tamano_lote):
+        with etapa('insercion', filas=len(lote)):
+            cursor.executemany(INSERT_ENCUESTA, lote)
+        encuestas_procesadas += len(lote)
+        encuestas_validas += sum(1 for encuesta in lote if encuesta[POS_CALIFICACION_HECHOS] is not None)
+    reportar_dedup_externa(contador)
+    return encuestas_procesadas, encuestas_validas, contador['duplicadas']
+
+def marca_modificacion(encuesta):
+    """(FechaModificado, HoraModificado) de una tupla; AAAAMMDD y HH:MM:SS ordenan como texto"""
+    return encuesta[POS_MODIFICADO[0]] or '', encuesta[POS_MODIFICADO[1]] or ''
+
+def fusionar_lote_encuestas(cursor, lote, contador):
+    """Fusiona un lote: inserta las encuestas nuevas y actualiza las que tienen una modificación más reciente
+    
+    Dentro del lote gana la modificación más reciente de cada llave natural (ante un empate,
+    la primera aparición). Las inserciones y actualizaciones quedan en cambios_encuestas.
+    Una actualización cuyo hash_unico nuevo ya es de otra encuesta no se aplica: se registra
+    como colisión en vez de abortar el lote (dentro del lote deduplicar_lote ya descartó
+    las filas con el mismo hash).
+    Devuelve (escritas, válidas, omitidas) y acumula el detalle en contador.
+    """
+    lote_unico, duplicadas = deduplicar_lote(lote)
+    sin_cambios = 0
+    ultimas = {}
+    for encuesta in lote_unico:
+        llave = tuple(encuesta[i] for i in POS_LLAVE_NATURAL)
+        previa = ultimas.get(llave)
+        if previa is not None:
+            sin_cambios += 1
+            if marca_modificacion(encuesta) <= marca_modificacion(previa):
+                continue
+        ultimas[llave] = encuesta
+    
+    nuevas, candidatas = [], []
+    with etapa('busqueda_llave', filas=len(ultimas)):
+        for llave, encuesta in ultimas.items():
+            cursor.execute(SELECT_POR_LLAVE, llave)
+            guardadas = cursor.fetchall()
+            if not guardadas:
+                nuevas.append(encuesta)
+            elif any(guardada[3] == encuesta[-1] for guardada in guardadas):
+                duplicadas += 1
+            elif marca_modificacion(encuesta) > (guardadas[0][1] or '', guardadas[0][2] or ''):
+                candidatas.append((encuesta, guardadas[0][0]))
+            else:
+                sin_cambios += 1
+    
+    cursor.execute("SELECT COALESCE(MAX(id_encuesta), 0) FROM encuestas")
+    ultimo_id = cursor.fetchone()[0]
+    insertadas, validas, rechazadas = insertar_lote_encuestas(cursor, nuevas)
+    
+    # Las inserciones del lote ya están en la tabla, así que también cuentan como colisión
+    actualizaciones, actualizadas, colisiones = [], [], []
+    validas_actualizadas = 0
+    with etapa('colisiones_hash', filas=len(candidatas)):
+        for encuesta, id_encuesta in candidatas:
+            cursor.execute("SELECT id_encuesta FROM encuestas WHERE hash_unico = ?", (encuesta[-1],))
+            existente = cursor.fetchone()
+            if existente is not None and existente[0] != id_encuesta:
+                colisiones.append((id_encuesta, encuesta[POS_FECHA_INSERCION], existente[0]))
+                continue
+            actualizaciones.append(tuple(encuesta[i] for i in POS_ACTUALIZABLES) + (id_encuesta,))
+            actualizadas.append((id_encuesta, encuesta[POS_FECHA_INSERCION]))
+            if encuesta[POS_CALIFICACION_HECHOS] is not None:
+                validas_actualizadas += 1
+    
+    with etapa('actualizacion', filas=len(actualizaciones)):
+        cursor.executemany(UPDATE_ENCUESTA, actualizaciones)
+    registrar_insertadas(cursor, ultimo_id)
+    registrar_actualizadas(cursor, actualizadas)
+    registrar_colisiones(cursor, [(id_encuesta, fecha) for id_encuesta, fecha, _ in colisiones])
+    
+    contador['insertadas'] += insertadas
+    contador['actualizadas'] += len(actualizaciones)
+    contador['sin_cambios'] += sin_cambios
+    contador['duplicadas'] += duplicadas + rechazadas
+    contador['colisiones'] += len(colisiones)
+    faltantes = MUESTRA_ACTUALIZADAS - len(contador['muestra_actualizadas'])
+    contador['muestra_actualizadas'].extend(id_encuesta for id_encuesta, _ in actualizadas[:max(faltantes, 0)])
+    faltantes = MUESTRA_ACTUALIZADAS - len(contador['muestra_colisiones'])
+    contador['muestra_colisiones'].extend((id_encuesta, id_existente)
+                                          for id_encuesta, _, id_existente in colisiones[:max(faltantes, 0)])
+    return (insertadas + len(actualizaciones), validas + validas_actualizadas,
+            duplicadas + rechazadas + sin_cambios + len(colisiones))
+
+def escribir_encuestas_fusion(cursor, encuestas, contador, tamano_lote=TAMANO_LOTE):
+    """Escritor de la carga por fusión: fusiona las encuestas por lotes"""
+    totales = [0, 0, 0]
+    for lote in agrupar_en_lotes(encuestas, tamano_lote):
+        for i, valor in enumerate(fusionar_lote_encuestas(cursor, lote, contador)):
+            totales[i] += valor
+    return tuple(totales)
+
+def cargar_encuestas_por_lotes(conn, tamano_lote=TAMANO_LOTE, limite=None, etapas_limpieza=(), motor='filas',
+                               memoria_dedup_mb=None, ruta='encuestas.csv'):
+    """Carga los datos de encuestas en lotes con executemany (modo masivo)"""
+    print(f"Cargando datos de encuestas por lotes de {tamano_lote:,} filas...")
+    
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM encuestas")
+    dimensiones = nuevo_cache_dimensiones(conn)
+    
+    def escribir(encuestas):
+        if memoria_dedup_mb is not None:
+            return escribir_encuestas_dedup_externa(cursor, encuestas, tamano_lote, memoria_dedup_mb)
+        return escribir_encuestas_por_lotes(cursor, encuestas, tamano_lote)
+    
+    (encuestas_procesadas, encuestas_validas, encuestas_duplicadas), metricas = pipeline_encuestas(
+        conn,
+        lambda encuestas: escribir(medir_iterable('dimensiones', resolver_dimensiones(encuestas, dimensiones))),
+        limite, etapas_limpieza, motor, ruta
+    )
     
+    with etapa('commit'):
+        conn.commit()
+    print(f"{encuestas_procesadas} encuestas cargadas")
+    print(f"   - Encuestas válidas (con calificación): {encuestas_validas}")
+    print(f"   - Encuestas duplicadas omitidas: {encuestas_duplicadas}")
+    reportar_dimensiones(dimensiones)
+    reportar_metricas(metricas)
+    return encuestas_procesadas, encuestas_validas, encuestas_duplicadas
+
+def preparar_fusion(conn):
+    """Índice por llave natural y registro de cambios que usa la carga por fusión"""
+    with etapa('indice_llave_natural'):
+        crear_indice_llave_natural(conn)
+    crear_tabla_cambios(conn)
     conn.commit()
+
+def cargar_encuestas_fusion(conn, tamano_lote=TAMANO_LOTE, limite=None, etapas_limpieza=(), motor='filas',
+                            ruta='encuestas.csv'):
+    """Carga por fusión de encuestas.csv completo (--fusionar)
+    
+    Conserva las encuestas existentes: inserta las nuevas y actualiza en su lugar las que
+    traen una FechaModificado/HoraModificado más reciente (ver cambios_encuestas.py).
+    """
+    print(f"Fusionando encuestas por llave natural en lotes de {tamano_lote:,} filas...")
+    
+    cursor = conn.cursor()
+    preparar_fusion(conn)
+    contador = nuevo_contador_fusion()
+    dimensiones = nuevo_cache_dimensiones(conn)
+    
+    (encuestas_escritas, encuestas_validas, encuestas_omitidas), metricas = pipeline_encuestas(
+        conn,
+        lambda encuestas: escribir_encuestas_fusion(
+            cursor, medir_iterable('dimensiones', resolver_dimensiones(encuestas, dimensiones)), contador, tamano_lote),
+        limite, etapas_limpieza, motor, ruta
+    )
+    
+    with etapa('commit'):
+        conn.commit()
+    print(f"{encuestas_escritas} encuestas insertadas o actualizadas")
+    print(f"   - Encuestas válidas (con calificación): {encuestas_validas}")
+    reportar_fusion(contador)
+    reportar_dimensiones(dimensiones)
+    reportar_metricas(metricas)
+    return encuestas_escritas, encuestas_validas, encuestas_omitidas
+
+def cargar_encuestas_incremental(conn, tamano_lote=TAMANO_LOTE, limite=None, etapas_limpieza=(),
+                                 ruta='encuestas.csv', motor='filas', fusionar=False):
+    """Carga solo las encuestas nuevas desde la última marca de agua de encuestas.csv
+    
+    Conserva las filas existentes; hash_unico hace que reprocesar un lote sea idempotente.
+    Con fusionar=True las filas nuevas del archivo se fusionan por llave natural
+    (fusionar_lote_encuestas) en vez de solo insertarse.
+    """
+    print(f"Cargando encuestas nuevas (modo incremental{', por fusión' if fusionar else ''})...")
+    
+    cursor = conn.cursor()
+    contadores = {'procesadas': 0, 'validas': 0, 'duplicadas': 0}
+    if fusionar:
+        preparar_fusion(conn)
+        contador_fusion = nuevo_contador_fusion()
+    estrategia_clave = detectar_estrategia(conn)
+    etapas = etapas_encuestas(etapas_limpieza, estrategia_clave)
+    if motor == 'columnas' and etapas_limpieza:
+        raise ValueError("Las etapas de limpieza propias solo están disponibles con el motor 'filas'")
+    dimensiones = nuevo_cache_dimensiones(conn)
+    
+    def escribir_lote(filas):
+        if motor == 'columnas':
+            preparadas = preparar_diccionarios(filas, estrategia_clave)
+        else:
+            preparadas = aplicar_etapas(filas, etapas)
+        resueltas = list(medir_iterable('dimensiones', resolver_dimensiones(preparadas, dimensiones)))
+        if fusionar:
+            escritas, validas, omitidas = fusionar_lote_encuestas(cursor, resueltas, contador_fusion)
+            contadores['procesadas'] += escritas
+            contadores['validas'] += validas
+            contadores['duplicadas'] += omitidas
+            return
+        lote_unico, duplicadas_lote = deduplicar_lote(resueltas)
+        insertadas, validas, rechazadas = insertar_lote_encuestas(cursor, lote_unico)
+        contadores['procesadas'] += insertadas
+        contadores['validas'] += validas
+        contadores['duplicadas'] += duplicadas_lote + rechazadas
+    
+    inicio = time.perf_counter()
+    filas_nuevas = cargar_incremental(conn, ruta, escribir_lote, tamano_lote, limite)
+    metricas = calcular_metricas(filas_nuevas, time.perf_counter() - inicio)
+    
+    if fusionar:
+        print(f"{contadores['procesadas']} encuestas insertadas o actualizadas")
+        print(f"   - Encuestas válidas (con calificación): {contadores['validas']}")
+        reportar_fusion(contador_fusion)
+    else:
+        print(f"{contadores['procesadas']} encuestas nuevas cargadas")
+        print(f"   - Encuestas válidas (con calificación): {contadores['validas']}")
+        print(f"   - Encuestas duplicadas omitidas: {contadores['duplicadas']}")
+    reportar_dimensiones(dimensiones)
+    reportar_metricas(metricas)
+    return contadores['procesadas'], contadores['validas'], contadores['duplicadas']
+
+def procesar_shard_encuestas(tarea):
+    """Trabajador del modo paralelo: parsea, limpia y hashea un rango de bytes de encuestas.csv
+    
+    Devuelve (filas_leidas, encuestas) con las tuplas preparadas (todavía con los textos
+    de las dimensiones), en el mismo orden en que aparecen en el archivo.
+    """
+    ruta, inicio, fin, campos, estrategia_clave, motor, limite = tarea
+    if motor == 'columnas':
+        return leer_shard_por_columnas(ruta, inicio, fin, campos, estrategia_clave, limite)
+    filas = leer_shard(ruta, inicio, fin, campos)
+    if limite is not None:
+        filas = islice(filas, limite)
+    
+    filas_leidas = 0
+    def contar(filas):
+        nonlocal filas_leidas
+        for row in filas:
+            filas_leidas += 1
+            yield row
+    
+    encuestas = list(aplicar_etapas(contar(filas), etapas_encuestas(estrategia_clave=estrategia_clave)))
+    return filas_leidas, encuestas
+
+def validar_fuente_paralela(ruta):
+    """Archivos de la fuente de encuestas; falla si alguno está comprimido (no se divide por bytes)"""
+    rutas = resolver_fuente(ruta)
+    comprimidos = [archivo for archivo in rutas if compresion(archivo)]
+    if comprimidos:
+        raise ValueError(f"El modo 'paralelo' divide los CSV por bytes y no admite archivos comprimidos "
+                         f"({os.path.basename(comprimidos[0])}); usa --modo lotes, que los descomprime al vuelo")
+    return rutas
+
+def validar_fuentes(args):
+    """Resuelve las fuentes de la carga y revisa que existan antes de tocar el esquema
+
+    Una carga completa borra las tablas al empezar; con una ruta equivocada la base
+    quedaría vacía.
+    """
+    for fuente in (args.usuarios, args.calificaciones, args.encuestas):
+        for archivo in resolver_fuente(fuente):
+            if not os.path.isfile(archivo):
+                raise FileNotFoundError(f"No existe el archivo de entrada '{archivo}'")
+
+def cargar_encuestas_en_paralelo(conn, procesos=None, tamano_lote=TAMANO_LOTE,
+                                 tamano_shard=TAMANO_SHARD, limite=None, ruta='encuestas.csv', motor='filas',
+                                 memoria_dedup_mb=None):
+    """Carga encuestas parseando shards del CSV en varios procesos con un único escritor
+    
+    Los trabajadores solo parsean, limpian y calculan el hash; este proceso es el único
+    que escribe en SQLite y el único que mantiene las cachés de dimensiones. Los shards se consumen en orden de archivo, así el orden de
+    id_encuesta y las decisiones de duplicados son las mismas que en el modo 'lotes'.
+    Con varios archivos (ruta como patrón o directorio) cada uno se divide en shards por
+    separado; los comprimidos no se pueden dividir por bytes.
+    """
+    rutas = validar_fuente_paralela(ruta)
+    # multiprocessing solo hace falta en este modo; no se importa al arrancar el cargador
+    from multiprocessing import Pool
+    procesos = procesos or os.cpu_count() or 1
+    print(f"Cargando datos de encuestas en paralelo ({procesos} procesos)...")
+    
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM encuestas")
+    
+    estrategia_clave = detectar_estrategia(conn)
+    dimensiones = nuevo_cache_dimensiones(conn)
+    tareas = []
+    for archivo in rutas:
+        campos, shards = planificar_shards(archivo, tamano_shard)
+        tareas.extend((archivo, inicio, fin, campos, estrategia_clave, motor, None) for inicio, fin in shards)
+    filas_leidas = 0
+    
+    def encuestas_en_orden(pool):
+        nonlocal filas_leidas
+        # Se envían pocos shards por delante de la escritura para acotar la memoria
+        ventana = procesos * 2
+        for i in range(0, len(tareas), ventana):
+            for tarea, (leidas, encuestas) in zip(tareas[i:i + ventana],
+                                                 pool.imap(procesar_shard_encuestas, tareas[i:i + ventana])):
+                if limite is not None and filas_leidas + leidas > limite:
+                    # Último shard necesario: se reprocesa recortado hasta el límite
+                    leidas, encuestas = procesar_shard_encuestas(tarea[:-1] + (limite - filas_leidas,))
+                filas_leidas += leidas
+                yield encuestas
+                if limite is not None and filas_leidas >= limite:
+                    return
+    
+    inicio = time.perf_counter()
+    with Pool(procesos) as pool, etapa('escritura', sin_iterables=True):
+        shards_en_orden = medir_iterable('shards', chain.from_iterable(encuestas_en_orden(pool)))
+        resueltas = medir_iterable('dimensiones', resolver_dimensiones(shards_en_orden, dimensiones))
+        if memoria_dedup_mb is not None:
+            contadores = escribir_encuestas_dedup_externa(cursor, resueltas, tamano_lote, memoria_dedup_mb)
+        else:
+            contadores = escribir_encuestas_por_lotes(cursor, resueltas, tamano_lote)
+        encuestas_procesadas, encuestas_validas, encuestas_duplicadas = contadores
+    metricas = calcular_metricas(filas_leidas, time.perf_counter() - inicio)
+    
+    with etapa('commit'):
+        conn.commit()
+    print(f"{encuestas_procesadas} encuestas cargadas")
+    print(f"   - Encuestas válidas (con calificación): {encuestas_validas}")
+    print(f"   - Encuestas duplicadas omitidas: {encuestas_duplicadas}")
+    reportar_dimensiones(dimensiones)
+    reportar_metricas(metricas)
+    return encuestas_procesadas, encuestas_validas, encuestas_duplicadas
+
+def cargar_en_backend(bd, estrategia_clave=ESTRATEGIA_POR_DEFECTO, tamano_lote=TAMANO_LOTE, limite=None,
+                      motor='filas', ruta_encuestas='encuestas.csv', ruta_usuarios='usuarios.csv',
+                      ruta_calificaciones='dimension_calificaciones.csv'):
+    """Carga completa a través de almacenamiento.py (PostgreSQL, o SQLite como base de prueba)
+    
+    Usa las mismas etapas de limpieza y las mismas cachés de dimensiones que los demás
+    modos; cada lote se escribe con insertar_sin_duplicados (COPY + ON CONFLICT en
+    PostgreSQL), que resuelve los duplicados contra hash_unico en la base.
+    Devuelve (encuestas_procesadas, encuestas_validas, encuestas_duplicadas).
+    """
+    conn = bd['conn']
+    with etapa('esquema'):
+        crear_esquema(bd, tipo_sql(estrategia_clave))
+    print(f"5 tablas creadas en {bd['backend']}")
+    
+    with etapa('usuarios'):
+        def escribir_usuarios(usuarios):
+            count = 0
+            for lote in agrupar_en_lotes(usuarios, tamano_lote):
+                insertar_sin_duplicados(bd, 'usuarios', COLUMNAS_USUARIO, lote, 'id_usuario', actualizar=True)
+                count += len(lote)
+            return count
+        count, metricas = ejecutar_pipeline(leer_fuente(ruta_usuarios),
+                                        [etapa_por_fila(usuario_valido), etapa_por_fila(preparar_usuario)],
+                                        escribir_usuarios)
+        conn.commit()
+    print(f"{count} usuarios cargados")
+    reportar_metricas(metricas)
+    
+    with etapa('calificaciones'):
+        calificaciones = [(int(row['id_calificacion']), int(row['calificacion']), row['descripcion'])
+                          for row in leer_fuente(ruta_calificaciones)]
+        insertar_sin_duplicados(bd, 'dimension_calificaciones', ['id_calificacion', 'calificacion', 'descripcion'],
+                                calificaciones, 'id_calificacion', actualizar=True)
+        conn.commit()
+    print(f" {len(calificaciones)} calificaciones cargadas")
+    
+    print(f"Cargando datos de encuestas en {bd['backend']} por lotes de {tamano_lote:,} filas...")
+    dimensiones = nuevo_cache_dimensiones(conn, backend=bd['backend'])
+    
+    def escribir_encuestas(encuestas):
+        recibidas = insertadas = 0
+        for lote in agrupar_en_lotes(encuestas, tamano_lote):
+            recibidas += len(lote)
+            with etapa('insercion', filas=len(lote)):
+                insertadas += insertar_sin_duplicados(bd, 'encuestas', COLUMNAS_ENCUESTA, lote, 'hash_unico')
+        return recibidas, insertadas
+    
+    with etapa('encuestas') as medicion:
+        (recibidas, encuestas_procesadas), metricas = pipeline_encuestas(
+            conn,
+            lambda encuestas: escribir_encuestas(
+                medir_iterable('dimensiones', resolver_dimensiones(encuestas, dimensiones))),
+            limite, motor=motor, ruta=ruta_encuestas, estrategia_clave=estrategia_clave
+        )
+        with etapa('commit'):
+            conn.commit()
+        medicion['filas'] = encuestas_procesadas
+    encuestas_validas = ejecutar(bd, "SELECT COUNT(id_calificacion) FROM encuestas").fetchone()[0]
+    encuestas_duplicadas = recibidas - encuestas_procesadas
+    
     print(f"{encuestas_procesadas} encuestas cargadas")
     print(f"   - Encuestas válidas (con calificación): {encuestas_validas}")
     print(f"   - Encuestas duplicadas omitidas: {encuestas_duplicadas}")
+    reportar_dimensiones(dimensiones)
+    reportar_metricas(metricas)
+    return encuestas_procesadas, encuestas_validas, encuestas_duplicadas
 
-def cargar_dimension_calificaciones(conn):
+def cargar_dimension_calificaciones(conn, reemplazar=True, ruta='dimension_calificaciones.csv'):
     """Carga la dimensión de calificaciones"""
     print("Cargando dimensión de calificaciones...")
     
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM dimension_calificaciones")
+    cambios_previos = conn.total_changes
+    if reemplazar:
+        cursor.execute("DELETE FROM dimension_calificaciones")
     
-    with open('dimension_calificaciones.csv', 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file, delimiter=';')
-        count = 0
-        for row in reader:
-            cursor.execute('''
-                INSERT INTO dimension_calificaciones (id_calificacion, calificacion, descripcion)
-                VALUES (?, ?, ?)
-            ''', (
-                int(row['id_calificacion']), 
-                int(row['calificacion']), 
-                row['descripcion']
-            ))
-            count += 1
+    count = 0
+    for row in leer_fuente(ruta):
+        cursor.execute('''
+            INSERT INTO dimension_calificaciones (id_calificacion, calificacion, descripcion)
+            VALUES (?, ?, ?)
+            ON CONFLICT(id_calificacion) DO UPDATE SET
+                calificacion = excluded.calificacion,
+                descripcion = excluded.descripcion
+            WHERE dimension_calificaciones.calificacion IS NOT excluded.calificacion
+                OR dimension_calificaciones.descripcion IS NOT excluded.descripcion
+        ''', (
+            int(row['id_calificacion']), 
+            int(row['calificacion']), 
+            row['descripcion']
+        ))
+        count += 1
+    if conn.total_changes != cambios_previos:
+        registrar_cambio_dimensiones(conn)
     
     conn.commit()
     print(f" {count} calificaciones cargadas")
@@ -218,7 +862,7 @@ def verificar_datos_simplificados(conn):
     cursor = conn.cursor()
     
     # Contar registros por tabla
-    tablas = ['usuarios', 'encuestas', 'dimension_calificaciones']
+    tablas = ['usuarios', 'encuestas', 'dimension_calificaciones', 'dimension_estados', 'dimension_cuestionarios']
     print("\nResumen de datos simplificados:")
     
     for tabla in tablas:
@@ -233,12 +877,13 @@ def verificar_datos_simplificados(conn):
             e.id_encuesta,
             u.id_usuario,
             e.id_estado_encuesta,
-            e.estado,
+            de.estado,
             d.calificacion AS calificacion_valor,
             u.nombre,
             e.fecha_insercion
         FROM encuestas e
         LEFT JOIN usuarios u ON e.usuario_id = u.id_usuario
+        LEFT JOIN dimension_estados de ON e.id_estado_encuesta = de.id_estado_encuesta
         LEFT JOIN dimension_calificaciones d ON e.id_calificacion = d.id_calificacion
         WHERE e.id_calificacion IS NOT NULL
         LIMIT 5
@@ -269,32 +914,247 @@ def verificar_datos_simplificados(conn):
         print("   Todos los IDs son únicos")
     else:
         print("   Hay IDs duplicados")
+    
+    print(f"   - Checksum de contenido: {checksum_encuestas(conn)}")
+
+def checksum_encuestas(conn):
+    """Calcula un checksum del contenido de encuestas en orden de id_encuesta
+    
+    No incluye el valor de id_encuesta (que puede tener huecos en los modos masivos),
+    solo el orden, así sirve para comparar el resultado de distintos modos de carga.
+    Los textos de estado y cuestionario se toman de sus dimensiones.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT e.id_estado_encuesta, de.estado, e.id_cuestionario, dq.descripcion,
+               e.id_calificacion, e.fecha_limite, e.fecha_creado, e.hora_creado,
+               e.fecha_modificado, e.hora_modificado, e.fecha_insercion, e.usuario_id, e.hash_unico
+        FROM encuestas e
+        LEFT JOIN dimension_estados de ON e.id_estado_encuesta = de.id_estado_encuesta
+        LEFT JOIN dimension_cuestionarios dq ON e.id_cuestionario = dq.id_cuestionario
+        ORDER BY e.id_encuesta
+    ''')
+    digest = hashlib.md5()
+    for row in cursor:
+        digest.update(repr(tuple(row)).encode())
+    return digest.hexdigest()
+
+def finalizar_carga_masiva(conn, indice_diferido):
+    """Cierra una carga con el perfil masivo: índice, llaves foráneas y valores seguros
+    
+    Si los índices se difirieron, aquí se eliminan los duplicados entre lotes
+    (gana la primera aparición) y se construyen los índices en una sola pasada.
+    Devuelve (filas_eliminadas, eliminadas_con_calificacion).
+    """
+    print("Finalizando carga masiva...")
+    eliminadas = eliminadas_validas = 0
+    if indice_diferido:
+        inicio = time.perf_counter()
+        eliminadas, eliminadas_validas = consolidar_claves(conn)
+        print(f"   - Índice de hash_unico creado; duplicados entre lotes eliminados: {eliminadas} "
+              f"({time.perf_counter() - inicio:.2f} s)")
+        crear_indices_encuestas(conn)
+        print("   - Índices secundarios de encuestas creados")
+    
+    huerfanas = verificar_llaves_foraneas(conn, 'encuestas')
+    restaurar_perfil_seguro(conn)
+    if huerfanas:
+        detalle = ', '.join(f"{tabla}: {cantidad}" for tabla, cantidad in huerfanas.items())
+        raise sqlite3.IntegrityError(f"FOREIGN KEY constraint failed en encuestas ({detalle})")
+    print("   - Llaves foráneas verificadas; perfil seguro restaurado")
+    return eliminadas, eliminadas_validas
+
+def agregar_argumentos_carga(parser):
+    """Agrega las opciones del cargador a un parser de argparse (también las usa ejecutar_puntos.py)"""
+    parser.add_argument('--modo', choices=['fila', 'lotes', 'paralelo'], default='fila',
+                        help="'fila' inserta registro por registro; 'lotes' usa executemany por bloques; "
+                             "'paralelo' parsea el CSV en varios procesos con un único escritor")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Procesos trabajadores del modo 'paralelo' (por defecto, núcleos disponibles)")
+    parser.add_argument('--tamano-lote', type=int, default=TAMANO_LOTE,
+                        help=f"Filas por lote en el modo 'lotes' (por defecto {TAMANO_LOTE})")
+    parser.add_argument('--perfil', choices=PERFILES, default='seguro',
+                        help="'masivo' usa WAL, synchronous OFF, índice de hash y llaves foráneas diferidos")
+    parser.add_argument('--clave-dedup', choices=list(ESTRATEGIAS), default=ESTRATEGIA_POR_DEFECTO,
+                        help="Estrategia de clave de deduplicación para una base nueva (ver claves_dedup.py)")
+    parser.add_argument('--migrar-clave', choices=[e for e in ESTRATEGIAS if e != 'md5'], default=None,
+                        help="Migra la base existente a otra estrategia de clave y termina")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Conserva las tablas y carga solo las filas nuevas desde la última marca de agua")
+    parser.add_argument('--fusionar', action='store_true',
+                        help="Conserva las tablas, inserta las encuestas nuevas y actualiza las que tienen una "
+                             "FechaModificado/HoraModificado más reciente (ver cambios_encuestas.py); "
+                             "con --incremental solo se leen las filas nuevas del archivo")
+    parser.add_argument('--motor', choices=MOTORES, default='filas',
+                        help="'columnas' limpia encuestas.csv por lotes de columnas en vez de fila por fila "
+                             "(mismas filas; ver limpieza_columnar.py)")
+    parser.add_argument('--dedup', choices=MODOS_DEDUP, default='indice',
+                        help="'externa' deduplica con archivos de derrame en disco y un filtro de Bloom en vez "
+                             "de consultar el índice de hash_unico (ver dedup_externa.py)")
+    parser.add_argument('--memoria-dedup-mb', type=float, default=MEMORIA_DEDUP_MB,
+                        help=f"Memoria máxima de la deduplicación externa (por defecto {MEMORIA_DEDUP_MB} MB)")
+    parser.add_argument('--archivos-mensuales', nargs='?', const='', default=None, metavar='DIRECTORIO',
+                        help=f"Mantiene además un archivo SQLite de encuestas por mes para consultas en paralelo "
+                             f"(por defecto en {NOMBRE_DIRECTORIO} junto a la base; ver archivos_mensuales.py)")
+    parser.add_argument('--encuestas', default='encuestas.csv', metavar='FUENTE',
+                        help="Archivo, patrón glob o directorio de CSV de encuestas, planos o comprimidos "
+                             "(.gz, .zst); por defecto encuestas.csv (ver fuentes_entrada.py)")
+    parser.add_argument('--usuarios', default='usuarios.csv', metavar='FUENTE',
+                        help="Fuente de usuarios, con el mismo formato que --encuestas (por defecto usuarios.csv)")
+    parser.add_argument('--calificaciones', default='dimension_calificaciones.csv', metavar='FUENTE',
+                        help="Fuente de la dimensión de calificaciones (por defecto dimension_calificaciones.csv)")
+    parser.add_argument('--limit', type=int, default=None,
+                        help="Procesa solo las primeras N filas de encuestas.csv (para pruebas)")
+
+def parsear_argumentos():
+    """Lee las opciones de línea de comandos del cargador"""
+    parser = argparse.ArgumentParser(description="Carga los CSV de encuestas y usuarios en SQLite")
+    agregar_argumentos_carga(parser)
+    agregar_argumentos_instrumentacion(parser, 'reporte_carga.json')
+    return parser.parse_args()
+
+def cargar_con_configuracion(args, configuracion):
+    """Carga completa en un backend distinto de SQLite (ENCUESTAS_BD, ver almacenamiento.py)
+    
+    Los modos propios de SQLite (paralelo, perfil masivo, incremental, migración de clave)
+    no aplican; la carga va siempre por lotes con COPY.
+    """
+    if (args.incremental or args.fusionar or args.migrar_clave or args.perfil != 'seguro' or args.modo != 'fila'
+            or args.archivos_mensuales is not None):
+        print(f"   - Con {configuracion['backend']} se ignoran --modo, --perfil, --incremental, --fusionar, "
+              f"--migrar-clave y --archivos-mensuales")
+    validar_fuentes(args)
+    bd = abrir_bd(configuracion)
+    try:
+        print(f"Conexión a base de datos establecida ({configuracion['backend']})")
+        cargar_en_backend(bd, estrategia_clave=args.clave_dedup, tamano_lote=args.tamano_lote,
+                          limite=args.limit, motor=args.motor, ruta_encuestas=args.encuestas,
+                          ruta_usuarios=args.usuarios, ruta_calificaciones=args.calificaciones)
+        with etapa('verificacion'):
+            verificar_datos_simplificados(bd['conn'])
+        print("\n¡Carga de datos completada")
+        print(f" Base de datos: {configuracion['url']}")
+    finally:
+        bd['conn'].close()
+
+def ejecutar_carga(conn, args):
+    """Carga completa o incremental en una conexión SQLite ya abierta con el perfil args.perfil
+    
+    La conexión no se cierra: ejecutar_puntos.py la reutiliza en las etapas siguientes.
+    """
+    # La carga incremental y la fusión comparan contra las claves ya guardadas, que solo conoce el índice
+    if (args.incremental or args.fusionar) and args.dedup == 'externa':
+        raise ValueError("--dedup externa solo aplica a cargas completas (sin --incremental ni --fusionar)")
+    conservar = args.incremental or args.fusionar
+    memoria_dedup_mb = args.memoria_dedup_mb if args.dedup == 'externa' else None
+    
+    if args.migrar_clave:
+        descartadas = migrar_estrategia(conn, args.migrar_clave, ddl_encuestas)
+        crear_indices_encuestas(conn)
+        conn.commit()
+        print(f"Clave de deduplicación migrada a {args.migrar_clave} "
+              f"({descartadas} filas colapsadas por clave repetida)")
+        if descartadas:
+            eliminar_tablas_rollup(conn)
+            actualizar_rollups(conn)
+        return
+    
+    # Antes de cualquier DDL: una carga completa borra las tablas al crear el esquema
+    validar_fuentes(args)
+    if args.modo == 'paralelo':
+        validar_fuente_paralela(args.encuestas)
+    
+    # Crear tablas simplificadas
+    with etapa('esquema'):
+        crear_tablas_simplificadas(conn, reconstruir=not conservar, estrategia_clave=args.clave_dedup)
+    
+    # Con el perfil masivo, en una carga completa por lotes el índice de hash_unico
+    # se construye una sola vez al final (el modo 'fila' lo necesita para verificar duplicados,
+    # salvo con la deduplicación externa)
+    diferir_indice = (args.perfil == 'masivo' and not conservar
+                      and (args.modo != 'fila' or memoria_dedup_mb is not None) and indice_hash_separado(conn))
+    if diferir_indice:
+        suspender_indice_hash(conn)
+        suspender_indices_encuestas(conn)
+    
+    # Cargar datos
+    with etapa('usuarios'):
+        cargar_usuarios(conn, reemplazar=not conservar, ruta=args.usuarios)
+    with etapa('calificaciones'):
+        cargar_dimension_calificaciones(conn, reemplazar=not conservar, ruta=args.calificaciones)
+    with etapa('encuestas') as medicion:
+        if args.incremental:
+            contadores = cargar_encuestas_incremental(conn, tamano_lote=args.tamano_lote, limite=args.limit,
+                                                      ruta=args.encuestas, motor=args.motor, fusionar=args.fusionar)
+        elif args.fusionar:
+            contadores = cargar_encuestas_fusion(conn, tamano_lote=args.tamano_lote, limite=args.limit,
+                                                 motor=args.motor, ruta=args.encuestas)
+        elif args.modo == 'paralelo':
+            contadores = cargar_encuestas_en_paralelo(conn, procesos=args.procesos, tamano_lote=args.tamano_lote,
+                                                      limite=args.limit, ruta=args.encuestas, motor=args.motor,
+                                                      memoria_dedup_mb=memoria_dedup_mb)
+        elif args.modo == 'lotes':
+            contadores = cargar_encuestas_por_lotes(conn, tamano_lote=args.tamano_lote, limite=args.limit,
+                                                    motor=args.motor, memoria_dedup_mb=memoria_dedup_mb,
+                                                    ruta=args.encuestas)
+        else:
+            contadores = cargar_encuestas_simplificadas(conn, limite=args.limit, motor=args.motor,
+                                                        memoria_dedup_mb=memoria_dedup_mb, ruta=args.encuestas)
+        medicion['filas'] = contadores[0]
+    
+    if args.perfil == 'masivo':
+        with etapa('finalizacion_masiva'):
+            eliminadas, eliminadas_validas = finalizar_carga_masiva(conn, diferir_indice)
+        if eliminadas:
+            procesadas, validas, duplicadas = contadores
+            print(f"{procesadas - eliminadas} encuestas cargadas (tras eliminar duplicados entre lotes)")
+            print(f"   - Encuestas válidas (con calificación): {validas - eliminadas_validas}")
+            print(f"   - Encuestas duplicadas omitidas: {duplicadas + eliminadas}")
+    
+    # Resúmenes para los reportes: solo se agregan las encuestas nuevas (y se recalculan
+    # los meses con encuestas actualizadas por la fusión)
+    with etapa('rollups') as medicion:
+        resumidas = medicion['filas'] = actualizar_rollups(conn)
+    print(f"Resúmenes mensuales actualizados con {resumidas} encuestas (nuevas o de meses recalculados)")
+    
+    # Archivos por mes derivados de la base: solo se reescriben los meses que cambiaron
+    if args.archivos_mensuales is not None:
+        with etapa('archivos_mensuales'):
+            escritos = sincronizar_archivos_mensuales(conn, args.archivos_mensuales or None)
+        print(f"Archivos mensuales reescritos: {', '.join(escritos) if escritos else 'ninguno'}")
+    
+    # Verificar datos simplificados
+    with etapa('verificacion'):
+        verificar_datos_simplificados(conn)
+    
+    print("\n¡Carga de datos completada")
+    # Archivo de la conexión abierta (ENCUESTAS_BD o la base por defecto)
+    print(f" Base de datos: {conn.execute('PRAGMA database_list').fetchone()[2] or ':memory:'}")
 
 def main():
     """Función principal simplificada"""
+    args = parsear_argumentos()
+    iniciar_desde_argumentos(args, 'cargar_datos_simplificado')
+    
     print("Iniciando carga de datos SIMPLIFICADA...")
     print("=" * 60)
     print("SOLUCIÓN: ENCUESTAS")
     print("=" * 60)
     
     try:
-        # Conectar a la base de datos
-        conn = conectar_bd()
-        print("Conexión a base de datos establecida")
+        configuracion = configuracion_bd()
+        if configuracion['backend'] != 'sqlite':
+            cargar_con_configuracion(args, configuracion)
+            return
         
-        # Crear tablas simplificadas
-        crear_tablas_simplificadas(conn)
+        # Conectar a la base de datos
+        conn = conectar_bd(perfil=args.perfil)
+        print(f"Conexión a base de datos establecida (perfil {args.perfil})")
         
-        # Cargar datos
-        cargar_usuarios(conn)
-        cargar_dimension_calificaciones(conn)
-        cargar_encuestas_simplificadas(conn)
+        ejecutar_carga(conn, args)
+        if args.migrar_clave:
+            return
         
-        # Verificar datos simplificados
-        verificar_datos_simplificados(conn)
-        
-        print("\n¡Carga de datos completada")
-        print(" Base de datos: encuestas_usuarios_simplificada.db")
         print("\nCARACTERÍSTICAS DE LA SOLUCIÓN :")
         print("   ID AUTOINCREMENTAL en tabla ENCUESTAS")
         print("   ID único real para cada encuesta")
@@ -305,6 +1165,8 @@ def main():
         print(f"Error durante la carga: {str(e)}")
         import traceback
         traceback.print_exc()
+    finally:
+        finalizar_desde_argumentos(args)
     
 
 if __name__ == "__main__":
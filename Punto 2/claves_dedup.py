@@ -0,0 +1,174 @@
+"""
+Estrategias de clave de deduplicación para la columna encuestas.hash_unico.
+
+- md5: hash MD5 en hexadecimal (32 caracteres, TEXT) sobre los campos crudos del CSV.
+  Es la estrategia original y la que se usa por defecto.
+- blake2b-64: blake2b truncado a 8 bytes, guardado como INTEGER con signo.
+- blake2b-128: blake2b truncado a 16 bytes, guardado como BLOB.
+
+Las estrategias compactas se calculan sobre los valores ya limpios
+(usuario_id, fecha_insercion, id_cuestionario, id_calificacion), de modo que
+se pueden recalcular desde la tabla al migrar una base existente. Por eso un
+'NULL' y un campo vacío en Calificacion cuentan como la misma encuesta.
+"""
+
+import hashlib
+
+# Posiciones en la tupla preparada (preparar_encuesta) de los campos que forman la clave
+POS_ID_CUESTIONARIO = 2
+POS_ID_CALIFICACION = 4
+POS_FECHA_INSERCION = 10
+POS_USUARIO_ID = 11
+
+ESTRATEGIA_POR_DEFECTO = 'md5'
+
+INDICE_HASH = 'idx_encuestas_hash_unico'
+
+def clave_md5(row):
+    """Genera el hash MD5 hexadecimal sobre los campos crudos de la fila del CSV"""
+    campos_clave = f"{row.get('usuario_id', '')}-{row.get('Fecha_Insercion', '')}-{row.get('IdCuestionario', '')}-{row.get('Calificacion', '')}"
+    return hashlib.md5(campos_clave.encode()).hexdigest()
+
+def claves_md5(usuarios, fechas_insercion, cuestionarios, calificaciones):
+    """clave_md5 de un lote completo, a partir de las columnas crudas del CSV"""
+    md5 = hashlib.md5
+    return [md5(f"{usuario}-{fecha}-{cuestionario}-{calificacion}".encode()).hexdigest()
+            for usuario, fecha, cuestionario, calificacion
+            in zip(usuarios, fechas_insercion, cuestionarios, calificaciones)]
+
+def _bytes_clave(usuario_id, fecha_insercion, id_cuestionario, id_calificacion, tamano):
+    campos_clave = f"{usuario_id}|{fecha_insercion}|{id_cuestionario}|{id_calificacion}"
+    return hashlib.blake2b(campos_clave.encode(), digest_size=tamano).digest()
+
+def clave_blake2b_64(usuario_id, fecha_insercion, id_cuestionario, id_calificacion):
+    """blake2b de 8 bytes como entero con signo (cabe en un INTEGER de SQLite)"""
+    digest = _bytes_clave(usuario_id, fecha_insercion, id_cuestionario, id_calificacion, 8)
+    return int.from_bytes(digest, 'big', signed=True)
+
+def clave_blake2b_128(usuario_id, fecha_insercion, id_cuestionario, id_calificacion):
+    """blake2b de 16 bytes para guardar como BLOB"""
+    return _bytes_clave(usuario_id, fecha_insercion, id_cuestionario, id_calificacion, 16)
+
+# nombre -> (tipo SQL de hash_unico, función sobre valores limpios o None si usa la fila cruda)
+ESTRATEGIAS = {
+    'md5': ('TEXT', None),
+    'blake2b-64': ('INTEGER', clave_blake2b_64),
+    'blake2b-128': ('BLOB', clave_blake2b_128),
+}
+
+def tipo_sql(estrategia):
+    """Tipo de columna SQL para hash_unico según la estrategia"""
+    return ESTRATEGIAS[estrategia][0]
+
+def clave_desde_encuesta(estrategia, row, encuesta):
+    """Calcula la clave de una encuesta ya limpia (tupla preparada sin clave)"""
+    funcion = ESTRATEGIAS[estrategia][1]
+    if funcion is None:
+        return clave_md5(row)
+    return funcion(
+        encuesta[POS_USUARIO_ID],
+        encuesta[POS_FECHA_INSERCION],
+        encuesta[POS_ID_CUESTIONARIO],
+        encuesta[POS_ID_CALIFICACION]
+    )
+
+def detectar_estrategia(conn):
+    """Deduce la estrategia de la base a partir del tipo declarado de encuestas.hash_unico"""
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(encuestas)")
+    for columna in cursor.fetchall():
+        if columna[1] == 'hash_unico':
+            for nombre, (tipo, _) in ESTRATEGIAS.items():
+                if columna[2].upper() == tipo:
+                    return nombre
+    return ESTRATEGIA_POR_DEFECTO
+
+def crear_indice_hash(conn):
+    """Crea el índice UNIQUE sobre encuestas.hash_unico si no existe"""
+    conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {INDICE_HASH} ON encuestas (hash_unico)")
+
+def indice_hash_separado(conn):
+    """Indica si hash_unico tiene un índice propio (que se puede diferir) y no un UNIQUE en línea"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (INDICE_HASH,))
+    return cursor.fetchone() is not None
+
+def suspender_indice_hash(conn):
+    """Elimina el índice de hash_unico para cargar sin mantenerlo fila por fila"""
+    conn.execute(f"DROP INDEX IF EXISTS {INDICE_HASH}")
+
+def consolidar_claves(conn):
+    """Elimina claves repetidas (gana la primera aparición) y vuelve a crear el índice UNIQUE
+
+    Se usa al terminar una carga con el índice diferido. Primero se construye un índice
+    simple ordenado por hash_unico, así las repeticiones salen de un solo recorrido del
+    índice en vez de un GROUP BY sobre la tabla. Devuelve
+    (filas_eliminadas, eliminadas_con_calificacion) para corregir los contadores.
+    """
+    cursor = conn.cursor()
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_encuestas_hash_tmp ON encuestas (hash_unico)")
+    cursor.execute("DROP TABLE IF EXISTS temp.encuestas_repetidas")
+    cursor.execute('''
+        CREATE TEMP TABLE encuestas_repetidas AS
+        SELECT id_encuesta FROM (
+            SELECT
+                id_encuesta,
+                hash_unico = LAG(hash_unico) OVER (ORDER BY hash_unico, id_encuesta) AS repetida
+            FROM encuestas
+        )
+        WHERE repetida
+    ''')
+    cursor.execute('''
+        SELECT COUNT(*), COALESCE(SUM(e.id_calificacion IS NOT NULL), 0)
+        FROM temp.encuestas_repetidas r
+        JOIN encuestas e ON e.id_encuesta = r.id_encuesta
+    ''')
+    eliminadas, eliminadas_validas = cursor.fetchone()
+    if eliminadas:
+        cursor.execute("DELETE FROM encuestas WHERE id_encuesta IN (SELECT id_encuesta FROM temp.encuestas_repetidas)")
+    cursor.execute("DROP TABLE temp.encuestas_repetidas")
+    cursor.execute("DROP INDEX idx_encuestas_hash_tmp")
+    crear_indice_hash(conn)
+    conn.commit()
+    return eliminadas, eliminadas_validas
+
+def migrar_estrategia(conn, estrategia, ddl_encuestas):
+    """Reescribe encuestas con la nueva clave, recalculada desde las columnas de la tabla
+
+    ddl_encuestas(nombre_tabla, tipo_clave) debe devolver el CREATE TABLE de encuestas.
+    Conserva id_encuesta y los índices secundarios de encuestas (se vuelven a crear con su
+    misma definición). Devuelve cuántas filas se descartaron porque su nueva clave
+    coincidía con la de otra fila (p. ej. 'NULL' y vacío en la calificación original).
+    """
+    funcion = ESTRATEGIAS[estrategia][1]
+    if funcion is None:
+        raise ValueError("md5 se calcula sobre los campos crudos del CSV; "
+                         "para volver a md5 hay que recargar desde los archivos")
+
+    conn.create_function('clave_dedup', 4, funcion, deterministic=True)
+    cursor = conn.cursor()
+    # El índice de hash_unico lo vuelve a crear consolidar_claves con el tipo nuevo
+    cursor.execute('''
+        SELECT sql FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = 'encuestas' AND sql IS NOT NULL AND name != ?
+    ''', (INDICE_HASH,))
+    indices = [fila[0] for fila in cursor.fetchall()]
+    cursor.execute("DROP TABLE IF EXISTS encuestas_migracion")
+    cursor.execute(ddl_encuestas('encuestas_migracion', tipo_sql(estrategia)))
+    cursor.execute('''
+        INSERT INTO encuestas_migracion
+        SELECT
+            id_encuesta, id_estado_encuesta, id_cuestionario,
+            id_calificacion, fecha_limite, fecha_creado, hora_creado,
+            fecha_modificado, hora_modificado, fecha_insercion, usuario_id,
+            clave_dedup(usuario_id, fecha_insercion, id_cuestionario, id_calificacion)
+        FROM encuestas
+        ORDER BY id_encuesta
+    ''')
+    cursor.execute("DROP TABLE encuestas")
+    cursor.execute("ALTER TABLE encuestas_migracion RENAME TO encuestas")
+    eliminadas, _ = consolidar_claves(conn)
+    for definicion in indices:
+        cursor.execute(definicion)
+    conn.commit()
+    return eliminadas
@@ -0,0 +1,103 @@
+"""
+Prueba de los backends de almacenamiento (almacenamiento.py) contra una base de prueba.
+
+Carga los mismos CSV dos veces: con el modo 'lotes' de SQLite en un archivo temporal
+(la referencia) y con la carga por backend (cargar_en_backend) en la base indicada con
+--url. Después construye la tabla unificada del Punto 3 en ambas y compara los conteos
+por tabla y un checksum del contenido de encuestas y de la tabla unificada (sin
+id_encuesta, que puede tener huecos distintos). Termina con código 1 si algo difiere.
+
+La base de prueba puede ser un PostgreSQL local desechable (la carga borra y recrea
+las tablas). Sin --url se usa un segundo archivo SQLite temporal, que recorre las
+mismas funciones de almacenamiento.py salvo COPY.
+
+Uso (desde la carpeta con los CSV):
+    python comparar_backends.py --url postgresql://localhost/encuestas_prueba --limit 20000
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+
+from almacenamiento import configuracion_bd, abrir_bd, ejecutar, construir_tabla_unificada, expresiones_fecha
+from cargar_datos_simplificado import (
+    crear_tablas_simplificadas, cargar_usuarios, cargar_dimension_calificaciones, cargar_encuestas_por_lotes,
+    cargar_en_backend, checksum_encuestas
+)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Punto 3'))
+from ejecutar_punto3 import FECHA_INICIO, FECHA_FIN, PLANTILLA_SELECCION_UNIFICADA
+
+TABLAS = ['usuarios', 'dimension_calificaciones', 'dimension_estados', 'dimension_cuestionarios', 'encuestas']
+
+TABLA_PRUEBA = 'tabla_unificada_prueba'
+
+def cargar_referencia(ruta, limite):
+    """Carga la referencia con el modo 'lotes' de SQLite"""
+    conn = sqlite3.connect(ruta)
+    conn.execute('PRAGMA foreign_keys = ON;')
+    crear_tablas_simplificadas(conn)
+    cargar_usuarios(conn)
+    cargar_dimension_calificaciones(conn)
+    cargar_encuestas_por_lotes(conn, limite=limite)
+    conn.close()
+
+def checksum_tabla_unificada(bd):
+    """MD5 de la tabla unificada en orden de id_encuesta, sin el valor de id_encuesta"""
+    digest = hashlib.md5()
+    cursor = ejecutar(bd, f"SELECT * FROM {TABLA_PRUEBA} ORDER BY id_encuesta")
+    for row in cursor:
+        digest.update(repr(tuple(row)[1:]).encode())
+    return digest.hexdigest()
+
+def resumen_base(bd):
+    """Conteos por tabla y checksums de encuestas y de la tabla unificada"""
+    seleccion = PLANTILLA_SELECCION_UNIFICADA.format(**expresiones_fecha(bd['backend'], 'e.fecha_insercion'))
+    resumen = {tabla: ejecutar(bd, f"SELECT COUNT(*) FROM {tabla}").fetchone()[0] for tabla in TABLAS}
+    resumen['tabla_unificada'] = construir_tabla_unificada(bd, TABLA_PRUEBA, seleccion, (FECHA_INICIO, FECHA_FIN))
+    resumen['checksum_encuestas'] = checksum_encuestas(bd['conn'])
+    resumen['checksum_tabla_unificada'] = checksum_tabla_unificada(bd)
+    return resumen
+
+def main():
+    """Compara la carga por backend con la referencia SQLite y termina con código 1 si difieren"""
+    parser = argparse.ArgumentParser(description="Prueba de los backends de almacenamiento")
+    parser.add_argument('--url', default=None,
+                        help="Base de prueba (por ejemplo postgresql://localhost/encuestas_prueba); "
+                             "por defecto un archivo SQLite temporal")
+    parser.add_argument('--limit', type=int, default=None, help="Carga solo las primeras N filas de encuestas.csv")
+    parser.add_argument('--motor', choices=['filas', 'columnas'], default='filas')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        print("Cargando la referencia (SQLite, modo lotes)...")
+        ruta_referencia = os.path.join(directorio, 'referencia.db')
+        cargar_referencia(ruta_referencia, args.limit)
+        referencia = abrir_bd(configuracion_bd(f"sqlite:///{ruta_referencia}"))
+        esperado = resumen_base(referencia)
+        referencia['conn'].close()
+
+        configuracion = configuracion_bd(args.url or f"sqlite:///{os.path.join(directorio, 'prueba.db')}")
+        print(f"\nCargando la base de prueba ({configuracion['backend']})...")
+        bd = abrir_bd(configuracion)
+        try:
+            cargar_en_backend(bd, limite=args.limit, motor=args.motor)
+            obtenido = resumen_base(bd)
+        finally:
+            bd['conn'].close()
+
+    print(f"\n   {'Comparación':<28}{'Referencia':>34}{configuracion['backend']:>34}")
+    coinciden = True
+    for clave, valor in esperado.items():
+        igual = valor == obtenido[clave]
+        coinciden = coinciden and igual
+        print(f"   {clave:<28}{str(valor):>34}{str(obtenido[clave]):>34}  {'ok' if igual else 'DIFERENTE'}")
+
+    print("\nLos backends producen los mismos datos" if coinciden else "\nError: los backends difieren")
+    sys.exit(0 if coinciden else 1)
+
+if __name__ == "__main__":
+    main()
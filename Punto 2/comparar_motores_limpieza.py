@@ -0,0 +1,139 @@
+"""
+Prueba diferencial de los motores de limpieza de encuestas ('filas' y 'columnas').
+
+Limpia el mismo CSV con ambos motores, sin tocar la base de datos, y verifica que
+produzcan exactamente las mismas tuplas preparadas, en el mismo orden y con la misma
+cantidad de filas leídas, para cada estrategia de clave. También compara los
+shards del modo paralelo. Con --casos-borde se agrega un CSV con los casos difíciles
+(NULL, vacíos, valores no numéricos, líneas vacías, filas cortas o con campos de más).
+
+Uso:
+    python comparar_motores_limpieza.py --ruta encuestas.csv --casos-borde
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from claves_dedup import ESTRATEGIAS
+from pipeline_carga import leer_csv, aplicar_etapas, planificar_shards
+from cargar_datos_simplificado import etapas_encuestas, procesar_shard_encuestas
+from limpieza_columnar import leer_csv_por_columnas
+
+# Tamaño de shard chico para que la comparación del modo paralelo recorra varios shards
+TAMANO_SHARD_PRUEBA = 256 * 1024
+
+CASOS_BORDE = [
+    'IdEstadoEncuesta;Estado;IdCuestionario;DescripcionCuestionario;Calificacion;FechaLimite;FechaCreado;'
+    'HoraCreado;FechaModificado;HoraModificado;Fecha_Insercion;usuario_id',
+    '1;Contestada;1;Atencion;5;20250601;20250601;10:00:00;20250601;11:00:00;2025-06-01 10:00:00.000;7',
+    '2;Pendiente;2;Agilidad;NULL;20250602;20250602;10:00:00;20250602;11:00:00;2025-06-02 10:00:00.000;8',
+    '1;Contestada;1;Atencion;5;20250601;20250601;10:00:00;20250601;11:00:00;2025-06-01 10:00:00.000;7',
+    ';Contestada;NULL;Atencion;;20250603;20250603;10:00:00;20250603;11:00:00;2025-06-03 10:00:00.000;9',
+    'x;Pendiente;abc;Agilidad;3.5;20250604;20250604;10:00:00;20250604;11:00:00;2025-06-04 10:00:00.000; 10 ',
+    '',
+    '1;Contestada;3;Recomendacion;4;20250605;20250605;10:00:00;20250605;11:00:00;2025-06-05 10:00:00.000;',
+    '2;Pendiente;3;Recomendacion;2;20250606;20250606;10:00:00;20250606;11:00:00;2025-06-06 10:00:00.000; ',
+    '2;Pendiente;1;Atencion;1;20250607;20250607;10:00:00;20250607;11:00:00;2025-06-07 10:00:00.000;11;extra',
+    '1;Contestada;2;Agilidad;2;20250608',
+    '1;Contestada;2;"Agilidad; con punto y coma";-1;20250609;20250609;10:00:00;20250609;11:00:00;'
+    '2025-06-09 10:00:00.000;12',
+]
+
+def preparar_por_filas(ruta, estrategia, limite):
+    """(filas_leidas, tuplas) con el motor por filas"""
+    leidas = 0
+    def contar(filas):
+        nonlocal leidas
+        for fila in filas:
+            leidas += 1
+            yield fila
+    fuente = leer_csv(ruta)
+    if limite is not None:
+        fuente = (fila for _, fila in zip(range(limite), fuente))
+    encuestas = list(aplicar_etapas(contar(fuente), etapas_encuestas(estrategia_clave=estrategia)))
+    return leidas, encuestas
+
+def preparar_por_columnas(ruta, estrategia, limite):
+    """(filas_leidas, tuplas) con el motor por columnas"""
+    contador = {'filas_leidas': 0}
+    encuestas = list(leer_csv_por_columnas(ruta, estrategia, contador, limite=limite))
+    return contador['filas_leidas'], encuestas
+
+def primera_diferencia(esperadas, obtenidas):
+    """Índice y par de tuplas de la primera diferencia, o None si son iguales"""
+    for i, (esperada, obtenida) in enumerate(zip(esperadas, obtenidas)):
+        if esperada != obtenida or list(map(type, esperada)) != list(map(type, obtenida)):
+            return i, esperada, obtenida
+    if len(esperadas) != len(obtenidas):
+        i = min(len(esperadas), len(obtenidas))
+        return i, esperadas[i:i + 1], obtenidas[i:i + 1]
+    return None
+
+def comparar_shards(ruta, estrategia):
+    """Compara el trabajador del modo paralelo con ambos motores, shard por shard"""
+    campos, shards = planificar_shards(ruta, TAMANO_SHARD_PRUEBA)
+    for inicio, fin in shards:
+        por_filas = procesar_shard_encuestas((ruta, inicio, fin, campos, estrategia, 'filas', None))
+        por_columnas = procesar_shard_encuestas((ruta, inicio, fin, campos, estrategia, 'columnas', None))
+        if por_filas[0] != por_columnas[0] or primera_diferencia(por_filas[1], por_columnas[1]):
+            return f"shard {inicio}-{fin}"
+    return None
+
+def comparar_archivo(ruta, limite):
+    """Compara los motores sobre un CSV para todas las estrategias; devuelve True si coinciden"""
+    coinciden = True
+    print(f"\n{ruta}:")
+    print(f"   {'Estrategia':<14}{'Filas':>10}{'Filas (s)':>11}{'Columnas (s)':>14}{'Aceleración':>13}  Resultado")
+    for estrategia in ESTRATEGIAS:
+        inicio = time.perf_counter()
+        leidas_filas, por_filas = preparar_por_filas(ruta, estrategia, limite)
+        tiempo_filas = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        leidas_columnas, por_columnas = preparar_por_columnas(ruta, estrategia, limite)
+        tiempo_columnas = time.perf_counter() - inicio
+
+        diferencia = primera_diferencia(por_filas, por_columnas)
+        if leidas_filas != leidas_columnas:
+            resultado = f"DIFERENTE: filas leídas {leidas_filas} vs {leidas_columnas}"
+        elif diferencia:
+            i, esperada, obtenida = diferencia
+            resultado = f"DIFERENTE en la encuesta {i}: {esperada!r} vs {obtenida!r}"
+        else:
+            shard = comparar_shards(ruta, estrategia) if limite is None else None
+            resultado = f"DIFERENTE en el {shard}" if shard else "idénticas"
+        coinciden = coinciden and resultado == "idénticas"
+        aceleracion = tiempo_filas / tiempo_columnas if tiempo_columnas > 0 else 0
+        print(f"   {estrategia:<14}{len(por_filas):>10,}{tiempo_filas:>11.3f}{tiempo_columnas:>14.3f}"
+              f"{aceleracion:>12.1f}x  {resultado}")
+    return coinciden
+
+def main():
+    """Compara ambos motores y termina con código 1 si alguna salida difiere"""
+    parser = argparse.ArgumentParser(description="Prueba diferencial de los motores de limpieza de encuestas")
+    parser.add_argument('--ruta', nargs='*', default=['encuestas.csv'], help="CSV de encuestas a comparar")
+    parser.add_argument('--limit', type=int, default=None, help="Compara solo las primeras N filas")
+    parser.add_argument('--casos-borde', action='store_true',
+                        help="Compara también un CSV generado con casos difíciles")
+    args = parser.parse_args()
+
+    coinciden = True
+    for ruta in args.ruta:
+        if os.path.exists(ruta):
+            coinciden = comparar_archivo(ruta, args.limit) and coinciden
+        else:
+            print(f"No se encontró {ruta}")
+    if args.casos_borde:
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'encuestas_casos_borde.csv')
+            with open(ruta, 'w', encoding='utf-8-sig', newline='') as archivo:
+                archivo.write('\n'.join(CASOS_BORDE) + '\n')
+            coinciden = comparar_archivo(ruta, args.limit) and coinciden
+
+    print("\nLos motores producen las mismas filas" if coinciden else "\nError: los motores difieren")
+    sys.exit(0 if coinciden else 1)
+
+if __name__ == "__main__":
+    main()
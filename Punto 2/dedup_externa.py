@@ -0,0 +1,219 @@
+"""
+Deduplicación externa de encuestas (--dedup externa) para cargas cuyas claves no caben en memoria.
+
+En vez de consultar el índice de hash_unico por cada fila, la etapa trabaja en tres
+pasadas con archivos de derrame en disco:
+
+1. Las filas se escriben tal cual en un archivo secuencial y la clave de cada fila, con
+   su número de fila, va a una de `particiones` particiones según su hash. Un filtro de
+   Bloom registra las claves vistas: si la clave no estaba en el filtro es nueva con
+   seguridad; si el filtro dice que ya estaba, la entrada se marca como candidata a
+   duplicado.
+2. Cada partición con candidatas se deduplica por separado. Solo las claves candidatas
+   se guardan en memoria; se recorren las claves de la partición en orden de fila, se
+   conserva la primera aparición y el resto son duplicados. Las particiones sin
+   candidatas no se vuelven a leer. Una partición con más candidatas de las que permite
+   la memoria se vuelve a particionar con otro hash.
+3. El archivo de filas se lee en orden y se omiten los números de fila duplicados (una
+   mezcla ordenada de las listas de duplicados de cada partición).
+
+Se conserva el orden del archivo y gana la primera aparición, igual que en el modo
+'fila', así que los conteos de duplicados coinciden. La memoria queda acotada por
+memoria_mb: la mitad para el filtro de Bloom y la mitad para las candidatas de una
+partición, más los búferes de escritura de cada partición.
+"""
+
+import heapq
+import os
+import pickle
+import tempfile
+
+MODOS_DEDUP = ['indice', 'externa']
+
+# Memoria por defecto de la etapa (filtro de Bloom + candidatas de una partición)
+MEMORIA_DEDUP_MB = 64
+
+PARTICIONES = 64
+
+# Funciones hash del filtro de Bloom
+FUNCIONES_BLOOM = 4
+
+# Bytes estimados por clave candidata en memoria (la clave y su entrada en dos conjuntos)
+BYTES_POR_CANDIDATA = 200
+
+# Elementos que se acumulan antes de escribir un bloque en un archivo de derrame
+TAMANO_BLOQUE = 4096
+TAMANO_BLOQUE_PARTICION = 512
+
+# Niveles máximos de subdivisión de una partición demasiado grande
+PROFUNDIDAD_MAXIMA = 3
+
+def nuevo_contador():
+    """Contadores que la etapa va llenando (se reportan con reportar_dedup_externa)"""
+    return {
+        'filas': 0,
+        'duplicadas': 0,
+        'candidatas': 0,
+        'particiones_leidas': 0,
+        'subdivisiones': 0,
+        'bytes_derrame': 0,
+    }
+
+def nuevo_bloom(memoria_bytes):
+    """Filtro de Bloom de memoria_bytes bytes"""
+    return {'bits': bytearray(max(memoria_bytes, 1)), 'tamano': max(memoria_bytes, 1) * 8}
+
+def bloom_agregar(bloom, clave):
+    """Agrega la clave al filtro; devuelve True si ya podía estar (False = nueva con seguridad)"""
+    bits, tamano = bloom['bits'], bloom['tamano']
+    h = hash(clave)
+    h1 = h & 0xFFFFFFFF
+    h2 = ((h >> 32) & 0xFFFFFFFF) | 1
+    presente = True
+    for i in range(FUNCIONES_BLOOM):
+        posicion = (h1 + i * h2) % tamano
+        byte, bit = posicion >> 3, 1 << (posicion & 7)
+        if not bits[byte] & bit:
+            presente = False
+            bits[byte] |= bit
+    return presente
+
+def abrir_derrame(ruta, tamano_bloque=TAMANO_BLOQUE):
+    """Archivo de derrame: los elementos se escriben en bloques con pickle"""
+    return {'ruta': ruta, 'archivo': open(ruta, 'wb'), 'pendientes': [], 'tamano_bloque': tamano_bloque,
+            'elementos': 0, 'candidatas': 0}
+
+def agregar(derrame, elemento):
+    derrame['pendientes'].append(elemento)
+    if len(derrame['pendientes']) >= derrame['tamano_bloque']:
+        vaciar(derrame)
+
+def vaciar(derrame):
+    if derrame['pendientes']:
+        pickle.dump(derrame['pendientes'], derrame['archivo'], pickle.HIGHEST_PROTOCOL)
+        derrame['elementos'] += len(derrame['pendientes'])
+        derrame['pendientes'] = []
+
+def cerrar_derrame(derrame):
+    """Escribe lo pendiente, cierra el archivo y devuelve su tamaño en bytes"""
+    vaciar(derrame)
+    derrame['archivo'].close()
+    return os.path.getsize(derrame['ruta'])
+
+def leer_derrame(ruta):
+    """Genera los elementos de un archivo de derrame en el orden en que se escribieron"""
+    with open(ruta, 'rb') as archivo:
+        while True:
+            try:
+                bloque = pickle.load(archivo)
+            except EOFError:
+                return
+            yield from bloque
+
+def derramar(encuestas, directorio, bloom, particiones, contador):
+    """Pasada 1: filas al archivo secuencial y (fila, clave, candidata) a su partición
+
+    Devuelve (ruta_filas, particiones_con_candidatas).
+    """
+    filas = abrir_derrame(os.path.join(directorio, 'filas.bin'))
+    derrames = [abrir_derrame(os.path.join(directorio, f"claves_{i}.bin"), TAMANO_BLOQUE_PARTICION)
+                for i in range(particiones)]
+    numero = -1
+    for numero, encuesta in enumerate(encuestas):
+        agregar(filas, encuesta)
+        clave = encuesta[-1]
+        candidata = bloom_agregar(bloom, clave)
+        derrame = derrames[(hash(clave) >> 40) % particiones]
+        agregar(derrame, (numero, clave, candidata))
+        if candidata:
+            derrame['candidatas'] += 1
+    contador['filas'] = numero + 1
+
+    contador['bytes_derrame'] += cerrar_derrame(filas)
+    con_candidatas = []
+    for derrame in derrames:
+        contador['bytes_derrame'] += cerrar_derrame(derrame)
+        contador['candidatas'] += derrame['candidatas']
+        if derrame['candidatas']:
+            con_candidatas.append(derrame)
+        else:
+            os.remove(derrame['ruta'])
+    return filas['ruta'], con_candidatas
+
+def subdividir(derrame, nivel, particiones, contador):
+    """Reparte una partición en sub-particiones con otro hash; devuelve las que tienen candidatas"""
+    contador['subdivisiones'] += 1
+    base = derrame['ruta'][:-len('.bin')]
+    partes = [abrir_derrame(f"{base}_{i}.bin", TAMANO_BLOQUE_PARTICION) for i in range(particiones)]
+    for entrada in leer_derrame(derrame['ruta']):
+        parte = partes[hash((entrada[1], nivel)) % particiones]
+        agregar(parte, entrada)
+        if entrada[2]:
+            parte['candidatas'] += 1
+    os.remove(derrame['ruta'])
+    con_candidatas = []
+    for parte in partes:
+        contador['bytes_derrame'] += cerrar_derrame(parte)
+        if parte['candidatas']:
+            con_candidatas.append(parte)
+        else:
+            os.remove(parte['ruta'])
+    return con_candidatas
+
+def duplicados_particion(derrame, maximo_candidatas, particiones, contador, nivel=1):
+    """Pasada 2: rutas de archivos con los números de fila duplicados (ordenados) de la partición"""
+    if derrame['candidatas'] > maximo_candidatas and nivel <= PROFUNDIDAD_MAXIMA:
+        rutas = []
+        for parte in subdividir(derrame, nivel, particiones, contador):
+            rutas.extend(duplicados_particion(parte, maximo_candidatas, particiones, contador, nivel + 1))
+        return rutas
+
+    contador['particiones_leidas'] += 1
+    candidatas = {clave for _, clave, candidata in leer_derrame(derrame['ruta']) if candidata}
+    vistas = set()
+    duplicados = abrir_derrame(derrame['ruta'][:-len('.bin')] + '_duplicados.bin')
+    for numero, clave, _ in leer_derrame(derrame['ruta']):
+        if clave not in candidatas:
+            continue
+        if clave in vistas:
+            agregar(duplicados, numero)
+        else:
+            vistas.add(clave)
+    os.remove(derrame['ruta'])
+    cerrar_derrame(duplicados)
+    contador['duplicadas'] += duplicados['elementos']
+    return [duplicados['ruta']]
+
+def deduplicar_externo(encuestas, contador, memoria_mb=MEMORIA_DEDUP_MB, directorio=None, particiones=PARTICIONES):
+    """Etapa de deduplicación externa: genera las encuestas sin claves repetidas, en orden
+
+    La clave es el último elemento de cada tupla (hash_unico). Gana la primera aparición.
+    directorio es donde se crean los archivos de derrame (por defecto el temporal del sistema).
+    """
+    memoria_bytes = int(memoria_mb * 1024 * 1024)
+    maximo_candidatas = max(1, memoria_bytes // 2 // BYTES_POR_CANDIDATA)
+    with tempfile.TemporaryDirectory(prefix='dedup_encuestas_', dir=directorio) as temporal:
+        bloom = nuevo_bloom(memoria_bytes // 2)
+        ruta_filas, con_candidatas = derramar(encuestas, temporal, bloom, particiones, contador)
+        del bloom
+
+        rutas_duplicados = []
+        for derrame in con_candidatas:
+            rutas_duplicados.extend(duplicados_particion(derrame, maximo_candidatas, particiones, contador))
+
+        duplicados = heapq.merge(*(leer_derrame(ruta) for ruta in rutas_duplicados))
+        siguiente = next(duplicados, None)
+        for numero, encuesta in enumerate(leer_derrame(ruta_filas)):
+            if numero == siguiente:
+                siguiente = next(duplicados, None)
+                continue
+            yield encuesta
+
+def reportar_dedup_externa(contador):
+    """Imprime el resumen de la deduplicación externa"""
+    tasa = 100 * (contador['candidatas'] - contador['duplicadas']) / contador['candidatas'] \
+        if contador['candidatas'] else 0
+    print(f"   - Deduplicación externa: {contador['filas']:,} filas, {contador['candidatas']:,} candidatas del "
+          f"filtro de Bloom ({tasa:.1f} % falsos positivos), {contador['duplicadas']:,} duplicadas")
+    print(f"     {contador['particiones_leidas']} particiones deduplicadas, {contador['subdivisiones']} "
+          f"subdivididas, {contador['bytes_derrame'] / 1e6:.1f} MB escritos en disco")
@@ -0,0 +1,153 @@
+"""
+Cachés de dimensiones para la carga de encuestas.
+
+La tabla de hechos (encuestas) guarda solo las llaves enteras; los textos de estado y
+cuestionario van en dimension_estados y dimension_cuestionarios. Mientras se procesan
+las encuestas se mantiene en memoria:
+
+- estados y cuestionarios: id -> texto. Un id nuevo se inserta en su dimensión la
+  primera vez que aparece; si luego llega con otro texto, gana el primero y se reporta.
+  Si el id falta o no es numérico (en ambos motores de limpieza queda en None), el texto
+  no tiene dónde guardarse: la encuesta se inserta sin él y los textos descartados se
+  cuentan y se reportan al final de la carga.
+- calificaciones: ids de dimension_calificaciones (se cargan antes que las encuestas).
+- usuarios: un LRU acotado sobre la consulta de existencia en usuarios, para no
+  mantener todos los ids en memoria cuando la tabla es grande.
+
+Las encuestas con un usuario o una calificación desconocidos no se insertan: se
+acumulan y se reportan juntas al final, en vez de fallar por llave foránea.
+"""
+
+from functools import lru_cache
+
+from almacenamiento import adaptar
+
+# Máximo de usuario_id recordados por el LRU de usuarios
+CAPACIDAD_CACHE_USUARIOS = 100000
+
+# Ejemplos de llaves desconocidas que se muestran en el reporte
+EJEMPLOS_REPORTE = 10
+
+# Posiciones en la tupla preparada (ancha) de las columnas que pasan a las dimensiones
+POS_ID_ESTADO = 0
+POS_ESTADO = 1
+POS_ID_CUESTIONARIO = 2
+POS_DESCRIPCION_CUESTIONARIO = 3
+POS_ID_CALIFICACION = 4
+POS_USUARIO_ID = 11
+
+def nuevo_cache_dimensiones(conn, capacidad_usuarios=CAPACIDAD_CACHE_USUARIOS, backend='sqlite'):
+    """Arma las cachés a partir de lo que ya hay en las tablas de dimensiones
+
+    backend indica el dialecto de las consultas (ver almacenamiento.py).
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT id_estado_encuesta, estado FROM dimension_estados")
+    estados = dict(cursor.fetchall())
+    cursor.execute("SELECT id_cuestionario, descripcion FROM dimension_cuestionarios")
+    cuestionarios = dict(cursor.fetchall())
+    cursor.execute("SELECT id_calificacion FROM dimension_calificaciones")
+    calificaciones = {row[0] for row in cursor.fetchall()}
+
+    consulta_usuario = adaptar(backend, "SELECT 1 FROM usuarios WHERE id_usuario = ?")
+
+    @lru_cache(maxsize=capacidad_usuarios)
+    def existe_usuario(usuario_id):
+        cursor_usuarios = conn.cursor()
+        cursor_usuarios.execute(consulta_usuario, (usuario_id,))
+        return cursor_usuarios.fetchone() is not None
+
+    return {
+        'cursor': cursor,
+        'insertar_dimension': ("INSERT OR IGNORE INTO {tabla} ({columnas}) VALUES (?, ?)" if backend == 'sqlite'
+                               else "INSERT INTO {tabla} ({columnas}) VALUES (%s, %s) ON CONFLICT DO NOTHING"),
+        'estados': estados,
+        'cuestionarios': cuestionarios,
+        'calificaciones': calificaciones,
+        'existe_usuario': existe_usuario,
+        'usuarios_desconocidos': {},
+        'calificaciones_desconocidas': {},
+        'textos_distintos': {},
+        'textos_sin_id': {},
+        'filas_rechazadas': 0,
+    }
+
+def registrar_valor(cache, tabla, columnas, valores, clave, texto):
+    """Registra un id de dimensión: lo inserta si es nuevo y anota si llega con otro texto"""
+    if clave is None:
+        if texto:
+            contar_desconocida(cache['textos_sin_id'], (tabla, texto))
+        return
+    conocido = valores.get(clave)
+    if conocido is None:
+        valores[clave] = texto
+        cache['cursor'].execute(cache['insertar_dimension'].format(tabla=tabla, columnas=columnas), (clave, texto))
+    elif conocido != texto:
+        distintos = cache['textos_distintos'].setdefault((tabla, clave), set())
+        distintos.add(texto)
+
+def contar_desconocida(desconocidas, clave):
+    """Suma una aparición de una llave desconocida"""
+    desconocidas[clave] = desconocidas.get(clave, 0) + 1
+
+def a_fila_de_hechos(encuesta):
+    """Quita de la tupla preparada los textos que viven en las dimensiones"""
+    return (encuesta[POS_ID_ESTADO],) + encuesta[POS_ID_CUESTIONARIO:POS_DESCRIPCION_CUESTIONARIO] \
+        + encuesta[POS_ID_CALIFICACION:]
+
+def resolver_dimensiones(encuestas, cache):
+    """Etapa del proceso escritor: alimenta las dimensiones y deja solo llaves enteras
+
+    Recibe tuplas preparadas (con estado y descripción de cuestionario) y genera las
+    tuplas de INSERT_ENCUESTA. Descarta, contando, las encuestas con llaves desconocidas.
+    """
+    existe_usuario = cache['existe_usuario']
+    calificaciones = cache['calificaciones']
+    for encuesta in encuestas:
+        id_calificacion = encuesta[POS_ID_CALIFICACION]
+        usuario_id = encuesta[POS_USUARIO_ID]
+        valida = True
+        if id_calificacion is not None and id_calificacion not in calificaciones:
+            contar_desconocida(cache['calificaciones_desconocidas'], id_calificacion)
+            valida = False
+        if not existe_usuario(usuario_id):
+            contar_desconocida(cache['usuarios_desconocidos'], usuario_id)
+            valida = False
+        if not valida:
+            cache['filas_rechazadas'] += 1
+            continue
+
+        registrar_valor(cache, 'dimension_estados', 'id_estado_encuesta, estado', cache['estados'],
+                        encuesta[POS_ID_ESTADO], encuesta[POS_ESTADO])
+        registrar_valor(cache, 'dimension_cuestionarios', 'id_cuestionario, descripcion', cache['cuestionarios'],
+                        encuesta[POS_ID_CUESTIONARIO], encuesta[POS_DESCRIPCION_CUESTIONARIO])
+        yield a_fila_de_hechos(encuesta)
+
+def reportar_dimensiones(cache):
+    """Imprime el estado de las cachés y las llaves desconocidas encontradas en la carga"""
+    info = cache['existe_usuario'].cache_info()
+    consultas = info.hits + info.misses
+    tasa = 100 * info.hits / consultas if consultas else 0
+    print(f"   - Dimensiones: {len(cache['estados'])} estados, {len(cache['cuestionarios'])} cuestionarios; "
+          f"caché de usuarios {info.currsize:,}/{info.maxsize:,} ({tasa:.1f} % aciertos)")
+
+    if cache['filas_rechazadas']:
+        print(f"   - Encuestas omitidas por llaves desconocidas: {cache['filas_rechazadas']}")
+    for nombre, desconocidas in [('usuario_id', cache['usuarios_desconocidos']),
+                                 ('id_calificacion', cache['calificaciones_desconocidas'])]:
+        if desconocidas:
+            frecuentes = sorted(desconocidas.items(), key=lambda item: -item[1])[:EJEMPLOS_REPORTE]
+            ejemplos = ', '.join(f"{clave} ({cantidad})" for clave, cantidad in frecuentes)
+            print(f"     {nombre} desconocidos: {len(desconocidas)} distintos; ej.: {ejemplos}")
+    if cache['textos_sin_id']:
+        por_tabla = {}
+        for (tabla, texto), cantidad in cache['textos_sin_id'].items():
+            por_tabla.setdefault(tabla, []).append((texto, cantidad))
+        for tabla, textos in por_tabla.items():
+            frecuentes = sorted(textos, key=lambda item: -item[1])[:EJEMPLOS_REPORTE]
+            ejemplos = ', '.join(f"{texto!r} ({cantidad})" for texto, cantidad in frecuentes)
+            print(f"   - {tabla}: {sum(cantidad for _, cantidad in textos)} encuestas sin id válido traían texto "
+                  f"y se cargaron sin él; ej.: {ejemplos}")
+    for (tabla, clave), textos in cache['textos_distintos'].items():
+        print(f"   - {tabla}: el id {clave} también llegó como {', '.join(map(repr, sorted(textos)))}; "
+              f"se conserva el primer texto")
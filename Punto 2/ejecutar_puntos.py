@@ -0,0 +1,215 @@
+"""
+Punto de entrada único para el programador de tareas: carga (Punto 2), tabla unificada
+(Punto 3) y diccionario de datos (Punto 4) en un solo proceso.
+
+Uso (desde la carpeta con los CSV):
+    python ejecutar_puntos.py todo --modo lotes --perfil masivo
+    python ejecutar_puntos.py unificar --desde 2025-06-01 --hasta 2025-09-01
+    python ejecutar_puntos.py diccionario
+    python ejecutar_puntos.py arranque --repeticiones 10
+
+Los subcomandos también aceptan los nombres en inglés (load, unify, dictionary, all, startup).
+
+Las etapas comparten una sola conexión SQLite: el esquema se lee una vez y la caché de
+sentencias preparadas del módulo sqlite3, que es por conexión, se reutiliza de una etapa
+a la siguiente. Los scripts de cada Punto se importan solo si su etapa se ejecuta, y los
+módulos pesados y opcionales (multiprocessing del modo paralelo, ctypes de la
+instrumentación, el exportador columnar) se importan dentro de las funciones que los usan.
+
+Cada ejecución informa su tiempo de arranque (imports, argumentos y conexión, hasta la
+primera etapa). El subcomando 'arranque' mide el arranque en frío completo, intérprete
+incluido, lanzando el proceso varias veces; termina con código 1 si la mediana supera el
+presupuesto.
+"""
+
+import time
+
+INICIO = time.perf_counter()
+
+import argparse
+import os
+import sqlite3
+import sys
+
+from almacenamiento import configuracion_bd, ruta_sqlite
+from instrumentacion import (
+    agregar_argumentos as agregar_argumentos_instrumentacion, iniciar_desde_argumentos,
+    finalizar_desde_argumentos, etapa
+)
+from perfiles_sqlite import aplicar_perfil_masivo
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'Punto 3'))
+sys.path.insert(0, os.path.join(RAIZ, 'Punto 4'))
+
+# Presupuesto del arranque en frío (intérprete, imports y conexión) en milisegundos
+PRESUPUESTO_ARRANQUE_MS = 150
+
+# Veces que el subcomando 'arranque' lanza el proceso
+REPETICIONES_ARRANQUE = 7
+
+def argumentos_carga(parser):
+    from cargar_datos_simplificado import agregar_argumentos_carga
+    agregar_argumentos_carga(parser)
+
+def argumentos_unificar(parser):
+    from ejecutar_punto3 import agregar_argumentos_punto3
+    agregar_argumentos_punto3(parser)
+
+def argumentos_diccionario(parser):
+    from punto4_diccionario_datos import agregar_argumentos_punto4
+    agregar_argumentos_punto4(parser)
+
+def argumentos_todo(parser):
+    # --archivos-mensuales lo definen las tres etapas; el parser se queda con una sola opción
+    argumentos_carga(parser)
+    argumentos_unificar(parser)
+    argumentos_diccionario(parser)
+
+def argumentos_arranque(parser):
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES_ARRANQUE,
+                        help=f"Veces que se lanza el proceso (por defecto {REPETICIONES_ARRANQUE})")
+    parser.add_argument('--interno', action='store_true', help=argparse.SUPPRESS)
+
+def etapa_cargar(conn, args):
+    """Punto 2: carga de los CSV (con otro backend, la carga por COPY de cargar_con_configuracion)"""
+    from cargar_datos_simplificado import ejecutar_carga, cargar_con_configuracion
+    if conn is None:
+        cargar_con_configuracion(args, configuracion_bd())
+        return True
+    conn.row_factory = None
+    ejecutar_carga(conn, args)
+    return True
+
+def etapa_unificar(conn, args):
+    """Punto 3: particiones mensuales y vista de la ventana pedida"""
+    from ejecutar_punto3 import ejecutar_punto3
+    if conn is not None:
+        conn.row_factory = sqlite3.Row
+    return ejecutar_punto3(args.desde, args.hasta, args.tabla, args.reconstruir, args.exportar, conn=conn,
+                           directorio_mensual=args.archivos_mensuales)
+
+def etapa_diccionario(conn, args):
+    """Punto 4: diccionario de datos de la tabla unificada"""
+    from punto4_diccionario_datos import crear_diccionario_datos
+    if conn is not None:
+        conn.row_factory = sqlite3.Row
+    return crear_diccionario_datos(conn, directorio_mensual=args.archivos_mensuales) is not None
+
+# Subcomando: (alias en inglés, ayuda, argumentos, etapas)
+COMANDOS = {
+    'cargar': ('load', "Carga los CSV (Punto 2)", argumentos_carga, [('cargar', etapa_cargar)]),
+    'unificar': ('unify', "Construye la tabla unificada (Punto 3)", argumentos_unificar,
+                 [('unificar', etapa_unificar)]),
+    'diccionario': ('dictionary', "Genera el diccionario de datos (Punto 4)", argumentos_diccionario,
+                    [('diccionario', etapa_diccionario)]),
+    'todo': ('all', "Carga, tabla unificada y diccionario con una sola conexión", argumentos_todo,
+             [('cargar', etapa_cargar), ('unificar', etapa_unificar), ('diccionario', etapa_diccionario)]),
+    'arranque': ('startup', "Mide el arranque en frío contra el presupuesto", argumentos_arranque, []),
+}
+
+ALIAS = {alias: nombre for nombre, (alias, *_) in COMANDOS.items()}
+
+def parsear_argumentos(argv=None):
+    """Lee el subcomando y sus opciones
+
+    Solo se importan los scripts del subcomando pedido para armar sus opciones.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(description="Ejecuta los Puntos 2, 3 y 4 con una sola conexión")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    for nombre, (alias, ayuda, agregar, _) in COMANDOS.items():
+        subparser = subparsers.add_parser(nombre, aliases=[alias], help=ayuda, conflict_handler='resolve')
+        if agregar is not None and (nombre in argv or alias in argv):
+            agregar(subparser)
+        subparser.add_argument('--presupuesto-arranque-ms', type=float, default=PRESUPUESTO_ARRANQUE_MS,
+                               help=f"Presupuesto del arranque (por defecto {PRESUPUESTO_ARRANQUE_MS} ms)")
+        agregar_argumentos_instrumentacion(subparser, f"reporte_{nombre}.json")
+    args = parser.parse_args(argv)
+    args.comando = ALIAS.get(args.comando, args.comando)
+    return args
+
+def abrir_conexion(perfil='seguro'):
+    """Conexión SQLite compartida por las etapas, con el perfil de la carga (ver perfiles_sqlite.py)"""
+    conn = sqlite3.connect(ruta_sqlite())
+    if perfil == 'masivo':
+        aplicar_perfil_masivo(conn)
+    else:
+        conn.execute('PRAGMA foreign_keys = ON;')
+    return conn
+
+def medir_arranque(repeticiones, presupuesto_ms):
+    """Lanza el arranque completo varias veces y compara la mediana con el presupuesto
+
+    Cada repetición es un proceso nuevo que importa los scripts de las tres etapas, abre la
+    conexión y termina. Devuelve True si la mediana queda dentro del presupuesto.
+    """
+    import subprocess
+    comando = [sys.executable, os.path.abspath(__file__), 'arranque', '--interno']
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run(comando, check=True)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    mediana = tiempos[len(tiempos) // 2]
+    print(f"Arranque en frío ({repeticiones} procesos): mínimo {tiempos[0]:.0f} ms, mediana {mediana:.0f} ms, "
+          f"máximo {tiempos[-1]:.0f} ms (presupuesto {presupuesto_ms:.0f} ms)")
+    if mediana > presupuesto_ms:
+        print("Error: el arranque supera el presupuesto")
+        return False
+    return True
+
+def ejecutar_etapas(etapas, args):
+    """Ejecuta las etapas en orden con una conexión compartida; se detiene en la primera que falla"""
+    conn = abrir_conexion(getattr(args, 'perfil', 'seguro')) if configuracion_bd()['backend'] == 'sqlite' else None
+
+    arranque_ms = (time.perf_counter() - INICIO) * 1000
+    print(f"Arranque: {arranque_ms:.0f} ms (imports, argumentos y conexión; "
+          f"presupuesto {args.presupuesto_arranque_ms:.0f} ms)")
+    if arranque_ms > args.presupuesto_arranque_ms:
+        print("   - Aviso: el arranque supera el presupuesto")
+
+    try:
+        for nombre, funcion in etapas:
+            print(f"\n{'=' * 60}\nETAPA: {nombre}\n{'=' * 60}")
+            inicio = time.perf_counter()
+            try:
+                with etapa(nombre):
+                    correcta = funcion(conn, args)
+            except Exception as e:
+                print(f"Error en la etapa {nombre}: {str(e)}")
+                import traceback
+                traceback.print_exc()
+                correcta = False
+            print(f"Etapa {nombre}: {time.perf_counter() - inicio:.2f} s")
+            if not correcta:
+                print(f"Se detiene la ejecución: la etapa {nombre} no terminó")
+                return False
+        return True
+    finally:
+        if conn is not None:
+            conn.close()
+
+def main():
+    """Ejecuta el subcomando pedido y termina con código 1 si alguna etapa falla"""
+    args = parsear_argumentos()
+
+    if args.comando == 'arranque':
+        if args.interno:
+            # Lo mismo que cargan 'todo' y sus etapas antes de empezar a trabajar
+            import cargar_datos_simplificado, ejecutar_punto3, punto4_diccionario_datos
+            if configuracion_bd()['backend'] == 'sqlite':
+                abrir_conexion().close()
+            return
+        sys.exit(0 if medir_arranque(args.repeticiones, args.presupuesto_arranque_ms) else 1)
+
+    iniciar_desde_argumentos(args, f"ejecutar_puntos_{args.comando}")
+    try:
+        correcta = ejecutar_etapas(COMANDOS[args.comando][3], args)
+    finally:
+        finalizar_desde_argumentos(args)
+    sys.exit(0 if correcta else 1)
+
+if __name__ == "__main__":
+    main()
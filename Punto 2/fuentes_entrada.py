@@ -0,0 +1,182 @@
+"""
+Fuentes de entrada del cargador: archivos sueltos, patrones glob y directorios de CSV
+planos o comprimidos (gzip, zstd).
+
+Cada fuente (--encuestas, --usuarios, --calificaciones) se indica como texto:
+
+    encuestas.csv                         un archivo
+    exportes/encuestas_2025-*.csv.gz      un patrón glob
+    exportes/                             los CSV del directorio (.csv, .csv.gz, .csv.zst)
+
+Los archivos se leen en orden de nombre (los exportes diarios llevan la fecha en el
+nombre) y cada uno con su propio encabezado. Los comprimidos se descomprimen al vuelo,
+sin escribir el CSV descomprimido en disco: un hilo lector lee y descomprime bloques y
+los deja en una cola acotada, y el hilo que llama decodifica y parsea. zlib y zstd
+liberan el GIL mientras descomprimen, así la descompresión se solapa con el parseo, y la
+cola acotada limita la memoria si el parseo va más lento. Al terminar cada archivo se
+informan sus filas, los MB leídos y descomprimidos, el rendimiento y cuánto esperó el
+parseo a la descompresión.
+
+Un único CSV plano se sigue leyendo directo, sin hilo. zstandard se importa solo si hay
+archivos .zst.
+"""
+
+import codecs
+import csv
+import glob
+import os
+import queue
+import threading
+import time
+
+# Extensiones que se toman de un directorio
+EXTENSIONES = ['.csv', '.csv.gz', '.csv.zst']
+
+# Bytes descomprimidos por bloque y bloques en vuelo entre el hilo lector y el parseo
+TAMANO_BLOQUE = 1024 * 1024
+TAMANO_COLA = 8
+
+def resolver_fuente(fuente):
+    """Lista ordenada de archivos de una fuente (archivo, patrón glob o directorio)"""
+    if os.path.isdir(fuente):
+        rutas = [ruta for extension in EXTENSIONES for ruta in glob.glob(os.path.join(fuente, f"*{extension}"))]
+    elif glob.escape(fuente) != fuente:
+        rutas = glob.glob(fuente)
+    else:
+        return [fuente]
+    if not rutas:
+        raise FileNotFoundError(f"No hay archivos CSV en '{fuente}'")
+    return sorted(rutas)
+
+def compresion(ruta):
+    """'gzip', 'zstd' o None según la extensión del archivo"""
+    if ruta.endswith('.gz'):
+        return 'gzip'
+    if ruta.endswith('.zst'):
+        return 'zstd'
+    return None
+
+def archivo_plano_unico(rutas):
+    return len(rutas) == 1 and compresion(rutas[0]) is None
+
+def abrir_descomprimido(crudo, ruta):
+    """Lector binario que descomprime el archivo crudo ya abierto"""
+    tipo = compresion(ruta)
+    if tipo == 'gzip':
+        import gzip
+        return gzip.GzipFile(fileobj=crudo, mode='rb')
+    if tipo == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError(f"Para leer {ruta} hay que instalar zstandard (pip install zstandard)") from None
+        return zstandard.ZstdDecompressor().stream_reader(crudo)
+    return crudo
+
+def poner(cola, detener, mensaje):
+    """Deja un mensaje en la cola salvo que el consumidor haya dejado de leer"""
+    while not detener.is_set():
+        try:
+            cola.put(mensaje, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def leer_bloques(rutas, cola, detener, tamano_bloque=TAMANO_BLOQUE):
+    """Hilo lector: ('inicio', ruta), ('bloque', bytes)..., ('fin', bytes_leidos) por archivo"""
+    try:
+        for ruta in rutas:
+            if not poner(cola, detener, ('inicio', ruta)):
+                return
+            with open(ruta, 'rb') as crudo, abrir_descomprimido(crudo, ruta) as archivo:
+                while True:
+                    bloque = archivo.read(tamano_bloque)
+                    if not bloque:
+                        break
+                    if not poner(cola, detener, ('bloque', bloque)):
+                        return
+                leidos = crudo.tell()
+            if not poner(cola, detener, ('fin', leidos)):
+                return
+        poner(cola, detener, ('terminado',))
+    except Exception as e:
+        poner(cola, detener, ('error', e))
+
+def recibir(cola, progreso):
+    """Siguiente mensaje del hilo lector, sumando el tiempo de espera al progreso del archivo"""
+    inicio = time.perf_counter()
+    mensaje = cola.get()
+    if progreso is not None:
+        progreso['espera'] += time.perf_counter() - inicio
+    if mensaje[0] == 'error':
+        raise mensaje[1]
+    return mensaje
+
+def lineas_del_archivo(cola, encoding, progreso):
+    """Líneas de texto (con su salto de línea) de los bloques de un archivo hasta su 'fin'"""
+    decodificador = codecs.getincrementaldecoder(encoding)()
+    resto = ''
+    while True:
+        mensaje = recibir(cola, progreso)
+        if mensaje[0] == 'fin':
+            progreso['bytes_leidos'] = mensaje[1]
+            resto += decodificador.decode(b'', final=True)
+            if resto:
+                yield resto
+            return
+        progreso['bytes_descomprimidos'] += len(mensaje[1])
+        lineas = (resto + decodificador.decode(mensaje[1])).split('\n')
+        resto = lineas.pop()
+        for linea in lineas:
+            yield linea + '\n'
+
+def reportar_archivo(progreso, numero, total):
+    """Imprime filas, tamaños y rendimiento de un archivo ya leído"""
+    segundos = time.perf_counter() - progreso['inicio']
+    descomprimidos = progreso['bytes_descomprimidos'] / 1e6
+    print(f"   - [{numero}/{total}] {os.path.basename(progreso['ruta'])}: {progreso['filas']:,} filas, "
+          f"{progreso['bytes_leidos'] / 1e6:.1f} MB leídos -> {descomprimidos:.1f} MB "
+          f"({descomprimidos / segundos if segundos > 0 else 0:.1f} MB/s, "
+          f"{progreso['filas'] / segundos if segundos > 0 else 0:,.0f} filas/s; "
+          f"esperando descompresión {progreso['espera']:.2f} s)")
+
+def archivos_de_fuente(fuente, encoding='utf-8-sig', tamano_cola=TAMANO_COLA):
+    """Genera (ruta, lineas, progreso) por cada archivo de la fuente, en orden
+
+    lineas es un iterable de líneas de texto para csv.reader; quien lo consume suma las
+    filas en progreso['filas']. Los archivos comprimidos o múltiples pasan por el hilo
+    lector; un único CSV plano se abre directo y progreso es None.
+    """
+    rutas = resolver_fuente(fuente)
+    if archivo_plano_unico(rutas):
+        with open(rutas[0], 'r', encoding=encoding) as file:
+            yield rutas[0], file, None
+        return
+
+    cola = queue.Queue(maxsize=tamano_cola)
+    detener = threading.Event()
+    hilo = threading.Thread(target=leer_bloques, args=(rutas, cola, detener), name='lector_csv', daemon=True)
+    hilo.start()
+    try:
+        for numero in range(1, len(rutas) + 1):
+            mensaje = recibir(cola, None)
+            progreso = {'ruta': mensaje[1], 'inicio': time.perf_counter(), 'filas': 0, 'bytes_leidos': 0,
+                        'bytes_descomprimidos': 0, 'espera': 0.0}
+            lineas = lineas_del_archivo(cola, encoding, progreso)
+            yield progreso['ruta'], lineas, progreso
+            # Si quien consume no llegó al final del archivo, se descarta el resto de sus bloques
+            for _ in lineas:
+                pass
+            reportar_archivo(progreso, numero, len(rutas))
+    finally:
+        detener.set()
+        hilo.join()
+
+def leer_fuente(fuente, encoding='utf-8-sig', delimitador=';'):
+    """Lee todas las filas de una fuente como diccionarios (encabezado propio por archivo)"""
+    for _, lineas, progreso in archivos_de_fuente(fuente, encoding):
+        for row in csv.DictReader(lineas, delimiter=delimitador):
+            if progreso is not None:
+                progreso['filas'] += 1
+            yield row
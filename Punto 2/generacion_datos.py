@@ -0,0 +1,56 @@
+"""
+Generación de la carga y versión de usuarios y dimensiones.
+
+Las marcas de agua de lo que se deriva de la base (particiones del Punto 3, archivos por
+mes, exportación columnar) se arman con conteos y máximos de id_encuesta. Hay dos cambios
+que esas marcas no ven:
+
+- una carga completa vuelve a crear encuestas con los mismos id_encuesta y conteos,
+  aunque las filas (calificaciones, usuarios) hayan cambiado;
+- editar un usuario o una calificación no cambia ninguna fila de encuestas, pero sí las
+  columnas que la tabla unificada toma de usuarios y dimension_calificaciones.
+
+control_generacion guarda un identificador de generación, nuevo en cada carga completa,
+y version_dimensiones, que sube cada vez que una carga modifica usuarios o
+dimension_calificaciones. Las marcas de agua derivadas incluyen ambos valores.
+"""
+
+import uuid
+
+def crear_tabla_generacion(conn):
+    """Crea la tabla de control si no existe"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS control_generacion (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generacion TEXT NOT NULL,
+            version_dimensiones INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+def nueva_generacion(conn):
+    """Registra una generación nueva (carga completa) sin confirmar la transacción"""
+    crear_tabla_generacion(conn)
+    generacion = uuid.uuid4().hex
+    conn.execute('''
+        INSERT INTO control_generacion (id, generacion, version_dimensiones) VALUES (1, ?, 0)
+        ON CONFLICT(id) DO UPDATE SET generacion = excluded.generacion, version_dimensiones = 0
+    ''', (generacion,))
+    return generacion
+
+def registrar_cambio_dimensiones(conn):
+    """Sube version_dimensiones (usuarios o calificaciones cambiaron) sin confirmar la transacción"""
+    crear_tabla_generacion(conn)
+    conn.execute('''
+        INSERT INTO control_generacion (id, generacion, version_dimensiones) VALUES (1, ?, 1)
+        ON CONFLICT(id) DO UPDATE SET version_dimensiones = version_dimensiones + 1
+    ''', (uuid.uuid4().hex,))
+
+def generacion_actual(conn):
+    """(generacion, version_dimensiones); ('', 0) en bases cargadas antes de este control"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'control_generacion'")
+    if not cursor.fetchone():
+        return ('', 0)
+    cursor.execute("SELECT generacion, version_dimensiones FROM control_generacion WHERE id = 1")
+    fila = cursor.fetchone()
+    return tuple(fila) if fila else ('', 0)
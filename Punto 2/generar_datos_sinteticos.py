@@ -0,0 +1,172 @@
+"""
+Generador de datos sintéticos de usuarios y encuestas.
+
+Escribe usuarios.csv y encuestas.csv con el mismo formato que los archivos reales
+(UTF-8 con BOM, separados por ';') para medir la carga a distintos tamaños, desde
+miles hasta cientos de millones de filas. Las filas se escriben a medida que se
+generan, así la memoria no depende de la cantidad de encuestas.
+
+Se puede ajustar:
+- la proporción de encuestas duplicadas (se repite una fila reciente tal cual),
+- la proporción de 'NULL' en Calificacion y de usuario_id vacío,
+- el sesgo de encuestas por usuario (exponente Zipf; 0 = uniforme).
+
+Uso:
+    python generar_datos_sinteticos.py --filas 1000000 --usuarios 50000 --sesgo 1.1
+"""
+
+import argparse
+import os
+import random
+import time
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+
+ENCABEZADO_USUARIOS = 'nombre;telefono;email;id_usuario'
+ENCABEZADO_ENCUESTAS = ('IdEstadoEncuesta;Estado;IdCuestionario;DescripcionCuestionario;Calificacion;'
+                        'FechaLimite;FechaCreado;HoraCreado;FechaModificado;HoraModificado;'
+                        'Fecha_Insercion;usuario_id')
+
+ESTADOS = [(1, 'Pendiente'), (2, 'Contestada')]
+CUESTIONARIOS = [(1, 'Atencion'), (2, 'Agilidad'), (3, 'Recomendacion')]
+
+# Filas recientes entre las que se eligen los duplicados
+VENTANA_DUPLICADOS = 10000
+
+# Filas que se arman y escriben juntas
+TAMANO_BLOQUE = 10000
+
+def escribir_usuarios(ruta, cantidad, aleatorio):
+    """Escribe usuarios.csv con ids 1..cantidad; algunos sin teléfono"""
+    with open(ruta, 'w', encoding='utf-8-sig', newline='') as file:
+        file.write(ENCABEZADO_USUARIOS + '\n')
+        for inicio in range(1, cantidad + 1, TAMANO_BLOQUE):
+            lineas = []
+            for id_usuario in range(inicio, min(inicio + TAMANO_BLOQUE, cantidad + 1)):
+                telefono = '' if aleatorio.random() < 0.02 else f"57300{id_usuario:07d}"
+                lineas.append(f"Usuario {id_usuario};{telefono};usuario{id_usuario}@example.org;{id_usuario}\n")
+            file.writelines(lineas)
+
+def selector_usuarios(cantidad, sesgo, aleatorio):
+    """Función que devuelve k usuario_id con distribución Zipf de exponente sesgo
+
+    Con sesgo 0 la distribución es uniforme. Los pesos acumulados y la permutación de ids
+    se guardan en arrays (8 bytes por usuario cada uno).
+    """
+    if sesgo <= 0:
+        return lambda k: [aleatorio.randint(1, cantidad) for _ in range(k)]
+    acumulados = array('d', accumulate(1 / (rango ** sesgo) for rango in range(1, cantidad + 1)))
+    total = acumulados[-1]
+    # Se baraja qué id recibe cada rango para que los usuarios frecuentes no sean los primeros ids
+    ids = array('q', range(1, cantidad + 1))
+    aleatorio.shuffle(ids)
+    return lambda k: [ids[min(bisect_left(acumulados, aleatorio.random() * total), cantidad - 1)]
+                      for _ in range(k)]
+
+def linea_encuesta(aleatorio, anio, usuario_id, tasa_nulos):
+    """Arma una línea nueva de encuestas.csv"""
+    id_estado, estado = aleatorio.choice(ESTADOS)
+    id_cuestionario, cuestionario = aleatorio.choice(CUESTIONARIOS)
+    calificacion = 'NULL' if aleatorio.random() < tasa_nulos else str(aleatorio.randint(1, 5))
+    mes, dia = aleatorio.randint(1, 12), aleatorio.randint(1, 28)
+    fecha = f"{anio}{mes:02d}{dia:02d}"
+    fecha_insercion = (f"{anio}-{mes:02d}-{dia:02d} {aleatorio.randint(0, 23):02d}:"
+                       f"{aleatorio.randint(0, 59):02d}:{aleatorio.randint(0, 59):02d}."
+                       f"{aleatorio.randint(0, 999):03d}")
+    return (f"{id_estado};{estado};{id_cuestionario};{cuestionario};{calificacion};"
+            f"{fecha};{fecha};10:00:00;{fecha};11:00:00;{fecha_insercion};{usuario_id}\n")
+
+def escribir_encuestas(ruta, cantidad, usuarios, tasa_duplicados, tasa_nulos, tasa_sin_usuario,
+                       sesgo, anio, aleatorio):
+    """Escribe encuestas.csv; devuelve la cantidad de líneas duplicadas a propósito"""
+    elegir_usuarios = selector_usuarios(usuarios, sesgo, aleatorio)
+    recientes = []
+    duplicadas = 0
+    with open(ruta, 'w', encoding='utf-8-sig', newline='') as file:
+        file.write(ENCABEZADO_ENCUESTAS + '\n')
+        for inicio in range(0, cantidad, TAMANO_BLOQUE):
+            tamano = min(TAMANO_BLOQUE, cantidad - inicio)
+            lineas = []
+            for usuario_id in elegir_usuarios(tamano):
+                if recientes and aleatorio.random() < tasa_duplicados:
+                    lineas.append(aleatorio.choice(recientes))
+                    duplicadas += 1
+                    continue
+                if aleatorio.random() < tasa_sin_usuario:
+                    usuario_id = aleatorio.choice(['', ' '])
+                linea = linea_encuesta(aleatorio, anio, usuario_id, tasa_nulos)
+                lineas.append(linea)
+                if len(recientes) < VENTANA_DUPLICADOS:
+                    recientes.append(linea)
+                else:
+                    recientes[aleatorio.randrange(VENTANA_DUPLICADOS)] = linea
+            file.writelines(lineas)
+    return duplicadas
+
+def generar_datos(directorio='.', filas=100000, usuarios=None, tasa_duplicados=0.1, tasa_nulos=0.15,
+                  tasa_sin_usuario=0.01, sesgo=1.0, anio=2025, semilla=42):
+    """Genera usuarios.csv y encuestas.csv en el directorio
+
+    Por defecto hay un usuario por cada 20 encuestas. Devuelve un diccionario con
+    los parámetros usados, las duplicadas generadas y el tiempo.
+    """
+    usuarios = usuarios or max(1, filas // 20)
+    aleatorio = random.Random(semilla)
+    os.makedirs(directorio, exist_ok=True)
+
+    inicio = time.perf_counter()
+    escribir_usuarios(os.path.join(directorio, 'usuarios.csv'), usuarios, aleatorio)
+    duplicadas = escribir_encuestas(os.path.join(directorio, 'encuestas.csv'), filas, usuarios,
+                                    tasa_duplicados, tasa_nulos, tasa_sin_usuario, sesgo, anio, aleatorio)
+    return {
+        'filas': filas,
+        'usuarios': usuarios,
+        'tasa_duplicados': tasa_duplicados,
+        'tasa_nulos': tasa_nulos,
+        'tasa_sin_usuario': tasa_sin_usuario,
+        'sesgo': sesgo,
+        'anio': anio,
+        'semilla': semilla,
+        'duplicadas_generadas': duplicadas,
+        'segundos': time.perf_counter() - inicio
+    }
+
+def agregar_argumentos(parser):
+    """Argumentos del generador (los comparte el benchmark de carga)"""
+    parser.add_argument('--filas', type=int, default=100000, help="Cantidad de encuestas")
+    parser.add_argument('--usuarios', type=int, default=None, help="Cantidad de usuarios (por defecto filas/20)")
+    parser.add_argument('--duplicados', type=float, default=0.1, help="Proporción de encuestas duplicadas")
+    parser.add_argument('--nulos', type=float, default=0.15, help="Proporción de 'NULL' en Calificacion")
+    parser.add_argument('--sin-usuario', type=float, default=0.01, help="Proporción de usuario_id vacío")
+    parser.add_argument('--sesgo', type=float, default=1.0, help="Exponente Zipf de encuestas por usuario (0 = uniforme)")
+    parser.add_argument('--anio', type=int, default=2025, help="Año de las fechas generadas")
+    parser.add_argument('--semilla', type=int, default=42)
+
+def parametros_generador(args):
+    """Traduce los argumentos de línea de comandos a parámetros de generar_datos"""
+    return {
+        'filas': args.filas,
+        'usuarios': args.usuarios,
+        'tasa_duplicados': args.duplicados,
+        'tasa_nulos': args.nulos,
+        'tasa_sin_usuario': args.sin_usuario,
+        'sesgo': args.sesgo,
+        'anio': args.anio,
+        'semilla': args.semilla
+    }
+
+def main():
+    """Genera los CSV en el directorio indicado"""
+    parser = argparse.ArgumentParser(description="Genera usuarios.csv y encuestas.csv sintéticos")
+    agregar_argumentos(parser)
+    parser.add_argument('--directorio', default='.', help="Dónde escribir los CSV")
+    args = parser.parse_args()
+
+    print(f"Generando {args.filas:,} encuestas sintéticas en {args.directorio}...")
+    resultado = generar_datos(args.directorio, **parametros_generador(args))
+    print(f"{resultado['usuarios']:,} usuarios y {resultado['filas']:,} encuestas "
+          f"({resultado['duplicadas_generadas']:,} duplicadas) en {resultado['segundos']:.1f} s")
+
+if __name__ == "__main__":
+    main()
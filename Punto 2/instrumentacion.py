@@ -0,0 +1,263 @@
+"""
+Instrumentación por etapas compartida por el cargador (Punto 2), ejecutar_punto3 y el
+diccionario de datos (Punto 4).
+
+Mientras no se llame a iniciar(), todo está apagado: etapa() no mide nada y
+medir_iterable() devuelve el mismo iterable, así el costo es prácticamente nulo.
+Con la instrumentación encendida se registra por etapa:
+
+- tiempo de reloj y de CPU, cantidad de llamadas y filas (filas por segundo),
+- el pico de memoria del proceso al cerrar la etapa.
+
+El módulo sqlite3 no expone sqlite3_db_status, así que el reporte no incluye
+estadísticas de la caché de páginas de SQLite.
+
+Las etapas se anidan ('encuestas/insercion') y el tiempo de una etapa incluye el de
+sus hijas. Las etapas de un pipeline de generadores (medir_iterable) miden solo el
+tiempo propio de cada etapa y no registran CPU, para no agregar una llamada al sistema
+por fila. En el modo paralelo solo se mide el proceso escritor.
+
+Al final, finalizar() escribe un reporte JSON de la ejecución. Con --profile además
+corre un perfilador por muestreo (un hilo que mira la pila del hilo principal cada
+pocos milisegundos) y agrega al reporte las funciones más frecuentes.
+
+threading (para el perfilador) se importa solo al encender la instrumentación, para no
+sumarlo al arranque de los scripts que no la usan.
+"""
+
+import json
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows no tiene el módulo resource
+    resource = None
+
+# Intervalo del perfilador por muestreo y funciones que se reportan
+INTERVALO_MUESTREO = 0.005
+FUNCIONES_REPORTADAS = 25
+
+# Ejecución activa; None = instrumentación apagada
+_ejecucion = None
+
+def agregar_argumentos(parser, reporte_por_defecto):
+    """Agrega --reporte y --profile a un parser de argparse"""
+    parser.add_argument('--reporte', nargs='?', const=reporte_por_defecto, default=None, metavar='RUTA',
+                        help=f"Mide las etapas y escribe un reporte JSON (por defecto {reporte_por_defecto})")
+    parser.add_argument('--profile', action='store_true',
+                        help="Perfilador por muestreo de funciones (implica --reporte)")
+    parser.set_defaults(reporte_por_defecto=reporte_por_defecto)
+
+def iniciar_desde_argumentos(args, script):
+    """Enciende la instrumentación si se pidió --reporte o --profile"""
+    if args.reporte or args.profile:
+        iniciar(script, perfilar=args.profile)
+
+def finalizar_desde_argumentos(args):
+    """Escribe el reporte pedido por línea de comandos (no hace nada si estaba apagada)"""
+    return finalizar(args.reporte or args.reporte_por_defecto)
+
+def memoria_pico_mb():
+    """Devuelve el pico de memoria residente (RSS) del proceso en MB, o None si no se puede medir"""
+    if resource is None:
+        return None
+    # En Linux ru_maxrss viene en KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def iniciar(script, perfilar=False):
+    """Enciende la instrumentación para esta ejecución"""
+    global _ejecucion
+    _ejecucion = {
+        'script': script,
+        'fecha': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'inicio': time.perf_counter(),
+        'inicio_cpu': time.process_time(),
+        'etapas': {},
+        'pila': [],
+        'pila_iterables': [],
+        'segundos_iterables': 0.0,
+        'perfilador': _iniciar_perfilador() if perfilar else None,
+    }
+
+def activa():
+    """Indica si la instrumentación está encendida"""
+    return _ejecucion is not None
+
+def _registro(nombre):
+    """Registro acumulado de una etapa (se crea la primera vez)"""
+    registro = _ejecucion['etapas'].get(nombre)
+    if registro is None:
+        registro = _ejecucion['etapas'][nombre] = {
+            'llamadas': 0, 'segundos': 0.0, 'cpu_segundos': None, 'filas': 0,
+            'memoria_pico_mb': None
+        }
+    return registro
+
+def _nombre_completo(nombre):
+    return '/'.join(_ejecucion['pila'] + [nombre])
+
+@contextmanager
+def etapa(nombre, filas=None, sin_iterables=False):
+    """Mide un bloque de código como etapa
+
+    Entrega un diccionario en el que se puede fijar 'filas' al terminar el bloque.
+    Si se repite el nombre, las mediciones se acumulan. Con sin_iterables=True se
+    descuenta el tiempo de las etapas de medir_iterable que el bloque consume (por
+    ejemplo, el escritor de un pipeline) y no se registra CPU, que no se puede separar.
+    """
+    medicion = {'filas': filas}
+    if _ejecucion is None:
+        yield medicion
+        return
+
+    registro = _registro(_nombre_completo(nombre))
+    _ejecucion['pila'].append(nombre)
+    iterables_antes = _ejecucion['segundos_iterables']
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield medicion
+    finally:
+        segundos = time.perf_counter() - inicio
+        if sin_iterables:
+            registro['segundos'] += segundos - (_ejecucion['segundos_iterables'] - iterables_antes)
+        else:
+            registro['segundos'] += segundos
+            registro['cpu_segundos'] = (registro['cpu_segundos'] or 0.0) + time.process_time() - inicio_cpu
+        registro['llamadas'] += 1
+        registro['filas'] += medicion['filas'] or 0
+        registro['memoria_pico_mb'] = memoria_pico_mb()
+        _ejecucion['pila'].pop()
+
+def medir_iterable(nombre, iterable):
+    """Envuelve una etapa de un pipeline de generadores para medir su tiempo propio y sus filas
+
+    Con la instrumentación apagada devuelve el mismo iterable.
+    """
+    if _ejecucion is None:
+        return iterable
+    return _iterable_medido(_registro(_nombre_completo(nombre)), iter(iterable))
+
+def _iterable_medido(registro, iterador):
+    # pila_iterables acumula el tiempo de las etapas anteriores (anidadas dentro de este next);
+    # el de la etapa más externa va a segundos_iterables para descontarlo del consumidor
+    ejecucion = _ejecucion
+    pila = ejecucion['pila_iterables']
+    registro['llamadas'] += 1
+    while True:
+        pila.append(0.0)
+        inicio = time.perf_counter()
+        try:
+            fila = next(iterador)
+        except StopIteration:
+            return
+        finally:
+            transcurrido = time.perf_counter() - inicio
+            registro['segundos'] += transcurrido - pila.pop()
+            if pila:
+                pila[-1] += transcurrido
+            else:
+                ejecucion['segundos_iterables'] += transcurrido
+        registro['filas'] += 1
+        yield fila
+
+def _iniciar_perfilador():
+    """Arranca el hilo que toma muestras de la pila del hilo principal"""
+    import threading
+    estado = {'propias': Counter(), 'acumuladas': Counter(), 'muestras': 0, 'detener': threading.Event()}
+    id_principal = threading.main_thread().ident
+
+    def muestrear():
+        while not estado['detener'].wait(INTERVALO_MUESTREO):
+            marco = sys._current_frames().get(id_principal)
+            if marco is None:
+                continue
+            estado['muestras'] += 1
+            vistas = set()
+            propia = True
+            while marco is not None:
+                codigo = marco.f_code
+                funcion = f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+                if propia:
+                    estado['propias'][funcion] += 1
+                    propia = False
+                if funcion not in vistas:
+                    estado['acumuladas'][funcion] += 1
+                    vistas.add(funcion)
+                marco = marco.f_back
+
+    estado['hilo'] = threading.Thread(target=muestrear, name='perfilador', daemon=True)
+    estado['hilo'].start()
+    return estado
+
+def _detener_perfilador(estado):
+    """Detiene el muestreo y devuelve las funciones más frecuentes"""
+    estado['detener'].set()
+    estado['hilo'].join()
+    muestras = estado['muestras'] or 1
+    return {
+        'muestras': estado['muestras'],
+        'intervalo_segundos': INTERVALO_MUESTREO,
+        'funciones': [
+            {
+                'funcion': funcion,
+                'porcentaje_propio': round(100 * estado['propias'][funcion] / muestras, 1),
+                'porcentaje_acumulado': round(100 * acumuladas / muestras, 1),
+            }
+            for funcion, acumuladas in estado['acumuladas'].most_common()
+            if estado['propias'][funcion]
+        ][:FUNCIONES_REPORTADAS]
+    }
+
+def finalizar(ruta_reporte):
+    """Apaga la instrumentación, escribe el reporte JSON e imprime un resumen
+
+    Devuelve el reporte, o None si la instrumentación no estaba encendida.
+    """
+    global _ejecucion
+    if _ejecucion is None:
+        return None
+    ejecucion, _ejecucion = _ejecucion, None
+
+    perfil = _detener_perfilador(ejecucion['perfilador']) if ejecucion['perfilador'] else None
+    etapas = []
+    for nombre, registro in ejecucion['etapas'].items():
+        segundos = registro['segundos']
+        etapas.append(dict(
+            {'nombre': nombre},
+            **{clave: round(valor, 4) if isinstance(valor, float) else valor for clave, valor in registro.items()},
+            filas_por_segundo=round(registro['filas'] / segundos) if registro['filas'] and segundos > 0 else None
+        ))
+    reporte = {
+        'script': ejecucion['script'],
+        'fecha': ejecucion['fecha'],
+        'segundos_totales': round(time.perf_counter() - ejecucion['inicio'], 4),
+        'cpu_segundos': round(time.process_time() - ejecucion['inicio_cpu'], 4),
+        'memoria_pico_mb': memoria_pico_mb(),
+        'etapas': etapas,
+        'perfil': perfil,
+    }
+    with open(ruta_reporte, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, ensure_ascii=False, indent=2)
+    imprimir_reporte(reporte)
+    print(f"Reporte de ejecución guardado en {ruta_reporte}")
+    return reporte
+
+def imprimir_reporte(reporte):
+    """Tabla de etapas y, si hay perfil, las funciones más frecuentes"""
+    print(f"\nETAPAS ({reporte['script']}, {reporte['segundos_totales']:.2f} s, "
+          f"CPU {reporte['cpu_segundos']:.2f} s):")
+    print(f"   {'Etapa':<42}{'Segundos':>10}{'Filas':>12}{'Filas/seg':>12}")
+    for registro in reporte['etapas']:
+        filas_seg = f"{registro['filas_por_segundo']:,}" if registro['filas_por_segundo'] else '-'
+        print(f"   {registro['nombre'][:41]:<42}{registro['segundos']:>10.3f}{registro['filas']:>12,}"
+              f"{filas_seg:>12}")
+    if reporte['perfil']:
+        print(f"\nFUNCIONES MÁS FRECUENTES ({reporte['perfil']['muestras']} muestras):")
+        for funcion in reporte['perfil']['funciones'][:15]:
+            print(f"   {funcion['porcentaje_propio']:>5.1f} % propio {funcion['porcentaje_acumulado']:>5.1f} % "
+                  f"acumulado  {funcion['funcion']}")
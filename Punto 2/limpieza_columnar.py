@@ -0,0 +1,169 @@
+"""
+Motor de limpieza por columnas para encuestas.csv (--motor columnas).
+
+En vez de limpiar fila por fila (un diccionario por fila y tres limpiar_entero por
+fila), el CSV se lee en lotes de filas crudas que se transponen a columnas y cada
+columna se convierte de una sola vez:
+
+- las columnas numéricas se convierten por valor distinto: int() se llama una vez
+  por cada texto distinto del lote y el resto es una búsqueda en diccionario,
+- el filtro de usuario_id vacío es una máscara que se aplica a todas las columnas,
+- las claves de deduplicación se calculan sobre las columnas completas.
+
+Al final cada lote se vuelve a armar como tuplas preparadas (las mismas que produce
+preparar_encuesta), así que dimensiones, deduplicación y escritores no cambian. Un
+IdEstadoEncuesta no numérico queda en None con el texto de Estado al lado; dimensiones.py
+cuenta esos textos y los reporta al final de la carga. Las
+etapas de limpieza propias (etapas_limpieza) trabajan sobre diccionarios y por eso
+solo están disponibles en el motor por filas.
+
+comparar_motores_limpieza.py verifica que ambos motores produzcan exactamente las
+mismas filas.
+"""
+
+import csv
+import io
+from itertools import compress, islice
+
+from claves_dedup import ESTRATEGIAS, claves_md5
+from pipeline_carga import agrupar_en_lotes, texto_shard
+from fuentes_entrada import archivos_de_fuente
+
+MOTORES = ['filas', 'columnas']
+
+# Filas del CSV que se transponen y convierten juntas
+TAMANO_LOTE_COLUMNAS = 10000
+
+def entero_o_nulo(valor, nulo):
+    """Misma regla que limpiar_entero: vacío, nulo o no numérico -> None"""
+    if not valor or valor == nulo:
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        return None
+
+def convertir_por_distintos(valores, conversion):
+    """Aplica conversion a una columna llamándola una sola vez por valor distinto"""
+    mapa = {valor: conversion(valor) for valor in set(valores)}
+    return list(map(mapa.__getitem__, valores))
+
+def enteros(valores, nulo='NULL'):
+    """Columna de texto del CSV -> columna de int o None"""
+    return convertir_por_distintos(valores, lambda valor: entero_o_nulo(valor, nulo))
+
+def transponer(campos, filas):
+    """Filas crudas de csv.reader -> {campo: columna}
+
+    Replica a csv.DictReader: se saltan las líneas vacías, a una fila corta le faltan
+    valores (None) y los campos de más se ignoran.
+    """
+    ancho = len(campos)
+    if filas and set(map(len, filas)) != {ancho}:
+        filas = [(fila + [None] * ancho)[:ancho] for fila in filas if fila]
+    if not filas:
+        return {}, 0
+    return dict(zip(campos, zip(*filas))), len(filas)
+
+def preparar_lote_columnas(columnas, cantidad, estrategia_clave):
+    """Limpia un lote en columnas y devuelve la lista de tuplas preparadas
+
+    Equivale a encuesta_con_usuario + hashear_y_preparar_encuesta aplicados fila por fila.
+    """
+    def columna(nombre, defecto):
+        # row.get(nombre, defecto) sobre todo el lote
+        return columnas[nombre] if nombre in columnas else (defecto,) * cantidad
+
+    usuarios_crudos = columna('usuario_id', None)
+    mascara = convertir_por_distintos(usuarios_crudos, lambda valor: bool(valor and valor.strip()))
+    if not all(mascara):
+        columnas = {nombre: tuple(compress(valores, mascara)) for nombre, valores in columnas.items()}
+        cantidad = sum(mascara)
+        usuarios_crudos = columna('usuario_id', None)
+    if not cantidad:
+        return []
+
+    ids_estado = enteros(columna('IdEstadoEncuesta', None), nulo=None)
+    ids_cuestionario = enteros(columna('IdCuestionario', None))
+    ids_calificacion = enteros(columna('Calificacion', None))
+    usuarios = convertir_por_distintos(usuarios_crudos, int)
+    fechas_insercion = columna('Fecha_Insercion', '')
+
+    funcion = ESTRATEGIAS[estrategia_clave][1]
+    if funcion is None:
+        claves = claves_md5(columna('usuario_id', ''), columna('Fecha_Insercion', ''),
+                            columna('IdCuestionario', ''), columna('Calificacion', ''))
+    else:
+        claves = list(map(funcion, usuarios, fechas_insercion, ids_cuestionario, ids_calificacion))
+
+    return list(zip(
+        ids_estado,
+        columna('Estado', ''),
+        ids_cuestionario,
+        columna('DescripcionCuestionario', ''),
+        ids_calificacion,
+        columna('FechaLimite', ''),
+        columna('FechaCreado', ''),
+        columna('HoraCreado', ''),
+        columna('FechaModificado', ''),
+        columna('HoraModificado', ''),
+        fechas_insercion,
+        usuarios,
+        claves
+    ))
+
+def preparar_filas_crudas(campos, filas, estrategia_clave):
+    """Lote de filas de csv.reader -> (filas_leidas, tuplas preparadas)"""
+    columnas, cantidad = transponer(campos, filas)
+    return cantidad, preparar_lote_columnas(columnas, cantidad, estrategia_clave)
+
+def preparar_diccionarios(filas, estrategia_clave):
+    """Lote de diccionarios de csv.DictReader (carga incremental) -> tuplas preparadas"""
+    if not filas:
+        return []
+    campos = [campo for campo in filas[0] if campo is not None]
+    columnas = {campo: tuple(fila[campo] for fila in filas) for campo in campos}
+    return preparar_lote_columnas(columnas, len(filas), estrategia_clave)
+
+def preparar_lotes_crudos(lector, campos, estrategia_clave, contador, tamano_lote, limite=None):
+    """Limpia por columnas las filas de un csv.reader y genera las tuplas preparadas
+
+    Las líneas vacías no cuentan para el límite (csv.DictReader también las salta).
+    contador['filas_leidas'] suma las filas del CSV procesadas.
+    """
+    filas = filter(None, lector)
+    if limite is not None:
+        filas = islice(filas, limite)
+    for lote in agrupar_en_lotes(filas, tamano_lote):
+        leidas, encuestas = preparar_filas_crudas(campos, lote, estrategia_clave)
+        contador['filas_leidas'] += leidas
+        yield from encuestas
+
+def leer_csv_por_columnas(ruta, estrategia_clave, contador, tamano_lote=TAMANO_LOTE_COLUMNAS, limite=None,
+                          encoding='utf-8-sig', delimitador=';'):
+    """Tuplas preparadas de una fuente completa de encuestas (motor columnas de los modos fila y lotes)
+
+    ruta puede ser un archivo, un patrón glob o un directorio de CSV planos o comprimidos
+    (ver fuentes_entrada.py); cada archivo se lee con su propio encabezado.
+    """
+    inicial = contador['filas_leidas']
+    for _, lineas, progreso in archivos_de_fuente(ruta, encoding):
+        lector = csv.reader(lineas, delimiter=delimitador)
+        campos = next(lector, None)
+        if campos is None:
+            continue
+        antes = contador['filas_leidas']
+        restantes = None if limite is None else limite - (antes - inicial)
+        if restantes is not None and restantes <= 0:
+            return
+        yield from preparar_lotes_crudos(lector, campos, estrategia_clave, contador, tamano_lote, restantes)
+        if progreso is not None:
+            progreso['filas'] += contador['filas_leidas'] - antes
+
+def leer_shard_por_columnas(ruta, inicio, fin, campos, estrategia_clave, limite=None,
+                            tamano_lote=TAMANO_LOTE_COLUMNAS, delimitador=';'):
+    """Trabajador del modo paralelo con el motor columnas: devuelve (filas_leidas, encuestas)"""
+    lector = csv.reader(io.StringIO(texto_shard(ruta, inicio, fin), newline=''), delimiter=delimitador)
+    contador = {'filas_leidas': 0}
+    encuestas = list(preparar_lotes_crudos(lector, campos, estrategia_clave, contador, tamano_lote, limite))
+    return contador['filas_leidas'], encuestas
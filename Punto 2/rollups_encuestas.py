@@ -0,0 +1,283 @@
+"""
+Tablas de resumen (rollups) de encuestas para los reportes del Punto 3 y 4.
+
+rollup_encuestas_mensual guarda, por mes x cuestionario x calificación, el total de
+encuestas, la suma de calificaciones, la fecha mínima/máxima y un sketch HyperLogLog
+de los usuarios. Los reportes de una ventana de meses completos leen solo estas filas,
+así su costo no depende del tamaño de la tabla de hechos.
+
+Solo se consideran encuestas con calificación, igual que la tabla unificada. El resumen
+se actualiza de forma incremental: se procesan solo las encuestas con id_encuesta mayor
+que la marca de agua guardada en control_rollups. Los meses con encuestas actualizadas
+por la carga por fusión (cambios_encuestas.py) se recalculan completos, porque el sketch
+HyperLogLog no permite descontar los valores anteriores.
+
+La suma de calificaciones toma el valor de dimension_calificaciones, que una carga
+incremental puede cambiar sin tocar encuestas. control_rollups guarda también la
+generación y version_dimensiones (generacion_datos.py); si no coinciden con las actuales
+el resumen se recalcula completo.
+"""
+
+import hashlib
+import math
+
+from cambios_encuestas import ultimo_cambio, meses_actualizados
+from generacion_datos import generacion_actual
+
+# Bits de índice del HyperLogLog: 2^12 registros de 1 byte, error estándar ~1.6 %
+HLL_BITS = 12
+HLL_REGISTROS = 1 << HLL_BITS
+
+def crear_tablas_rollup(conn):
+    """Crea las tablas de resumen y su marca de agua si no existen"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rollup_encuestas_mensual (
+            año_mes TEXT NOT NULL,
+            id_cuestionario INTEGER,
+            id_calificacion INTEGER NOT NULL,
+            total_encuestas INTEGER NOT NULL,
+            suma_calificacion INTEGER,
+            fecha_minima TEXT,
+            fecha_maxima TEXT,
+            hll_usuarios BLOB NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_rollup_encuestas_mes
+        ON rollup_encuestas_mensual (año_mes)
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS control_rollups (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            max_id_encuesta INTEGER NOT NULL,
+            ultimo_cambio INTEGER NOT NULL DEFAULT 0,
+            generacion TEXT NOT NULL DEFAULT '',
+            version_dimensiones INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    # Bases creadas antes del registro de cambios de la fusión o del control de generación
+    existentes = {columna[1] for columna in conn.execute("PRAGMA table_info(control_rollups)")}
+    for columna, definicion in [('ultimo_cambio', "INTEGER NOT NULL DEFAULT 0"),
+                                ('generacion', "TEXT NOT NULL DEFAULT ''"),
+                                ('version_dimensiones', "INTEGER NOT NULL DEFAULT 0")]:
+        if columna not in existentes:
+            conn.execute(f"ALTER TABLE control_rollups ADD COLUMN {columna} {definicion}")
+
+def eliminar_tablas_rollup(conn):
+    """Elimina los resúmenes (se usa cuando la tabla de hechos se reconstruye completa)"""
+    conn.execute("DROP TABLE IF EXISTS rollup_encuestas_mensual")
+    conn.execute("DROP TABLE IF EXISTS control_rollups")
+
+def hll_vacio():
+    """Sketch HyperLogLog sin elementos"""
+    return bytearray(HLL_REGISTROS)
+
+def hll_agregar(registros, valor):
+    """Agrega un valor al sketch"""
+    x = int.from_bytes(hashlib.blake2b(str(valor).encode(), digest_size=8).digest(), 'big')
+    indice = x >> (64 - HLL_BITS)
+    resto = x & ((1 << (64 - HLL_BITS)) - 1)
+    rango = (64 - HLL_BITS) - resto.bit_length() + 1
+    if rango > registros[indice]:
+        registros[indice] = rango
+
+def hll_unir(destino, origen):
+    """Une el sketch origen dentro de destino (máximo por registro)"""
+    for i, valor in enumerate(origen):
+        if valor > destino[i]:
+            destino[i] = valor
+
+def hll_estimar(registros):
+    """Estimación de cardinalidad del sketch"""
+    m = HLL_REGISTROS
+    alfa = 0.7213 / (1 + 1.079 / m)
+    estimado = alfa * m * m / sum(2.0 ** -r for r in registros)
+    ceros = registros.count(0)
+    if estimado <= 2.5 * m and ceros:
+        # Corrección para cardinalidades pequeñas (conteo lineal)
+        estimado = m * math.log(m / ceros)
+    return int(round(estimado))
+
+# Filas que agrega el resumen; {condicion} elige las encuestas nuevas o las de un mes
+SELECT_ENCUESTAS_ROLLUP = '''
+    SELECT
+        substr(e.fecha_insercion, 1, 7),
+        e.id_cuestionario,
+        e.id_calificacion,
+        dc.calificacion,
+        e.usuario_id,
+        e.fecha_insercion
+    FROM encuestas e
+    LEFT JOIN dimension_calificaciones dc ON e.id_calificacion = dc.id_calificacion
+    WHERE {condicion} AND e.id_calificacion IS NOT NULL
+'''
+
+def limites_mes(anio_mes):
+    """Rango semiabierto [inicio, fin) de fecha_insercion de un mes 'YYYY-MM'"""
+    anio, mes = int(anio_mes[:4]), int(anio_mes[5:7])
+    siguiente = f"{anio + 1:04d}-01" if mes == 12 else f"{anio:04d}-{mes + 1:02d}"
+    return f"{anio_mes}-01", f"{siguiente}-01"
+
+def meses_en_rango(desde, hasta):
+    """Lista de meses 'YYYY-MM' que tocan el rango [desde, hasta)"""
+    anio, mes = int(desde[:4]), int(desde[5:7])
+    meses = []
+    while f"{anio:04d}-{mes:02d}-01" < hasta:
+        meses.append(f"{anio:04d}-{mes:02d}")
+        anio, mes = (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+    return meses
+
+def ventana_de_meses_completos(desde, hasta):
+    """Indica si [desde, hasta) empieza y termina en el primer día de un mes"""
+    return desde.endswith('-01') and hasta.endswith('-01')
+
+def agrupar_encuestas(cursor, grupos, omitir_meses=()):
+    """Acumula en grupos las filas de SELECT_ENCUESTAS_ROLLUP; devuelve cuántas se agregaron"""
+    procesadas = 0
+    for anio_mes, id_cuestionario, id_calificacion, valor, usuario_id, fecha in cursor:
+        if anio_mes in omitir_meses:
+            continue
+        clave = (anio_mes, id_cuestionario, id_calificacion)
+        grupo = grupos.get(clave)
+        if grupo is None:
+            grupo = grupos[clave] = [0, 0, fecha, fecha, hll_vacio()]
+        grupo[0] += 1
+        grupo[1] += valor or 0
+        grupo[2] = min(grupo[2], fecha)
+        grupo[3] = max(grupo[3], fecha)
+        hll_agregar(grupo[4], usuario_id)
+        procesadas += 1
+    return procesadas
+
+def actualizar_rollups(conn):
+    """Agrega al resumen las encuestas nuevas desde la última marca de agua
+
+    Los meses con encuestas actualizadas por la fusión desde el último cambio resumido se
+    recalculan completos; si cambió la generación o version_dimensiones se recalculan
+    todos. Devuelve la cantidad de encuestas procesadas.
+    """
+    crear_tablas_rollup(conn)
+    cursor = conn.cursor()
+    cursor.execute("SELECT max_id_encuesta, ultimo_cambio, generacion, version_dimensiones "
+                   "FROM control_rollups WHERE id = 1")
+    marca = cursor.fetchone()
+    max_id, cambio_resumido = marca[:2] if marca else (0, 0)
+    cambio_actual = ultimo_cambio(conn)
+    generacion, version = generacion_actual(conn)
+    if marca is not None and tuple(marca[2:]) != (generacion, version):
+        # Una calificación pudo cambiar de valor: ninguna fila del resumen sirve
+        cursor.execute("DELETE FROM rollup_encuestas_mensual")
+        max_id = 0
+    # Si el registro de cambios se reinició (carga completa) el resumen también se reinició
+    recalcular = meses_actualizados(conn, cambio_resumido) if cambio_actual > cambio_resumido else []
+
+    nuevos = {}
+    procesadas = 0
+    for anio_mes in recalcular:
+        cursor.execute(SELECT_ENCUESTAS_ROLLUP.format(condicion="e.fecha_insercion >= ? AND e.fecha_insercion < ?"),
+                       limites_mes(anio_mes))
+        procesadas += agrupar_encuestas(cursor, nuevos)
+        cursor.execute("DELETE FROM rollup_encuestas_mensual WHERE año_mes = ?", (anio_mes,))
+
+    cursor.execute(SELECT_ENCUESTAS_ROLLUP.format(condicion="e.id_encuesta > ?"), (max_id,))
+    procesadas += agrupar_encuestas(cursor, nuevos, omitir_meses=set(recalcular))
+
+    cursor.execute("SELECT COALESCE(MAX(id_encuesta), 0) FROM encuestas")
+    nuevo_max_id = max(max_id, cursor.fetchone()[0])
+
+    # Unir con lo que ya estaba resumido para los meses afectados (los recalculados ya no tienen filas)
+    meses = sorted({clave[0] for clave in nuevos})
+    for anio_mes in meses:
+        cursor.execute('''
+            SELECT id_cuestionario, id_calificacion, total_encuestas, suma_calificacion,
+                   fecha_minima, fecha_maxima, hll_usuarios
+            FROM rollup_encuestas_mensual WHERE año_mes = ?
+        ''', (anio_mes,))
+        for id_cuestionario, id_calificacion, total, suma, minima, maxima, hll in cursor.fetchall():
+            clave = (anio_mes, id_cuestionario, id_calificacion)
+            grupo = nuevos.get(clave)
+            if grupo is None:
+                nuevos[clave] = [total, suma, minima, maxima, bytearray(hll)]
+                continue
+            grupo[0] += total
+            grupo[1] += suma or 0
+            grupo[2] = min(grupo[2], minima)
+            grupo[3] = max(grupo[3], maxima)
+            hll_unir(grupo[4], hll)
+        cursor.execute("DELETE FROM rollup_encuestas_mensual WHERE año_mes = ?", (anio_mes,))
+
+    cursor.executemany('''
+        INSERT INTO rollup_encuestas_mensual (
+            año_mes, id_cuestionario, id_calificacion, total_encuestas, suma_calificacion,
+            fecha_minima, fecha_maxima, hll_usuarios
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [clave + (grupo[0], grupo[1], grupo[2], grupo[3], bytes(grupo[4]))
+          for clave, grupo in nuevos.items()])
+    cursor.execute('''
+        INSERT INTO control_rollups (id, max_id_encuesta, ultimo_cambio, generacion, version_dimensiones)
+        VALUES (1, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            max_id_encuesta = excluded.max_id_encuesta,
+            ultimo_cambio = excluded.ultimo_cambio,
+            generacion = excluded.generacion,
+            version_dimensiones = excluded.version_dimensiones
+    ''', (nuevo_max_id, cambio_actual, generacion, version))
+    conn.commit()
+    return procesadas
+
+def rollups_al_dia(conn):
+    """Indica si el resumen ya incluye todas las encuestas cargadas y las dimensiones actuales"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'control_rollups'")
+    if not cursor.fetchone():
+        return False
+    columnas = {columna[1] for columna in cursor.execute("PRAGMA table_info(control_rollups)")}
+    if 'version_dimensiones' not in columnas:
+        return False
+    cursor.execute("SELECT max_id_encuesta, ultimo_cambio, generacion, version_dimensiones "
+                   "FROM control_rollups WHERE id = 1")
+    marca = cursor.fetchone()
+    if marca is None:
+        return False
+    cursor.execute("SELECT COALESCE(MAX(id_encuesta), 0) FROM encuestas")
+    return (marca[0] >= cursor.fetchone()[0] and marca[1] == ultimo_cambio(conn)
+            and tuple(marca[2:]) == generacion_actual(conn))
+
+def resumen_meses(conn, meses):
+    """Estadísticas de una lista de meses 'YYYY-MM' leídas solo del resumen
+
+    Devuelve un diccionario con total_registros, usuarios_unicos (aproximado con
+    HyperLogLog), tipos_cuestionario, calificacion_promedio, fecha_minima y fecha_maxima.
+    """
+    if not rollups_al_dia(conn):
+        actualizar_rollups(conn)
+
+    cursor = conn.cursor()
+    marcadores = ', '.join('?' for _ in meses)
+    cursor.execute(f'''
+        SELECT id_cuestionario, total_encuestas, suma_calificacion, fecha_minima, fecha_maxima, hll_usuarios
+        FROM rollup_encuestas_mensual
+        WHERE año_mes IN ({marcadores})
+    ''', list(meses))
+
+    total = suma = 0
+    cuestionarios = set()
+    fecha_minima = fecha_maxima = None
+    usuarios = hll_vacio()
+    for id_cuestionario, total_grupo, suma_grupo, minima, maxima, hll in cursor.fetchall():
+        total += total_grupo
+        suma += suma_grupo or 0
+        if id_cuestionario is not None:
+            cuestionarios.add(id_cuestionario)
+        fecha_minima = minima if fecha_minima is None else min(fecha_minima, minima)
+        fecha_maxima = maxima if fecha_maxima is None else max(fecha_maxima, maxima)
+        hll_unir(usuarios, hll)
+
+    return {
+        'total_registros': total,
+        'usuarios_unicos': hll_estimar(usuarios) if total else 0,
+        'tipos_cuestionario': len(cuestionarios),
+        'calificacion_promedio': suma / total if total else None,
+        'fecha_minima': fecha_minima,
+        'fecha_maxima': fecha_maxima,
+    }
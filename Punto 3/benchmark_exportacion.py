@@ -0,0 +1,104 @@
+"""
+Benchmark de lectura: particiones en SQLite (fila por fila) contra la exportación columnar.
+
+Usa las particiones mensuales ya construidas por ejecutar_punto3.py, las exporta a un
+directorio temporal y mide el tiempo de leer algunas columnas y la tabla completa por
+ambos caminos, además del espacio en disco.
+
+Uso:
+    python benchmark_exportacion.py --columnas usuario_id calificacion_valor estado
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from ejecutar_punto3 import conectar_bd, nombre_particion, crear_tabla_control, COLUMNAS_MARCA
+from exportacion_columnar import ruta_particion, exportar_particion, leer_dataset
+
+def meses_construidos(cursor):
+    """Meses con partición registrada en la tabla de control"""
+    crear_tabla_control(cursor)
+    cursor.execute(f"""
+        SELECT año_mes, {', '.join(COLUMNAS_MARCA)}
+        FROM control_particiones_unificada ORDER BY año_mes
+    """)
+    return [(row[0], tuple(row[1:])) for row in cursor.fetchall()]
+
+def leer_sqlite(conn, meses, columnas):
+    """Lee las columnas de las particiones recorriendo las filas desde SQLite"""
+    seleccion = ', '.join(columnas) if columnas else '*'
+    resultado = None
+    for anio_mes in meses:
+        cursor = conn.execute(f"SELECT {seleccion} FROM {nombre_particion(anio_mes)}")
+        if resultado is None:
+            resultado = {descripcion[0]: [] for descripcion in cursor.description}
+        listas = list(resultado.values())
+        for fila in cursor:
+            for lista, valor in zip(listas, fila):
+                lista.append(valor)
+    return resultado
+
+def tamano_sqlite(conn, meses):
+    """Bytes que ocupan las particiones dentro del archivo SQLite (dbstat), o None si no está disponible"""
+    try:
+        marcadores = ', '.join('?' for _ in meses)
+        cursor = conn.execute(f"SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN ({marcadores})",
+                              [nombre_particion(anio_mes) for anio_mes in meses])
+        return cursor.fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+
+def medir(funcion, repeticiones):
+    """Mejor tiempo de varias repeticiones y el último resultado"""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        transcurrido = time.perf_counter() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return mejor, resultado
+
+def main():
+    """Exporta las particiones a un directorio temporal y compara tiempos de lectura"""
+    parser = argparse.ArgumentParser(description="Benchmark de la exportación columnar")
+    parser.add_argument('--columnas', nargs='+', default=['usuario_id', 'calificacion_valor', 'estado'],
+                        help="Columnas para la lectura parcial")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    conn = conectar_bd()
+    conn.row_factory = None
+    particiones = meses_construidos(conn.cursor())
+    if not particiones:
+        print("No hay particiones construidas. Ejecuta primero ejecutar_punto3.py")
+        return
+    meses = [anio_mes for anio_mes, _ in particiones]
+
+    with tempfile.TemporaryDirectory() as directorio:
+        inicio = time.perf_counter()
+        filas = sum(exportar_particion(conn, nombre_particion(anio_mes), ruta_particion(directorio, anio_mes), marca)
+                    for anio_mes, marca in particiones)
+        exportacion = time.perf_counter() - inicio
+        tamano_columnar = sum(os.path.getsize(ruta_particion(directorio, anio_mes)) for anio_mes in meses)
+        tamano_tablas = tamano_sqlite(conn, meses)
+
+        print(f"Particiones: {', '.join(meses)} ({filas:,} filas), exportadas en {exportacion:.2f} s")
+        print(f"Espacio: SQLite {'-' if tamano_tablas is None else f'{tamano_tablas / 1e6:.2f} MB'}, "
+              f"columnar {tamano_columnar / 1e6:.2f} MB")
+
+        print(f"\n{'Lectura':<28}{'SQLite (s)':>12}{'Columnar (s)':>14}{'Aceleración':>13}")
+        for nombre, columnas in [(', '.join(args.columnas), args.columnas), ('todas las columnas', None)]:
+            tiempo_sqlite, desde_sqlite = medir(lambda: leer_sqlite(conn, meses, columnas), args.repeticiones)
+            tiempo_columnar, desde_columnar = medir(lambda: leer_dataset(directorio, columnas, meses),
+                                                    args.repeticiones)
+            if {k: list(v) for k, v in desde_sqlite.items()} != desde_columnar:
+                raise RuntimeError(f"La lectura columnar no coincide con SQLite ({nombre})")
+            print(f"{nombre[:27]:<28}{tiempo_sqlite:>12.3f}{tiempo_columnar:>14.3f}"
+                  f"{tiempo_sqlite / tiempo_columnar:>12.1f}x")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,75 @@
 
 """
 PUNTO 3: Ejecutar consulta para tabla unificada 2025
-Solo crea la tabla con información de encuestas y usuarios para Junio-Agosto 2025
+Crea la tabla con información de encuestas y usuarios para Junio-Agosto 2025
+(o cualquier otra ventana de fechas indicada por parámetro).
+
+La información se materializa en particiones mensuales (tabla_unificada_YYYY_MM) y la
+ventana pedida se expone como una vista sobre ellas, del mes más reciente al más antiguo
+y sin ORDER BY propio (quien necesite un orden lo pide en su consulta). Cada partición
+tiene índices por id_encuesta y por fecha_insercion: con ellos SQLite resuelve la
+paginación por id_encuesta de la vista (servicio de consultas del Punto 4) y los
+ORDER BY fecha_insercion uniendo las particiones en orden, sin recorrerlas ni ordenarlas.
+Cada partición guarda una marca
+de agua de sus filas fuente; solo se reconstruyen las que cambiaron desde la última vez.
+La marca incluye la generación de la carga y la versión de usuarios y dimensiones del
+Punto 2 (generacion_datos.py): una carga completa o un usuario editado reconstruyen las
+particiones aunque las encuestas conserven sus id y conteos.
+Si solo cambiaron filas actualizadas por la carga por fusión del Punto 2 (registradas en
+cambios_encuestas), esas filas se refrescan dentro de la partición sin reconstruirla.
+
+Si la ventana cubre meses completos, las estadísticas se leen de los resúmenes mensuales
+del Punto 2 (rollups_encuestas.py) en vez de recorrer la tabla unificada.
+
+Con --exportar las particiones también se escriben en formato columnar
+(exportacion_columnar.py) para que otras aplicaciones las lean sin pasar por SQLite.
+
+Con --archivos-mensuales las estadísticas de la ventana (de meses completos o no) se
+calculan en paralelo sobre los archivos SQLite por mes del Punto 2 (archivos_mensuales.py),
+con usuarios únicos exactos.
 """
 
 import sqlite3
 import os
+import sys
+import argparse
+from datetime import datetime
 
-def conectar_bd():
-    """Conecta a la base de datos"""
-    # Usar la base de datos generada en 'Punto 2'
-    proyecto_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    db_path = os.path.join(proyecto_root, 'Punto 2', 'encuestas_usuarios_simplificada.db')
-    conn = sqlite3.connect(db_path)
-    conn.execute('PRAGMA foreign_keys = ON;')
-    conn.row_factory = sqlite3.Row
-    return conn
+# Los resúmenes mensuales se mantienen junto al cargador del Punto 2
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Punto 2'))
+from rollups_encuestas import resumen_meses, limites_mes, meses_en_rango, ventana_de_meses_completos
+from archivos_mensuales import NOMBRE_DIRECTORIO, sincronizar_archivos_mensuales, resumen_archivos_mensuales
+from cambios_encuestas import ultimo_cambio, encuestas_cambiadas
+from generacion_datos import generacion_actual
+from instrumentacion import (
+    agregar_argumentos as agregar_argumentos_instrumentacion, iniciar_desde_argumentos,
+    finalizar_desde_argumentos, etapa
+)
+from almacenamiento import configuracion_bd, ruta_sqlite, abrir_bd, ejecutar, expresiones_fecha, construir_tabla_unificada
 
-def ejecutar_punto3():
-    """Ejecuta Punto 3: tabla unificada"""
-    
-    print("PUNTO 3: Creando tabla unificada")
-    print("=" * 50)
-    
-    try:
-        conn = conectar_bd()
-        cursor = conn.cursor()
-       
-        consulta = """
-        CREATE TABLE IF NOT EXISTS tabla_unificada_2025 AS
+# Ventana por defecto: Junio-Agosto 2025 como rango semiabierto [inicio, fin) sobre fecha_insercion.
+# fecha_insercion se guarda como texto ISO 'YYYY-MM-DD HH:MM:SS.fff', que ordena igual que
+# la fecha, así el filtro puede resolverse con el índice en vez de aplicar strftime fila a fila.
+FECHA_INICIO = '2025-06-01'
+FECHA_FIN = '2025-09-01'
+
+INDICE_FECHA = 'idx_encuestas_fecha_insercion'
+
+TABLA_POR_DEFECTO = 'tabla_unificada_2025'
+
+DIRECTORIO_EXPORTACION = 'tabla_unificada_columnar'
+
+# Columnas de la marca de agua de una partición, en el orden de marca_agua_fuente
+COLUMNAS_MARCA = ['filas_fuente', 'max_id_encuesta', 'ultimo_cambio', 'generacion', 'version_dimensiones']
+
+# año, mes y año_mes dependen del backend (ver almacenamiento.EXPRESIONES_FECHA)
+PLANTILLA_CONSULTA_UNIFICADA = """
         SELECT 
             e.id_encuesta,
             e.id_estado_encuesta,
-            e.estado,
+            de.estado,
             e.id_cuestionario,
-            e.descripcion_cuestionario,
+            dq.descripcion AS descripcion_cuestionario,
             e.id_calificacion,
             dc.calificacion AS calificacion_valor,
             dc.descripcion AS descripcion_calificacion,
@@ -48,66 +83,453 @@ def ejecutar_punto3():
             u.nombre AS nombre_usuario,
             u.telefono,
             u.email,
-            strftime('%Y', e.fecha_insercion) AS año,
-            strftime('%m', e.fecha_insercion) AS mes,
-            strftime('%Y-%m', e.fecha_insercion) AS año_mes
+            {año} AS año,
+            {mes} AS mes,
+            {año_mes} AS año_mes
         FROM encuestas e
         INNER JOIN usuarios u ON e.usuario_id = u.id_usuario
+        LEFT JOIN dimension_estados de ON e.id_estado_encuesta = de.id_estado_encuesta
+        LEFT JOIN dimension_cuestionarios dq ON e.id_cuestionario = dq.id_cuestionario
         LEFT JOIN dimension_calificaciones dc ON e.id_calificacion = dc.id_calificacion
+"""
+
+PLANTILLA_SELECCION_UNIFICADA = PLANTILLA_CONSULTA_UNIFICADA + """
         WHERE 
-            strftime('%Y', e.fecha_insercion) = '2025'
-            AND strftime('%m', e.fecha_insercion) IN ('06', '07', '08')
+            e.fecha_insercion >= ?
+            AND e.fecha_insercion < ?
             AND e.id_calificacion IS NOT NULL
         ORDER BY e.fecha_insercion DESC
-        """
+"""
+
+SELECCION_UNIFICADA = PLANTILLA_SELECCION_UNIFICADA.format(**expresiones_fecha('sqlite', 'e.fecha_insercion'))
+
+# Filas unificadas de las encuestas cargadas en la tabla temporal ids_refrescar
+SELECCION_POR_IDS = (PLANTILLA_CONSULTA_UNIFICADA + """
+        WHERE
+            e.id_encuesta IN (SELECT id_encuesta FROM temp.ids_refrescar)
+            AND e.id_calificacion IS NOT NULL
+""").format(**expresiones_fecha('sqlite', 'e.fecha_insercion'))
+
+def conectar_bd():
+    """Conecta a la base de datos"""
+    # Usar la base de datos generada en 'Punto 2' (o la configurada en ENCUESTAS_BD)
+    conn = sqlite3.connect(ruta_sqlite())
+    conn.execute('PRAGMA foreign_keys = ON;')
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def asegurar_indice_fecha(cursor):
+    """Crea el índice por fecha_insercion en bases cargadas antes de que el Punto 2 lo incluyera"""
+    cursor.execute(f"""
+        CREATE INDEX IF NOT EXISTS {INDICE_FECHA}
+        ON encuestas (fecha_insercion, id_calificacion)
+    """)
+
+def verificar_plan_consulta(cursor, consulta, parametros=()):
+    """Revisa con EXPLAIN QUERY PLAN que la consulta use el índice de fecha
+    
+    Falla si encuestas se recorre completa o si el ORDER BY necesita un ordenamiento
+    aparte, para detectar una regresión a filtros no sargables. Es una verificación
+    para las pruebas (tests/test_plan_ventana.py): la construcción de particiones no la
+    usa, porque otro plan válido del optimizador no debe detener la carga.
+    """
+    cursor.execute(f"EXPLAIN QUERY PLAN {consulta}", parametros)
+    plan = [row[3] for row in cursor.fetchall()]
+    
+    problemas = []
+    if not any(paso.startswith('SEARCH e USING INDEX') or paso.startswith('SEARCH e USING COVERING INDEX')
+               for paso in plan):
+        problemas.append("encuestas no se filtra con un índice")
+    if any(paso.startswith('SCAN e') for paso in plan):
+        problemas.append("encuestas se recorre completa")
+    if any('TEMP B-TREE FOR ORDER BY' in paso for paso in plan):
+        problemas.append("el ORDER BY requiere un ordenamiento adicional")
+    
+    if problemas:
+        detalle = '\n  '.join(plan)
+        raise RuntimeError(f"Plan de consulta no esperado ({'; '.join(problemas)}):\n  {detalle}")
+    return plan
+
+def validar_fecha(texto):
+    """Valida una fecha 'YYYY-MM-DD' y la devuelve normalizada"""
+    return datetime.strptime(texto, '%Y-%m-%d').strftime('%Y-%m-%d')
+
+def nombre_particion(anio_mes):
+    """Nombre de la tabla de una partición mensual"""
+    return f"tabla_unificada_{anio_mes.replace('-', '_')}"
+
+def crear_tabla_control(cursor):
+    """Crea la tabla de marcas de agua de las particiones si no existe"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS control_particiones_unificada (
+            año_mes TEXT PRIMARY KEY,
+            filas_fuente INTEGER NOT NULL,
+            max_id_encuesta INTEGER,
+            fecha_construccion TEXT NOT NULL,
+            ultimo_cambio INTEGER NOT NULL DEFAULT 0,
+            generacion TEXT NOT NULL DEFAULT '',
+            version_dimensiones INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # Tablas de control creadas antes del registro de cambios de la fusión o de la generación
+    cursor.execute("PRAGMA table_info(control_particiones_unificada)")
+    existentes = {columna[1] for columna in cursor.fetchall()}
+    for columna, definicion in [('ultimo_cambio', "INTEGER NOT NULL DEFAULT 0"),
+                                ('generacion', "TEXT NOT NULL DEFAULT ''"),
+                                ('version_dimensiones', "INTEGER NOT NULL DEFAULT 0")]:
+        if columna not in existentes:
+            cursor.execute(f"ALTER TABLE control_particiones_unificada ADD COLUMN {columna} {definicion}")
+
+def marca_agua_fuente(cursor, anio_mes):
+    """Filas fuente, máximo id_encuesta, último cambio registrado, generación y versión de dimensiones
+    
+    Las dos primeras se resuelven solo con el índice de fecha; el último cambio viene del
+    registro de la carga por fusión (0 si nunca se fusionó) y las dos últimas de
+    control_generacion (ver generacion_datos.py).
+    """
+    inicio, fin = limites_mes(anio_mes)
+    cursor.execute("""
+        SELECT COUNT(*), MAX(id_encuesta)
+        FROM encuestas
+        WHERE fecha_insercion >= ? AND fecha_insercion < ? AND id_calificacion IS NOT NULL
+    """, (inicio, fin))
+    return (tuple(cursor.fetchone()) + (ultimo_cambio(cursor.connection, anio_mes),)
+            + generacion_actual(cursor.connection))
+
+def marca_agua_guardada(cursor, anio_mes):
+    """Marca de agua con la que se construyó la partición, o None si la partición no existe"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                   (nombre_particion(anio_mes),))
+    if not cursor.fetchone():
+        return None
+    cursor.execute(f"SELECT {', '.join(COLUMNAS_MARCA)} FROM control_particiones_unificada WHERE año_mes = ?",
+                   (anio_mes,))
+    guardada = cursor.fetchone()
+    return tuple(guardada) if guardada is not None else None
+
+def registrar_marca_agua(cursor, anio_mes, marca):
+    """Guarda la marca de agua de la partición (sin confirmar la transacción)"""
+    cursor.execute(f"""
+        INSERT INTO control_particiones_unificada
+            (año_mes, {', '.join(COLUMNAS_MARCA)}, fecha_construccion)
+        VALUES (?, {', '.join('?' for _ in COLUMNAS_MARCA)}, ?)
+        ON CONFLICT(año_mes) DO UPDATE SET
+            {', '.join(f"{columna} = excluded.{columna}" for columna in COLUMNAS_MARCA)},
+            fecha_construccion = excluded.fecha_construccion
+    """, (anio_mes, *marca, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+def indexar_particion(cursor, tabla):
+    """Índices de la partición: id_encuesta (paginación y refresco de filas) y fecha_insercion
+    (ORDER BY fecha_insercion sobre la vista)"""
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabla}_id_encuesta ON {tabla} (id_encuesta)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabla}_fecha_insercion ON {tabla} (fecha_insercion)")
+
+def construir_particion(conn, anio_mes, marca):
+    """(Re)construye la partición mensual y registra su marca de agua en la misma transacción"""
+    cursor = conn.cursor()
+    tabla = nombre_particion(anio_mes)
+    parametros = limites_mes(anio_mes)
+    
+    cursor.execute(f"DROP TABLE IF EXISTS {tabla}")
+    cursor.execute(f"CREATE TABLE {tabla} AS {SELECCION_UNIFICADA}", parametros)
+    indexar_particion(cursor, tabla)
+    registrar_marca_agua(cursor, anio_mes, marca)
+    conn.commit()
+
+def refrescar_particion(conn, anio_mes, marca, guardada):
+    """Refresca en su lugar las filas de la partición actualizadas por la carga por fusión
+    
+    Solo aplica si no entraron ni salieron filas (mismas filas fuente y mismo máximo
+    id_encuesta) en la misma generación y sin cambios en usuarios ni dimensiones: se
+    actualizan las columnas de las filas cambiadas y la partición conserva su orden.
+    Devuelve la cantidad de filas refrescadas, o None si hay que reconstruirla.
+    """
+    if guardada is None or guardada[:2] != marca[:2] or guardada[2] > marca[2] or guardada[3:] != marca[3:]:
+        return None
+    cursor = conn.cursor()
+    tabla = nombre_particion(anio_mes)
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS ids_refrescar (id_encuesta INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM temp.ids_refrescar")
+    cursor.executemany("INSERT INTO temp.ids_refrescar (id_encuesta) VALUES (?)",
+                       [(id_encuesta,) for id_encuesta in encuestas_cambiadas(conn, anio_mes, guardada[2])])
+    
+    cursor.execute(f"PRAGMA table_info({tabla})")
+    columnas = [columna[1] for columna in cursor.fetchall() if columna[1] != 'id_encuesta']
+    cursor.execute(f"SELECT COUNT(*) FROM ({SELECCION_POR_IDS})")
+    esperadas = cursor.fetchone()[0]
+    cursor.execute(f"""
+        UPDATE {tabla} SET ({', '.join(columnas)}) = ({', '.join(f's.{columna}' for columna in columnas)})
+        FROM ({SELECCION_POR_IDS}) AS s
+        WHERE {tabla}.id_encuesta = s.id_encuesta
+    """)
+    if cursor.rowcount != esperadas:
+        # Alguna fila cambiada no estaba en la partición: entró una y salió otra
+        conn.rollback()
+        return None
+    registrar_marca_agua(cursor, anio_mes, marca)
+    conn.commit()
+    return esperadas
+
+def registrar_ventana(cursor, nombre_tabla, desde, hasta):
+    """Guarda la ventana de la vista (el Punto 4 la usa para sus estadísticas)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS control_ventana_unificada (
+            nombre_tabla TEXT PRIMARY KEY,
+            desde TEXT NOT NULL,
+            hasta TEXT NOT NULL,
+            fecha_creacion TEXT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO control_ventana_unificada (nombre_tabla, desde, hasta, fecha_creacion) VALUES (?, ?, ?, ?)
+        ON CONFLICT(nombre_tabla) DO UPDATE SET
+            desde = excluded.desde, hasta = excluded.hasta, fecha_creacion = excluded.fecha_creacion
+    """, (nombre_tabla, desde, hasta, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+def crear_vista_ventana(conn, nombre_tabla, desde, hasta):
+    """Expone la ventana [desde, hasta) como una vista sobre las particiones mensuales"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT type FROM sqlite_master WHERE name = ?", (nombre_tabla,))
+    existente = cursor.fetchone()
+    if existente:
+        # Versiones anteriores creaban la ventana como tabla
+        cursor.execute(f"DROP {'VIEW' if existente[0] == 'view' else 'TABLE'} {nombre_tabla}")
+    
+    partes = []
+    for anio_mes in reversed(meses_en_rango(desde, hasta)):
+        inicio, fin = limites_mes(anio_mes)
+        filtro = []
+        if desde > inicio:
+            filtro.append(f"fecha_insercion >= '{desde}'")
+        if hasta < fin:
+            filtro.append(f"fecha_insercion < '{hasta}'")
+        where = f" WHERE {' AND '.join(filtro)}" if filtro else ""
+        partes.append(f"SELECT * FROM {nombre_particion(anio_mes)}{where}")
+    
+    cursor.execute(f"CREATE VIEW {nombre_tabla} AS {' UNION ALL '.join(partes)}")
+    registrar_ventana(cursor, nombre_tabla, desde, hasta)
+    conn.commit()
+
+def materializar_ventana(conn, desde, hasta, nombre_tabla, reconstruir=False):
+    """Refresca las particiones de la ventana que cambiaron y recrea la vista
+    
+    Con reconstruir=True se vuelven a construir todas las particiones de la ventana.
+    Devuelve (meses reconstruidos, meses refrescados en su lugar).
+    """
+    cursor = conn.cursor()
+    asegurar_indice_fecha(cursor)
+    crear_tabla_control(cursor)
+    
+    reconstruidas = []
+    refrescadas = []
+    for anio_mes in meses_en_rango(desde, hasta):
+        marca = marca_agua_fuente(cursor, anio_mes)
+        guardada = marca_agua_guardada(cursor, anio_mes)
+        if guardada == marca and not reconstruir:
+            # Particiones construidas antes de que tuvieran sus índices
+            indexar_particion(cursor, nombre_particion(anio_mes))
+            continue
+        if not reconstruir:
+            with etapa(f"refresco_{anio_mes}") as medicion:
+                medicion['filas'] = refrescar_particion(conn, anio_mes, marca, guardada)
+            if medicion['filas'] is not None:
+                refrescadas.append(anio_mes)
+                continue
+        with etapa(f"particion_{anio_mes}", filas=marca[0]):
+            construir_particion(conn, anio_mes, marca)
+        reconstruidas.append(anio_mes)
+    
+    with etapa('vista'):
+        crear_vista_ventana(conn, nombre_tabla, desde, hasta)
+    return reconstruidas, refrescadas
+
+def exportar_ventana(conn, meses, directorio):
+    """Exporta a formato columnar las particiones cuyo archivo no coincide con su marca de agua
+    
+    Devuelve la lista de meses exportados.
+    """
+    # El exportador columnar solo se carga si se pidió --exportar
+    from exportacion_columnar import ruta_particion, exportar_particion, exportacion_vigente
+    cursor = conn.cursor()
+    exportadas = []
+    for anio_mes in meses:
+        cursor.execute(f"SELECT {', '.join(COLUMNAS_MARCA)} FROM control_particiones_unificada WHERE año_mes = ?",
+                       (anio_mes,))
+        marca = tuple(cursor.fetchone())
+        ruta = ruta_particion(directorio, anio_mes)
+        if not exportacion_vigente(ruta, marca):
+            exportar_particion(conn, nombre_particion(anio_mes), ruta, marca)
+            exportadas.append(anio_mes)
+    return exportadas
+
+def ejecutar_punto3_en_backend(configuracion, desde, hasta, nombre_tabla):
+    """Tabla unificada en un backend distinto de SQLite (ENCUESTAS_BD, ver almacenamiento.py)
+    
+    La ventana se materializa como una sola tabla; las particiones mensuales, sus marcas
+    de agua y la exportación columnar son propias de SQLite.
+    """
+    bd = abrir_bd(configuracion)
+    try:
+        seleccion = PLANTILLA_SELECCION_UNIFICADA.format(**expresiones_fecha(bd['backend'], 'e.fecha_insercion'))
+        with etapa('tabla') as medicion:
+            medicion['filas'] = construir_tabla_unificada(bd, nombre_tabla, seleccion, (desde, hasta))
         
-        print("Ejecutando consulta...")
-        cursor.execute(consulta)
-        conn.commit()
+        with etapa('estadisticas'):
+            resultado = ejecutar(bd, f"""
+                SELECT 
+                    COUNT(*) AS total_registros,
+                    COUNT(DISTINCT usuario_id) AS usuarios_unicos,
+                    AVG(calificacion_valor) AS calificacion_promedio
+                FROM {nombre_tabla}
+            """).fetchone()
+        print(f"\nRESULTADOS (tabla {nombre_tabla} en {bd['backend']}):")
+        print(f"- Total de registros: {resultado[0]}")
+        print(f"- Usuarios únicos: {resultado[1]}")
+        print(f"- Calificación promedio: {resultado[2] or 0:.2f}")
         
-        cursor.execute("SELECT COUNT(*) FROM tabla_unificada_2025")
-        total_registros = cursor.fetchone()[0]
+        muestra = ejecutar(bd, f"""
+            SELECT id_encuesta, nombre_usuario, email, calificacion_valor, fecha_insercion
+            FROM {nombre_tabla}
+            ORDER BY fecha_insercion DESC
+            LIMIT 5
+        """).fetchall()
+        print(f"\nMUESTRA DE DATOS:")
+        for row in muestra:
+            print(f"- ID: {row[0]}, Usuario: {row[1]}, Email: {row[2]}, "
+                  f"Calificación: {row[3]}, Fecha: {row[4]}")
+        print(f"\nTabla '{nombre_tabla}' creada exitosamente")
+    finally:
+        bd['conn'].close()
+
+def ejecutar_punto3(desde=FECHA_INICIO, hasta=FECHA_FIN, nombre_tabla=TABLA_POR_DEFECTO, reconstruir=False,
+                    directorio_exportacion=None, conn=None, directorio_mensual=None):
+    """Ejecuta Punto 3: tabla unificada para la ventana [desde, hasta)
+    
+    Si se indica directorio_exportacion, las particiones de la ventana se exportan además
+    en formato columnar. Con conn se usa esa conexión SQLite (no se cierra al terminar).
+    Con directorio_mensual ('' para el directorio por defecto) las estadísticas salen de
+    los archivos por mes. Devuelve True si la tabla quedó creada.
+    """
+    
+    print("PUNTO 3: Creando tabla unificada")
+    print("=" * 50)
+    
+    propia = conn is None
+    try:
+        desde, hasta = validar_fecha(desde), validar_fecha(hasta)
+        if desde >= hasta:
+            raise ValueError(f"Rango de fechas vacío: {desde} a {hasta}")
+        
+        configuracion = configuracion_bd()
+        if configuracion['backend'] != 'sqlite':
+            if directorio_exportacion:
+                print("   - La exportación columnar solo está disponible con SQLite")
+            print(f"Ejecutando consulta para {desde} a {hasta} (sin incluir)...")
+            ejecutar_punto3_en_backend(configuracion, desde, hasta, nombre_tabla)
+            return True
+        
+        if propia:
+            conn = conectar_bd()
+        cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT 
-                COUNT(*) AS total_registros,
-                COUNT(DISTINCT usuario_id) AS usuarios_unicos,
-                AVG(calificacion_valor) AS calificacion_promedio
-            FROM tabla_unificada_2025
-        """)
+        print(f"Ejecutando consulta para {desde} a {hasta} (sin incluir)...")
+        reconstruidas, refrescadas = materializar_ventana(conn, desde, hasta, nombre_tabla, reconstruir)
+        meses = meses_en_rango(desde, hasta)
+        print(f"Particiones reconstruidas: {', '.join(reconstruidas) if reconstruidas else 'ninguna'} "
+              f"({len(meses) - len(reconstruidas) - len(refrescadas)} de {len(meses)} sin cambios)")
+        if refrescadas:
+            print(f"Particiones con filas actualizadas refrescadas en su lugar: {', '.join(refrescadas)}")
         
-        resultado = cursor.fetchone()
+        with etapa('estadisticas') as medicion:
+            if directorio_mensual is not None:
+                sincronizar_archivos_mensuales(conn, directorio_mensual or None, meses)
+                resumen = resumen_archivos_mensuales(desde, hasta, directorio_mensual or None)
+                resultado = (resumen['total_registros'], resumen['usuarios_unicos'],
+                             resumen['calificacion_promedio'])
+                origen = "archivos mensuales en paralelo"
+            elif ventana_de_meses_completos(desde, hasta):
+                resumen = resumen_meses(conn, meses)
+                resultado = (resumen['total_registros'], resumen['usuarios_unicos'],
+                             resumen['calificacion_promedio'])
+                origen = "resúmenes mensuales, usuarios únicos aproximados"
+            else:
+                cursor.execute(f"""
+                    SELECT 
+                        COUNT(*) AS total_registros,
+                        COUNT(DISTINCT usuario_id) AS usuarios_unicos,
+                        AVG(calificacion_valor) AS calificacion_promedio
+                    FROM {nombre_tabla}
+                """)
+                resultado = cursor.fetchone()
+                origen = f"tabla {nombre_tabla}"
+            medicion['filas'] = resultado[0]
         
-        print(f"\nRESULTADOS:")
+        print(f"\nRESULTADOS ({origen}):")
         print(f"- Total de registros: {resultado[0]}")
         print(f"- Usuarios únicos: {resultado[1]}")
-        print(f"- Calificación promedio: {resultado[2]:.2f}")
+        print(f"- Calificación promedio: {resultado[2] or 0:.2f}")
         
         # Mostrar muestra
-        cursor.execute("""
-            SELECT 
-                id_encuesta,
-                nombre_usuario,
-                email,
-                calificacion_valor,
-                fecha_insercion
-            FROM tabla_unificada_2025
-            LIMIT 5
-        """)
+        with etapa('muestra'):
+            cursor.execute(f"""
+                SELECT 
+                    id_encuesta,
+                    nombre_usuario,
+                    email,
+                    calificacion_valor,
+                    fecha_insercion
+                FROM {nombre_tabla}
+                ORDER BY fecha_insercion DESC
+                LIMIT 5
+            """)
+            muestra = cursor.fetchall()
         
         print(f"\nMUESTRA DE DATOS:")
-        for row in cursor.fetchall():
+        for row in muestra:
             print(f"- ID: {row[0]}, Usuario: {row[1]}, Email: {row[2]}, "
                   f"Calificación: {row[3]}, Fecha: {row[4]}")
         
-        print(f"\nTabla 'tabla_unificada_2025' creada exitosamente")
+        print(f"\nTabla '{nombre_tabla}' creada exitosamente")
+        
+        if directorio_exportacion:
+            with etapa('exportacion'):
+                exportadas = exportar_ventana(conn, meses, directorio_exportacion)
+            print(f"Exportación columnar en '{directorio_exportacion}': "
+                  f"{', '.join(exportadas) if exportadas else 'sin cambios'}")
+        return True
         
     except Exception as e:
         print(f"Error: {str(e)}")
+        return False
     
     finally:
-        if 'conn' in locals():
+        if propia and conn is not None:
             conn.close()
 
+def agregar_argumentos_punto3(parser):
+    """Agrega las opciones del Punto 3 a un parser de argparse (también las usa ejecutar_puntos.py)"""
+    parser.add_argument('--desde', default=FECHA_INICIO, help=f"Fecha inicial incluida (por defecto {FECHA_INICIO})")
+    parser.add_argument('--hasta', default=FECHA_FIN, help=f"Fecha final excluida (por defecto {FECHA_FIN})")
+    parser.add_argument('--tabla', default=TABLA_POR_DEFECTO,
+                        help=f"Nombre de la tabla/vista resultante (por defecto {TABLA_POR_DEFECTO})")
+    parser.add_argument('--reconstruir', action='store_true',
+                        help="Reconstruye todas las particiones de la ventana aunque no hayan cambiado")
+    parser.add_argument('--exportar', nargs='?', const=DIRECTORIO_EXPORTACION, default=None, metavar='DIRECTORIO',
+                        help=f"Exporta las particiones en formato columnar (por defecto en {DIRECTORIO_EXPORTACION})")
+    parser.add_argument('--archivos-mensuales', nargs='?', const='', default=None, metavar='DIRECTORIO',
+                        help=f"Calcula las estadísticas en paralelo sobre los archivos SQLite por mes "
+                             f"(por defecto en {NOMBRE_DIRECTORIO} junto a la base; ver archivos_mensuales.py)")
+
+def main():
+    """Lee la ventana de fechas de la línea de comandos y ejecuta el Punto 3"""
+    parser = argparse.ArgumentParser(description="Construye la tabla unificada de encuestas y usuarios")
+    agregar_argumentos_punto3(parser)
+    agregar_argumentos_instrumentacion(parser, 'reporte_punto3.json')
+    args = parser.parse_args()
+    iniciar_desde_argumentos(args, 'ejecutar_punto3')
+    ejecutar_punto3(args.desde, args.hasta, args.tabla, args.reconstruir, args.exportar,
+                    directorio_mensual=args.archivos_mensuales)
+    finalizar_desde_argumentos(args)
+
 if __name__ == "__main__":
-    ejecutar_punto3()
+    main()
@@ -0,0 +1,243 @@
+"""
+Exportación columnar de la tabla unificada, particionada por año_mes.
+
+Cada partición mensual (tabla_unificada_YYYY_MM) se escribe en su propio archivo
+<directorio>/año_mes=YYYY-MM/datos.tuc con este formato:
+
+    MAGIA | bloques de columnas | pie JSON | longitud del pie (uint32 LE) | MAGIA
+
+El pie describe cada columna: tipo (int64, float64 o texto), codificación (plana o
+diccionario), posición y longitud de cada bloque, compresión (zlib o ninguna) y el
+mapa de nulos si hay. Los enteros y reales se guardan como arreglos binarios, el texto
+plano como offsets + bytes UTF-8 y las columnas de baja cardinalidad como códigos sobre
+un diccionario que va en el pie. Un bloque solo queda comprimido si zlib lo reduce.
+
+El lector abre el archivo con mmap y toca solo los bytes de las columnas pedidas.
+No se usa pyarrow porque no es una dependencia del proyecto; el formato está pensado
+para que sea simple de leer desde cualquier lenguaje.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+MAGIA = b'TUC1'
+NOMBRE_ARCHIVO = 'datos.tuc'
+
+# Columnas de baja cardinalidad que se guardan con codificación de diccionario
+COLUMNAS_DICCIONARIO = ['estado', 'descripcion_cuestionario', 'descripcion_calificacion',
+                        'año', 'mes', 'año_mes']
+
+# Un bloque se guarda comprimido solo si zlib lo deja por debajo de esta fracción
+UMBRAL_COMPRESION = 0.9
+NIVEL_ZLIB = 6
+
+def ruta_particion(directorio, anio_mes):
+    """Ruta del archivo columnar de un mes"""
+    return os.path.join(directorio, f"año_mes={anio_mes}", NOMBRE_ARCHIVO)
+
+def inferir_tipo(valores):
+    """int64 si todos los valores no nulos son enteros, float64 si son numéricos, texto si no"""
+    tipos = {type(valor) for valor in valores if valor is not None}
+    if tipos <= {int}:
+        return 'int64'
+    if tipos <= {int, float}:
+        return 'float64'
+    return 'texto'
+
+def mapa_nulos(valores):
+    """Bitmap de valores presentes (bit en 1 = no nulo), o None si no hay nulos"""
+    if all(valor is not None for valor in valores):
+        return None
+    bits = bytearray((len(valores) + 7) // 8)
+    for i, valor in enumerate(valores):
+        if valor is not None:
+            bits[i >> 3] |= 1 << (i & 7)
+    return bytes(bits)
+
+def codificar_columna(valores, tipo, diccionario):
+    """Convierte una columna en sus bloques binarios: {nombre_bloque: bytes}, metadatos extra"""
+    extra = {}
+    if diccionario:
+        valores_diccionario = sorted({str(v) for v in valores if v is not None})
+        posicion = {valor: i for i, valor in enumerate(valores_diccionario)}
+        codigo = 'B' if len(valores_diccionario) <= 0xFF else 'H' if len(valores_diccionario) <= 0xFFFF else 'i'
+        codigos = array(codigo, (0 if v is None else posicion[str(v)] for v in valores))
+        extra = {'diccionario': valores_diccionario, 'tipo_codigo': codigo}
+        return {'codigos': codigos.tobytes()}, extra
+    if tipo == 'int64':
+        return {'valores': array('q', (v or 0 for v in valores)).tobytes()}, extra
+    if tipo == 'float64':
+        return {'valores': array('d', (v or 0.0 for v in valores)).tobytes()}, extra
+
+    textos = [b'' if v is None else str(v).encode('utf-8') for v in valores]
+    offsets = array('q', [0])
+    total = 0
+    for texto in textos:
+        total += len(texto)
+        offsets.append(total)
+    return {'offsets': offsets.tobytes(), 'datos': b''.join(textos)}, extra
+
+def escribir_bloque(archivo, contenido):
+    """Escribe un bloque (comprimido si conviene) y devuelve su descripción para el pie"""
+    compresion = 'ninguna'
+    comprimido = zlib.compress(contenido, NIVEL_ZLIB)
+    if len(comprimido) < UMBRAL_COMPRESION * len(contenido):
+        contenido, compresion = comprimido, 'zlib'
+    descripcion = {'offset': archivo.tell(), 'longitud': len(contenido), 'compresion': compresion}
+    archivo.write(contenido)
+    return descripcion
+
+def escribir_archivo_columnar(ruta, columnas, filas, metadatos=None):
+    """Escribe un archivo columnar
+
+    columnas es la lista de nombres y filas una lista de tuplas en ese orden.
+    metadatos se agrega tal cual al pie (p. ej. la marca de agua de la partición).
+    El archivo se escribe en una ruta temporal y se renombra al terminar.
+    """
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    pie = {
+        'version': 1,
+        'orden_bytes': sys.byteorder,
+        'filas': len(filas),
+        'metadatos': metadatos or {},
+        'columnas': []
+    }
+    with open(temporal, 'wb') as archivo:
+        archivo.write(MAGIA)
+        for i, nombre in enumerate(columnas):
+            valores = [fila[i] for fila in filas]
+            tipo = inferir_tipo(valores)
+            diccionario = nombre in COLUMNAS_DICCIONARIO
+            bloques, extra = codificar_columna(valores, tipo, diccionario)
+            nulos = mapa_nulos(valores)
+            if nulos is not None:
+                bloques['nulos'] = nulos
+            descripcion = {
+                'nombre': nombre,
+                'tipo': 'texto' if diccionario else tipo,
+                'codificacion': 'diccionario' if diccionario else 'plana',
+                'bloques': {bloque: escribir_bloque(archivo, contenido) for bloque, contenido in bloques.items()}
+            }
+            descripcion.update(extra)
+            pie['columnas'].append(descripcion)
+
+        pie_bytes = json.dumps(pie, ensure_ascii=False).encode('utf-8')
+        archivo.write(pie_bytes)
+        archivo.write(struct.pack('<I', len(pie_bytes)))
+        archivo.write(MAGIA)
+    os.replace(temporal, ruta)
+
+def leer_metadatos(ruta):
+    """Lee solo el pie del archivo columnar"""
+    with open(ruta, 'rb') as archivo:
+        archivo.seek(-8, os.SEEK_END)
+        longitud, magia = struct.unpack('<I4s', archivo.read(8))
+        if magia != MAGIA:
+            raise ValueError(f"{ruta} no es un archivo columnar de la tabla unificada")
+        archivo.seek(-8 - longitud, os.SEEK_END)
+        return json.loads(archivo.read(longitud).decode('utf-8'))
+
+def _bloque(datos, descripcion):
+    """Bytes de un bloque: vista directa sobre el mmap o bytes descomprimidos"""
+    vista = datos[descripcion['offset']:descripcion['offset'] + descripcion['longitud']]
+    if descripcion['compresion'] == 'zlib':
+        return zlib.decompress(vista)
+    return vista
+
+def _arreglo(contenido, codigo, orden_bytes):
+    """array del tipo indicado a partir de los bytes del bloque"""
+    valores = array(codigo)
+    valores.frombytes(contenido)
+    if orden_bytes != sys.byteorder:
+        valores.byteswap()
+    return valores
+
+def _decodificar(datos, columna, filas, orden_bytes):
+    """Reconstruye los valores de una columna como lista (con None) o array (sin nulos)"""
+    bloques = columna['bloques']
+    if columna['codificacion'] == 'diccionario':
+        diccionario = columna['diccionario']
+        codigos = _arreglo(_bloque(datos, bloques['codigos']), columna['tipo_codigo'], orden_bytes)
+        valores = [diccionario[codigo] for codigo in codigos]
+    elif columna['tipo'] in ('int64', 'float64'):
+        codigo = 'q' if columna['tipo'] == 'int64' else 'd'
+        valores = _arreglo(_bloque(datos, bloques['valores']), codigo, orden_bytes)
+    else:
+        offsets = _arreglo(_bloque(datos, bloques['offsets']), 'q', orden_bytes)
+        texto = bytes(_bloque(datos, bloques['datos']))
+        valores = [texto[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(filas)]
+
+    if 'nulos' in bloques:
+        nulos = _bloque(datos, bloques['nulos'])
+        valores = [valor if nulos[i >> 3] & (1 << (i & 7)) else None for i, valor in enumerate(valores)]
+    return valores
+
+def leer_columnas(ruta, columnas=None):
+    """Lee las columnas pedidas (todas si columnas es None) de un archivo columnar
+
+    Devuelve {nombre: valores}. Las columnas numéricas sin nulos vienen como array('q')
+    o array('d'); el resto como listas con None en los nulos.
+    """
+    pie = leer_metadatos(ruta)
+    por_nombre = {columna['nombre']: columna for columna in pie['columnas']}
+    pedidas = list(por_nombre) if columnas is None else columnas
+    faltantes = [nombre for nombre in pedidas if nombre not in por_nombre]
+    if faltantes:
+        raise KeyError(f"Columnas inexistentes en {ruta}: {', '.join(faltantes)}")
+
+    with open(ruta, 'rb') as archivo:
+        with mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            vista = memoryview(datos)
+            try:
+                return {nombre: _decodificar(vista, por_nombre[nombre], pie['filas'], pie['orden_bytes'])
+                        for nombre in pedidas}
+            finally:
+                vista.release()
+
+def listar_particiones(directorio):
+    """Meses 'YYYY-MM' exportados en el directorio, ordenados"""
+    if not os.path.isdir(directorio):
+        return []
+    return sorted(nombre.split('=', 1)[1] for nombre in os.listdir(directorio)
+                  if nombre.startswith('año_mes=') and os.path.exists(os.path.join(directorio, nombre, NOMBRE_ARCHIVO)))
+
+def leer_dataset(directorio, columnas=None, meses=None):
+    """Lee columnas de varias particiones y las concatena
+
+    meses limita las particiones leídas (todas por defecto). Devuelve {nombre: lista}.
+    """
+    resultado = {}
+    for anio_mes in meses or listar_particiones(directorio):
+        for nombre, valores in leer_columnas(ruta_particion(directorio, anio_mes), columnas).items():
+            resultado.setdefault(nombre, []).extend(valores)
+    return resultado
+
+def exportar_particion(conn, tabla, ruta, marca):
+    """Escribe una partición de SQLite como archivo columnar guardando su marca de agua"""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {tabla}")
+    columnas = [descripcion[0] for descripcion in cursor.description]
+    filas = cursor.fetchall()
+    escribir_archivo_columnar(ruta, columnas, filas, {
+        'tabla': tabla,
+        'filas_fuente': marca[0],
+        'max_id_encuesta': marca[1],
+        'ultimo_cambio': marca[2],
+        'generacion': marca[3],
+        'version_dimensiones': marca[4]
+    })
+    return len(filas)
+
+def exportacion_vigente(ruta, marca):
+    """Indica si el archivo exportado corresponde a la marca de agua actual de la partición"""
+    if not os.path.exists(ruta):
+        return False
+    metadatos = leer_metadatos(ruta)['metadatos']
+    return (metadatos.get('filas_fuente'), metadatos.get('max_id_encuesta'), metadatos.get('ultimo_cambio', 0),
+            metadatos.get('generacion', ''), metadatos.get('version_dimensiones', 0)) == tuple(marca)
@@ -0,0 +1,255 @@
+"""
+Extracción por streaming de encuestas y de la tabla unificada.
+
+En vez de traer todo con fetchall(), las filas se leen por páginas con paginación
+keyset (cada página continúa después de la última llave leída, sin OFFSET) y cada
+página se recorre con fetchmany, así la memoria depende del tamaño de página y no
+del tamaño de la tabla. Ninguna lectura mantiene abierta una transacción más que lo
+que dura una página, de modo que una extracción larga no bloquea a la carga.
+
+Llaves de paginación:
+- encuestas: id_encuesta (la PK) o (fecha_insercion, id_encuesta) usando el índice
+  de fecha_insercion. Las filas sin fecha_insercion salen primero, como en un ORDER BY.
+- tabla unificada: se recorren las particiones mensuales del Punto 3 por rowid, del
+  mes más reciente al más antiguo (cada partición se construye en fecha_insercion DESC).
+
+Las filas se entregan como tuplas (lo más liviano) o como objetos de una clase con
+__slots__ creada para las columnas pedidas (acceso por atributo, sin el diccionario
+por fila de sqlite3.Row). escribir_csv y escribir_jsonl consumen el generador fila
+a fila.
+
+Uso:
+    python extraccion_streaming.py --fuente tabla_unificada --formato jsonl --salida tabla.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+from itertools import starmap
+
+from ejecutar_punto3 import FECHA_INICIO, FECHA_FIN, conectar_bd, validar_fecha, meses_en_rango, nombre_particion
+
+# Memoria pico del proceso, con la misma medición del cargador del Punto 2
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Punto 2'))
+from instrumentacion import memoria_pico_mb
+
+TAMANO_PAGINA = 5000
+TAMANO_FETCH = 1000
+
+ORDENES_ENCUESTAS = ['id_encuesta', 'fecha_insercion']
+FORMAS = ['tupla', 'objeto']
+FORMATOS = ['csv', 'jsonl']
+
+@lru_cache(maxsize=None)
+def clase_fila(columnas):
+    """Clase liviana con __slots__ para una tupla de nombres de columna
+
+    Se construye con los valores en el orden de las columnas: Fila(*tupla).
+    """
+    invalidas = [nombre for nombre in columnas if not nombre.isidentifier() or nombre.startswith('_')]
+    if invalidas:
+        raise ValueError(f"Columnas que no sirven como atributo: {', '.join(invalidas)}")
+    parametros = ', '.join(columnas)
+    asignaciones = ''.join(f"\n    self.{nombre} = {nombre}" for nombre in columnas) or "\n    pass"
+    espacio = {}
+    exec(f"def __init__(self, {parametros}):{asignaciones}", espacio)
+
+    def __iter__(self):
+        return (getattr(self, nombre) for nombre in columnas)
+
+    def __repr__(self):
+        return f"Fila({', '.join(f'{nombre}={getattr(self, nombre)!r}' for nombre in columnas)})"
+
+    def como_dict(self):
+        return {nombre: getattr(self, nombre) for nombre in columnas}
+
+    return type('Fila', (), {'__slots__': columnas, '__init__': espacio['__init__'], '__iter__': __iter__,
+                             '__repr__': __repr__, 'como_dict': como_dict, 'columnas': columnas})
+
+def columnas_tabla(conn, tabla):
+    cursor = conn.execute(f"PRAGMA table_info({tabla})")
+    return [fila[1] for fila in cursor.fetchall()]
+
+def validar_columnas(conn, tabla, columnas):
+    """Columnas pedidas (o todas) verificadas contra el esquema de la tabla"""
+    existentes = columnas_tabla(conn, tabla)
+    if not columnas:
+        return existentes
+    desconocidas = [columna for columna in columnas if columna not in existentes]
+    if desconocidas:
+        raise ValueError(f"Columnas que no existen en {tabla}: {', '.join(desconocidas)}")
+    return list(columnas)
+
+def paginas_keyset(conn, tabla, columnas, llave, condiciones=(), valores=(), condicion_inicial=None,
+                   tamano_pagina=TAMANO_PAGINA, tamano_fetch=TAMANO_FETCH):
+    """Genera las filas (tuplas) de tabla, página por página, en el orden de llave
+
+    llave es la lista de columnas de la llave (la última debe ser única). Cada página
+    agrega 'llave > última llave leída' a las condiciones. Las columnas de la llave que
+    no estén en columnas se seleccionan al final y se quitan antes de entregar la fila.
+    """
+    seleccion = list(columnas) + [columna for columna in llave if columna not in columnas]
+    posiciones = [seleccion.index(columna) for columna in llave]
+    recortar = len(seleccion) > len(columnas)
+    orden = ', '.join(llave)
+    comparacion = f"({orden}) > ({', '.join('?' for _ in llave)})" if len(llave) > 1 else f"{llave[0]} > ?"
+    base = f"SELECT {', '.join(seleccion)} FROM {tabla}"
+
+    ultima = None
+    while True:
+        filtros = list(condiciones)
+        parametros = list(valores)
+        if ultima is None:
+            if condicion_inicial:
+                filtros.append(condicion_inicial)
+        else:
+            filtros.append(comparacion)
+            parametros.extend(ultima)
+        donde = f" WHERE {' AND '.join(filtros)}" if filtros else ""
+        cursor = conn.execute(f"{base}{donde} ORDER BY {orden} LIMIT ?", parametros + [tamano_pagina])
+
+        leidas = 0
+        fila = None
+        while True:
+            lote = cursor.fetchmany(tamano_fetch)
+            if not lote:
+                break
+            leidas += len(lote)
+            fila = lote[-1]
+            if recortar:
+                yield from (tuple(fila[:len(columnas)]) for fila in lote)
+            else:
+                yield from lote
+        if leidas < tamano_pagina:
+            return
+        ultima = [fila[posicion] for posicion in posiciones]
+
+def con_forma(columnas, filas, forma):
+    """Entrega las filas como tuplas u objetos con __slots__"""
+    if forma == 'objeto':
+        return starmap(clase_fila(tuple(columnas)), filas)
+    return filas
+
+def iterar_encuestas(conn, orden='id_encuesta', desde=None, hasta=None, columnas=None, forma='tupla',
+                     tamano_pagina=TAMANO_PAGINA, tamano_fetch=TAMANO_FETCH):
+    """Streaming de la tabla encuestas; devuelve (columnas, generador de filas)
+
+    desde/hasta filtran fecha_insercion en el rango [desde, hasta).
+    """
+    if orden not in ORDENES_ENCUESTAS:
+        raise ValueError(f"orden debe ser uno de {ORDENES_ENCUESTAS}")
+    columnas = validar_columnas(conn, 'encuestas', columnas)
+    condiciones, valores = [], []
+    if desde:
+        condiciones.append("fecha_insercion >= ?")
+        valores.append(desde)
+    if hasta:
+        condiciones.append("fecha_insercion < ?")
+        valores.append(hasta)
+
+    def generar():
+        if orden == 'id_encuesta':
+            yield from paginas_keyset(conn, 'encuestas', columnas, ['id_encuesta'], condiciones, valores,
+                                      tamano_pagina=tamano_pagina, tamano_fetch=tamano_fetch)
+            return
+        # (NULL, id) no se puede comparar con >, así que las filas sin fecha van en una pasada aparte
+        if not condiciones:
+            yield from paginas_keyset(conn, 'encuestas', columnas, ['id_encuesta'], ["fecha_insercion IS NULL"],
+                                      tamano_pagina=tamano_pagina, tamano_fetch=tamano_fetch)
+        yield from paginas_keyset(conn, 'encuestas', columnas, ['fecha_insercion', 'id_encuesta'],
+                                  condiciones, valores, condicion_inicial="fecha_insercion IS NOT NULL",
+                                  tamano_pagina=tamano_pagina, tamano_fetch=tamano_fetch)
+
+    return columnas, con_forma(columnas, generar(), forma)
+
+def iterar_tabla_unificada(conn, desde=FECHA_INICIO, hasta=FECHA_FIN, columnas=None, forma='tupla',
+                           tamano_pagina=TAMANO_PAGINA, tamano_fetch=TAMANO_FETCH):
+    """Streaming de la ventana [desde, hasta) desde las particiones mensuales del Punto 3
+
+    Devuelve (columnas, generador de filas) en orden de fecha_insercion descendente.
+    """
+    desde, hasta = validar_fecha(desde), validar_fecha(hasta)
+    existentes = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    particiones = [nombre_particion(anio_mes) for anio_mes in reversed(meses_en_rango(desde, hasta))]
+    faltantes = [tabla for tabla in particiones if tabla not in existentes]
+    if faltantes:
+        raise RuntimeError(f"Faltan particiones ({', '.join(faltantes)}). Ejecuta primero ejecutar_punto3.py")
+    columnas = validar_columnas(conn, particiones[0], columnas)
+
+    def generar():
+        for tabla in particiones:
+            yield from paginas_keyset(conn, tabla, columnas, ['rowid'],
+                                      ["fecha_insercion >= ?", "fecha_insercion < ?"], [desde, hasta],
+                                      tamano_pagina=tamano_pagina, tamano_fetch=tamano_fetch)
+
+    return columnas, con_forma(columnas, generar(), forma)
+
+def escribir_csv(ruta, columnas, filas, delimitador=';'):
+    """Escribe las filas en CSV (mismo formato que los archivos de entrada); devuelve la cantidad"""
+    cantidad = 0
+    with open(ruta, 'w', encoding='utf-8-sig', newline='') as archivo:
+        escritor = csv.writer(archivo, delimiter=delimitador)
+        escritor.writerow(columnas)
+        for fila in filas:
+            escritor.writerow(fila)
+            cantidad += 1
+    return cantidad
+
+def escribir_jsonl(ruta, columnas, filas):
+    """Escribe un objeto JSON por línea; devuelve la cantidad"""
+    cantidad = 0
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        for fila in filas:
+            archivo.write(json.dumps(dict(zip(columnas, fila)), ensure_ascii=False))
+            archivo.write('\n')
+            cantidad += 1
+    return cantidad
+
+def main():
+    """Extrae encuestas o la tabla unificada a CSV o JSONL en memoria acotada"""
+    parser = argparse.ArgumentParser(description="Extracción por streaming con paginación keyset")
+    parser.add_argument('--fuente', choices=['encuestas', 'tabla_unificada'], default='tabla_unificada')
+    parser.add_argument('--orden', choices=ORDENES_ENCUESTAS, default='id_encuesta',
+                        help="Llave de paginación de encuestas (la tabla unificada va por fecha descendente)")
+    parser.add_argument('--desde', default=None, help=f"Fecha inicial incluida (tabla unificada: {FECHA_INICIO})")
+    parser.add_argument('--hasta', default=None, help=f"Fecha final excluida (tabla unificada: {FECHA_FIN})")
+    parser.add_argument('--columnas', nargs='+', default=None, help="Columnas a extraer (por defecto todas)")
+    parser.add_argument('--formato', choices=FORMATOS, default='csv')
+    parser.add_argument('--salida', default=None, help="Archivo de salida (por defecto <fuente>.<formato>)")
+    parser.add_argument('--tamano-pagina', type=int, default=TAMANO_PAGINA)
+    args = parser.parse_args()
+
+    salida = args.salida or f"{args.fuente}.{args.formato}"
+    try:
+        conn = conectar_bd()
+        conn.row_factory = None
+        inicio = time.perf_counter()
+        if args.fuente == 'encuestas':
+            desde = validar_fecha(args.desde) if args.desde else None
+            hasta = validar_fecha(args.hasta) if args.hasta else None
+            columnas, filas = iterar_encuestas(conn, args.orden, desde, hasta, args.columnas,
+                                               tamano_pagina=args.tamano_pagina)
+        else:
+            columnas, filas = iterar_tabla_unificada(conn, args.desde or FECHA_INICIO, args.hasta or FECHA_FIN,
+                                                     args.columnas, tamano_pagina=args.tamano_pagina)
+        escribir = escribir_csv if args.formato == 'csv' else escribir_jsonl
+        cantidad = escribir(salida, columnas, filas)
+        segundos = time.perf_counter() - inicio
+
+        print(f"{cantidad:,} filas de {args.fuente} escritas en {salida} en {segundos:.2f} s "
+              f"({cantidad / segundos if segundos > 0 else 0:,.0f} filas/seg)")
+        memoria = memoria_pico_mb()
+        if memoria is not None:
+            print(f"   - Memoria pico (RSS): {memoria:.1f} MB")
+    except Exception as e:
+        print(f"Error: {str(e)}")
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+if __name__ == "__main__":
+    main()
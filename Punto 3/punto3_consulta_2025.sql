@@ -1,15 +1,20 @@
 -- PUNTO 3: Consulta para crear tabla unificada
 -- Información de encuestas y usuarios para Junio, Julio y Agosto 2025
 
+-- Índice para filtrar por rango de fecha_insercion y ordenar sin un paso extra
+CREATE INDEX IF NOT EXISTS idx_encuestas_fecha_insercion
+ON encuestas (fecha_insercion, id_calificacion);
+
 -- Crear tabla unificada con información de encuestas y usuarios
 CREATE TABLE IF NOT EXISTS tabla_unificada_2025 AS
 SELECT 
     e.id_encuesta,
     e.id_estado_encuesta,
-    e.estado,
+    de.estado,
     e.id_cuestionario,
-    e.descripcion_cuestionario,
-    e.calificacion,
+    dq.descripcion AS descripcion_cuestionario,
+    e.id_calificacion,
+    dc.calificacion AS calificacion_valor,
     dc.descripcion AS descripcion_calificacion,
     e.fecha_limite,
     e.fecha_creado,
@@ -26,11 +31,13 @@ SELECT
     strftime('%Y-%m', e.fecha_insercion) AS año_mes
 FROM encuestas e
 INNER JOIN usuarios u ON e.usuario_id = u.id_usuario
-LEFT JOIN dimension_calificaciones dc ON e.calificacion = dc.calificacion
+LEFT JOIN dimension_estados de ON e.id_estado_encuesta = de.id_estado_encuesta
+LEFT JOIN dimension_cuestionarios dq ON e.id_cuestionario = dq.id_cuestionario
+LEFT JOIN dimension_calificaciones dc ON e.id_calificacion = dc.id_calificacion
 WHERE 
-    strftime('%Y', e.fecha_insercion) = '2025'
-    AND strftime('%m', e.fecha_insercion) IN ('06', '07', '08')
-    AND e.calificacion IS NOT NULL
+    e.fecha_insercion >= '2025-06-01'
+    AND e.fecha_insercion < '2025-09-01'
+    AND e.id_calificacion IS NOT NULL
 ORDER BY e.fecha_insercion DESC;
 
 -- Verificar la tabla creada
@@ -39,7 +46,7 @@ SELECT
     COUNT(*) AS total_registros,
     COUNT(DISTINCT usuario_id) AS usuarios_unicos,
     COUNT(DISTINCT id_cuestionario) AS tipos_cuestionario,
-    AVG(calificacion) AS calificacion_promedio,
+    AVG(calificacion_valor) AS calificacion_promedio,
     MIN(fecha_insercion) AS fecha_mas_antigua,
     MAX(fecha_insercion) AS fecha_mas_reciente
 FROM tabla_unificada_2025;
@@ -51,7 +58,7 @@ SELECT
     email,
     estado,
     id_cuestionario,
-    calificacion,
+    calificacion_valor,
     descripcion_calificacion,
     fecha_insercion
 FROM tabla_unificada_2025
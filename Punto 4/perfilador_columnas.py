@@ -0,0 +1,125 @@
+"""
+Perfilador de columnas en una sola pasada para el diccionario de datos.
+
+Recorre la tabla una vez, por bloques, y para cada columna calcula nulos, mínimo,
+máximo, cantidad aproximada de valores distintos (HyperLogLog, el mismo sketch de
+los resúmenes del Punto 2) y los valores más frecuentes con el algoritmo space-saving.
+La memoria por columna es fija (registros del HLL + CAPACIDAD_TOP_K contadores),
+sin importar cuántas filas tenga la tabla.
+
+Requiere que el directorio 'Punto 2' esté en sys.path (lo agrega punto4_diccionario_datos.py).
+"""
+
+import heapq
+
+from rollups_encuestas import hll_vacio, hll_agregar, hll_estimar
+
+# Filas que se traen de SQLite en cada fetchmany
+TAMANO_BLOQUE = 5000
+
+# Contadores que mantiene el space-saving por columna; se reportan los TOP_K primeros
+CAPACIDAD_TOP_K = 1000
+TOP_K = 10
+
+def clave_orden(valor):
+    """Orden entre tipos igual al de SQLite: números antes que texto y texto antes que BLOB"""
+    if isinstance(valor, (int, float)):
+        return (0, valor)
+    if isinstance(valor, str):
+        return (1, valor)
+    return (2, valor)
+
+def nuevo_top_k():
+    """Estado vacío del sketch space-saving"""
+    return {'contadores': {}, 'heap': []}
+
+def top_k_agregar(sketch, valor):
+    """Cuenta una aparición de valor
+
+    contadores guarda valor -> [frecuencia, error]. El heap lleva (frecuencia, valor) con
+    entradas viejas que se descartan al sacar el mínimo, así reemplazar el contador más
+    chico no requiere recorrer todos.
+    """
+    contadores, heap = sketch['contadores'], sketch['heap']
+    contador = contadores.get(valor)
+    if contador is not None:
+        contador[0] += 1
+        heapq.heappush(heap, (contador[0], clave_orden(valor), valor))
+    elif len(contadores) < CAPACIDAD_TOP_K:
+        contadores[valor] = [1, 0]
+        heapq.heappush(heap, (1, clave_orden(valor), valor))
+    else:
+        while True:
+            frecuencia, _, minimo = heapq.heappop(heap)
+            if minimo in contadores and contadores[minimo][0] == frecuencia:
+                break
+        del contadores[minimo]
+        contadores[valor] = [frecuencia + 1, frecuencia]
+        heapq.heappush(heap, (frecuencia + 1, clave_orden(valor), valor))
+
+    # Compactar el heap cuando las entradas viejas superan a las vigentes
+    if len(heap) > 4 * CAPACIDAD_TOP_K:
+        sketch['heap'] = [(f, clave_orden(v), v) for v, (f, _) in contadores.items()]
+        heapq.heapify(sketch['heap'])
+
+def top_k_resultado(sketch, cantidad=TOP_K):
+    """Los valores más frecuentes como lista de {valor, frecuencia, error_maximo}
+
+    Se omiten los contadores cuyo error supera a la parte garantizada de la frecuencia:
+    en columnas casi únicas (ids, fechas) son solo los últimos valores vistos.
+    """
+    confiables = [(valor, frecuencia, error) for valor, (frecuencia, error) in sketch['contadores'].items()
+                  if frecuencia - error > error]
+    confiables.sort(key=lambda item: (-item[1], clave_orden(item[0])))
+    return [{'valor': valor, 'frecuencia': frecuencia, 'error_maximo': error}
+            for valor, frecuencia, error in confiables[:cantidad]]
+
+def nuevo_perfil():
+    """Estado vacío del perfil de una columna"""
+    return {'nulos': 0, 'minimo': None, 'maximo': None, 'hll': hll_vacio(), 'top_k': nuevo_top_k()}
+
+def perfilar_valor(perfil, valor):
+    """Incorpora un valor al perfil de la columna"""
+    if valor is None:
+        perfil['nulos'] += 1
+        return
+    orden = clave_orden(valor)
+    if perfil['minimo'] is None or orden < clave_orden(perfil['minimo']):
+        perfil['minimo'] = valor
+    if perfil['maximo'] is None or orden > clave_orden(perfil['maximo']):
+        perfil['maximo'] = valor
+    hll_agregar(perfil['hll'], valor)
+    top_k_agregar(perfil['top_k'], valor)
+
+def perfilar_tabla(conn, tabla):
+    """Perfila todas las columnas de la tabla con un único SELECT
+
+    Devuelve (total_filas, {columna: perfil}) con el perfil listo para JSON.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {tabla}")
+    columnas = [descripcion[0] for descripcion in cursor.description]
+    perfiles = [nuevo_perfil() for _ in columnas]
+
+    total_filas = 0
+    while True:
+        bloque = cursor.fetchmany(TAMANO_BLOQUE)
+        if not bloque:
+            break
+        total_filas += len(bloque)
+        for fila in bloque:
+            for perfil, valor in zip(perfiles, fila):
+                perfilar_valor(perfil, valor)
+
+    resultado = {}
+    for columna, perfil in zip(columnas, perfiles):
+        no_nulos = total_filas - perfil['nulos']
+        resultado[columna] = {
+            'nulos': perfil['nulos'],
+            'porcentaje_nulos': round(100 * perfil['nulos'] / total_filas, 2) if total_filas else 0,
+            'minimo': perfil['minimo'],
+            'maximo': perfil['maximo'],
+            'distintos_aproximados': min(hll_estimar(perfil['hll']), no_nulos) if no_nulos else 0,
+            'valores_frecuentes': top_k_resultado(perfil['top_k'])
+        }
+    return total_filas, resultado
@@ -0,0 +1,177 @@
+"""
+Prueba de carga local del servicio de consultas (servicio_consultas.py).
+
+Levanta el servicio en un proceso aparte (o usa uno ya levantado con --url), abre
+varios clientes concurrentes con conexiones keep-alive y reparte entre ellos una
+mezcla de peticiones típicas de un tablero: páginas de la tabla unificada por mes y
+por cuestionario, encuestas de un usuario, un usuario y el resumen del trimestre.
+Los usuarios se eligen al azar entre los de la base, así una parte de las
+peticiones se repite (y sale de la caché) y otra no.
+
+Reporta peticiones por segundo, latencias p50/p95/p99 por endpoint y en total, y
+la tasa de aciertos de la caché que informa /salud.
+
+Uso:
+    python prueba_carga_servicio.py --clientes 50 --peticiones 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from servicio_consultas import RUTA_BD, LIMITE_POR_DEFECTO
+
+MESES = ['2025-06', '2025-07', '2025-08']
+FIN_MES = {'2025-06': '2025-07-01', '2025-07': '2025-08-01', '2025-08': '2025-09-01'}
+
+def usuarios_de_muestra(ruta_bd, cantidad, aleatorio):
+    """usuario_id al azar entre los que tienen encuestas"""
+    conn = sqlite3.connect(f"file:{ruta_bd}?mode=ro", uri=True)
+    ids = [fila[0] for fila in conn.execute("SELECT id_usuario FROM usuarios")]
+    conn.close()
+    return aleatorio.sample(ids, min(cantidad, len(ids))) if ids else [1]
+
+def generar_peticiones(cantidad, usuarios, aleatorio):
+    """Lista de (endpoint, ruta) con la mezcla de la prueba"""
+    peticiones = []
+    for _ in range(cantidad):
+        tipo = aleatorio.random()
+        mes = aleatorio.choice(MESES)
+        if tipo < 0.35:
+            ruta = (f"/tabla_unificada?desde={mes}-01&hasta={FIN_MES[mes]}"
+                    f"&id_cuestionario={aleatorio.randint(1, 3)}&limite={LIMITE_POR_DEFECTO}")
+            peticiones.append(('tabla_unificada', ruta))
+        elif tipo < 0.65:
+            peticiones.append(('encuestas', f"/encuestas?usuario_id={aleatorio.choice(usuarios)}&limite=50"))
+        elif tipo < 0.85:
+            peticiones.append(('usuarios', f"/usuarios/{aleatorio.choice(usuarios)}"))
+        else:
+            peticiones.append(('resumen', f"/resumen?meses={','.join(MESES)}"))
+    return peticiones
+
+async def pedir(lector, escritor, host, ruta):
+    """Hace un GET por una conexión abierta y devuelve (código, cuerpo)"""
+    escritor.write(f"GET {ruta} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('ascii'))
+    await escritor.drain()
+    linea = await lector.readline()
+    codigo = int(linea.split()[1])
+    largo = 0
+    while True:
+        cabecera = await lector.readline()
+        if cabecera in (b'\r\n', b''):
+            break
+        nombre, _, valor = cabecera.decode('latin-1').partition(':')
+        if nombre.strip().lower() == 'content-length':
+            largo = int(valor)
+    return codigo, await lector.readexactly(largo)
+
+async def cliente(host, puerto, cola, latencias, errores):
+    """Toma peticiones de la cola hasta vaciarla, por una sola conexión keep-alive"""
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    try:
+        while True:
+            try:
+                endpoint, ruta = cola.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            inicio = time.perf_counter()
+            codigo, _ = await pedir(lector, escritor, host, ruta)
+            latencias.setdefault(endpoint, []).append(time.perf_counter() - inicio)
+            if codigo != 200:
+                errores[codigo] = errores.get(codigo, 0) + 1
+    finally:
+        escritor.close()
+
+async def consultar_salud(host, puerto):
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    try:
+        _, cuerpo = await pedir(lector, escritor, host, '/salud')
+        return json.loads(cuerpo)
+    finally:
+        escritor.close()
+
+async def ejecutar_prueba(host, puerto, peticiones, clientes):
+    """Corre la prueba y devuelve (segundos, latencias por endpoint, errores, salud)"""
+    cola = asyncio.Queue()
+    for peticion in peticiones:
+        cola.put_nowait(peticion)
+    latencias, errores = {}, {}
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(host, puerto, cola, latencias, errores) for _ in range(clientes)))
+    segundos = time.perf_counter() - inicio
+    return segundos, latencias, errores, await consultar_salud(host, puerto)
+
+def percentil(valores, p):
+    """Percentil p (0-100) por el método del rango más cercano"""
+    ordenados = sorted(valores)
+    return ordenados[max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados)) - 1))]
+
+def imprimir_resultados(segundos, latencias, errores, salud):
+    total = sum(len(valores) for valores in latencias.values())
+    print(f"\n{total:,} peticiones en {segundos:.2f} s ({total / segundos:,.0f} peticiones/seg)")
+    print(f"{'Endpoint':<18}{'Peticiones':>11}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'máx ms':>9}")
+    todas = [valor for valores in latencias.values() for valor in valores]
+    for nombre, valores in sorted(latencias.items()) + [('total', todas)]:
+        print(f"{nombre:<18}{len(valores):>11,}{1000 * percentil(valores, 50):>9.2f}"
+              f"{1000 * percentil(valores, 95):>9.2f}{1000 * percentil(valores, 99):>9.2f}"
+              f"{1000 * max(valores):>9.2f}")
+    cache = salud['cache']
+    print(f"Caché: {cache['tasa_aciertos'] or 0:.1%} aciertos ({cache['aciertos']:,} de "
+          f"{cache['aciertos'] + cache['fallos']:,}), {cache['entradas']} entradas, "
+          f"{cache['invalidaciones']} invalidaciones")
+    if errores:
+        print(f"Respuestas con error: {errores}")
+
+async def esperar_servicio(host, puerto, segundos=15):
+    limite = time.monotonic() + segundos
+    while True:
+        try:
+            return await consultar_salud(host, puerto)
+        except OSError:
+            if time.monotonic() > limite:
+                raise RuntimeError(f"El servicio no respondió en {host}:{puerto}")
+            await asyncio.sleep(0.2)
+
+def main():
+    """Levanta el servicio (salvo --url), corre la prueba e imprime las latencias"""
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de consultas")
+    parser.add_argument('--url', default=None, help="Servicio ya levantado (por ejemplo http://127.0.0.1:8080)")
+    parser.add_argument('--puerto', type=int, default=8765, help="Puerto del servicio que levanta la prueba")
+    parser.add_argument('--clientes', type=int, default=50, help="Conexiones concurrentes")
+    parser.add_argument('--peticiones', type=int, default=5000)
+    parser.add_argument('--usuarios', type=int, default=200, help="Usuarios distintos que se consultan")
+    parser.add_argument('--conexiones', type=int, default=4, help="Conexiones SQLite del servicio")
+    parser.add_argument('--ttl', type=float, default=30.0, help="TTL de la caché del servicio (0 = sin caché)")
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    aleatorio = random.Random(args.semilla)
+    peticiones = generar_peticiones(args.peticiones, usuarios_de_muestra(RUTA_BD, args.usuarios, aleatorio),
+                                    aleatorio)
+    proceso = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, puerto = url.hostname, url.port
+    else:
+        host, puerto = '127.0.0.1', args.puerto
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'servicio_consultas.py')
+        proceso = subprocess.Popen([sys.executable, script, '--puerto', str(puerto), '--conexiones',
+                                    str(args.conexiones), '--ttl', str(args.ttl)])
+    try:
+        asyncio.run(esperar_servicio(host, puerto))
+        print(f"Prueba: {args.peticiones:,} peticiones, {args.clientes} clientes concurrentes")
+        imprimir_resultados(*asyncio.run(ejecutar_prueba(host, puerto, peticiones, args.clientes)))
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+if __name__ == "__main__":
+    main()
@@ -2,37 +2,98 @@
 """
 PUNTO 4: Diccionario de datos y parámetros para aplicación
 Guarda información de la tabla resultante y explica cómo pasarla a una aplicación
+
+Las estadísticas generales cubren la ventana con la que el Punto 3 creó la vista
+(control_ventana_unificada). Si la ventana son meses completos se leen de los resúmenes
+mensuales del Punto 2 (rollups_encuestas.py) y los usuarios únicos son una estimación
+HyperLogLog; si empieza o termina a mitad de mes (o no está registrada) se consultan
+sobre la vista.
+El perfil de cada columna sale de una sola pasada sobre la tabla (perfilador_columnas.py).
+valores_unicos_ejemplo conserva su contenido: hasta TOP_K valores distintos de las columnas
+categóricas (null en las demás), ahora tomados del perfil. valores_frecuentes_ejemplo, de
+todas las columnas, lista los valores más frecuentes de mayor a menor (space-saving, TOP_K).
+Con --archivos-mensuales las estadísticas se calculan en paralelo sobre los archivos SQLite
+por mes del Punto 2 (archivos_mensuales.py) y los usuarios únicos son exactos.
 """
 
 import sqlite3
 import json
+import argparse
 from datetime import datetime
 import os
+import sys
+
+# Los resúmenes mensuales se mantienen junto al cargador del Punto 2
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Punto 2'))
+from rollups_encuestas import resumen_meses, meses_en_rango, ventana_de_meses_completos
+from archivos_mensuales import NOMBRE_DIRECTORIO, sincronizar_archivos_mensuales, resumen_archivos_mensuales
+from instrumentacion import (
+    agregar_argumentos as agregar_argumentos_instrumentacion, iniciar_desde_argumentos,
+    finalizar_desde_argumentos, etapa
+)
+from almacenamiento import ruta_sqlite
+from perfilador_columnas import TOP_K, perfilar_tabla
+
+# Columnas con valores_unicos_ejemplo (las demás lo dejan en null)
+COLUMNAS_CATEGORICAS = ['estado', 'descripcion_calificacion']
 
 def conectar_bd():
     """Conecta a la base de datos"""
-    # Usar la base de datos generada en 'Punto 2'
-    proyecto_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    db_path = os.path.join(proyecto_root, 'Punto 2', 'encuestas_usuarios_simplificada.db')
-    conn = sqlite3.connect(db_path)
+    # Usar la base de datos generada en 'Punto 2' (o la configurada en ENCUESTAS_BD)
+    conn = sqlite3.connect(ruta_sqlite())
     conn.execute('PRAGMA foreign_keys = ON;')
     conn.row_factory = sqlite3.Row
     return conn
 
-def crear_diccionario_datos():
-    """Crea diccionario de datos de la tabla unificada"""
+def ventana_tabla_unificada(cursor, nombre_tabla='tabla_unificada_2025'):
+    """(desde, hasta) con que el Punto 3 creó la vista, o None si no está registrada"""
+    cursor.execute("""
+        SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'control_ventana_unificada'
+    """)
+    if not cursor.fetchone():
+        return None
+    cursor.execute("SELECT desde, hasta FROM control_ventana_unificada WHERE nombre_tabla = ?", (nombre_tabla,))
+    fila = cursor.fetchone()
+    return (fila[0], fila[1]) if fila else None
+
+def resumen_vista(cursor, nombre_tabla='tabla_unificada_2025'):
+    """Estadísticas exactas con una consulta sobre la vista"""
+    cursor.execute(f"""
+        SELECT COUNT(*), COUNT(DISTINCT usuario_id), COUNT(DISTINCT id_cuestionario),
+               AVG(calificacion_valor), MIN(fecha_insercion), MAX(fecha_insercion)
+        FROM {nombre_tabla}
+    """)
+    fila = cursor.fetchone()
+    return {
+        'total_registros': fila[0],
+        'usuarios_unicos': fila[1],
+        'tipos_cuestionario': fila[2],
+        'calificacion_promedio': fila[3],
+        'fecha_minima': fila[4],
+        'fecha_maxima': fila[5]
+    }
+
+def crear_diccionario_datos(conn=None, directorio_mensual=None):
+    """Crea diccionario de datos de la tabla unificada
+    
+    Con conn se usa esa conexión (ejecutar_puntos.py) y no se cierra al terminar.
+    Con directorio_mensual ('' para el directorio por defecto) las estadísticas salen de
+    los archivos por mes.
+    """
     
     print("PUNTO 4: Creando diccionario de datos")
     print("=" * 50)
     
+    propia = conn is None
     try:
-        conn = conectar_bd()
+        if propia:
+            conn = conectar_bd()
         cursor = conn.cursor()
         
         # Verificar si existe la tabla unificada
         cursor.execute("""
             SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='tabla_unificada_2025'
+            WHERE type IN ('table', 'view') AND name='tabla_unificada_2025'
         """)
         
         if not cursor.fetchone():
@@ -44,26 +105,44 @@ def crear_diccionario_datos():
         cursor.execute("PRAGMA table_info(tabla_unificada_2025)")
         columnas_info = cursor.fetchall()
         
-        # Obtener estadísticas de la tabla
-        cursor.execute("SELECT COUNT(*) FROM tabla_unificada_2025")
-        total_registros = cursor.fetchone()[0]
-        
-        cursor.execute("""
-            SELECT 
-                COUNT(DISTINCT usuario_id) as usuarios_unicos,
-                COUNT(DISTINCT id_cuestionario) as tipos_cuestionario,
-                AVG(calificacion_valor) as calificacion_promedio,
-                MIN(fecha_insercion) as fecha_minima,
-                MAX(fecha_insercion) as fecha_maxima
-            FROM tabla_unificada_2025
-        """)
-        estadisticas = cursor.fetchone()
+        # Obtener estadísticas de la ventana de la vista: resúmenes mensuales, archivos por mes o la vista
+        ventana = ventana_tabla_unificada(cursor)
+        with etapa('estadisticas'):
+            if ventana is None:
+                origen = 'consulta sobre la vista (ventana no registrada)'
+                resumen = resumen_vista(cursor)
+            elif directorio_mensual is not None:
+                origen = 'archivos por mes'
+                sincronizar_archivos_mensuales(conn, directorio_mensual or None, meses_en_rango(*ventana))
+                resumen = resumen_archivos_mensuales(ventana[0], ventana[1], directorio_mensual or None)
+            elif ventana_de_meses_completos(*ventana):
+                origen = 'resúmenes mensuales'
+                resumen = resumen_meses(conn, meses_en_rango(*ventana))
+            else:
+                origen = 'consulta sobre la vista (ventana con meses parciales)'
+                resumen = resumen_vista(cursor)
+        if ventana is None:
+            descripcion_ventana = "según la vista creada en el Punto 3"
+        else:
+            descripcion_ventana = f"desde {ventana[0]} hasta {ventana[1]} (sin incluir)"
+        print(f"Estadísticas: {origen}")
+        total_registros = resumen['total_registros']
+        estadisticas = (
+            resumen['usuarios_unicos'],
+            resumen['tipos_cuestionario'],
+            resumen['calificacion_promedio'],
+            resumen['fecha_minima'],
+            resumen['fecha_maxima']
+        )
         
         # Crear diccionario de datos
         diccionario_datos = {
             "metadatos": {
                 "nombre_tabla": "tabla_unificada_2025",
-                "descripcion": "Tabla unificada con información de encuestas y usuarios para Junio-Agosto 2025",
+                "descripcion": f"Tabla unificada con información de encuestas y usuarios {descripcion_ventana}",
+                "ventana": {"desde": ventana[0], "hasta": ventana[1]} if ventana else None,
+                "valores_frecuentes_ejemplo": f"Los {TOP_K} valores más frecuentes de cada columna, "
+                                              "de mayor a menor (space-saving, ver perfil)",
                 "fecha_creacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "total_registros": total_registros,
                 "estadisticas": {
@@ -78,6 +157,10 @@ def crear_diccionario_datos():
             "ejemplos_datos": []
         }
         
+        # Perfilar todas las columnas en un único recorrido de la tabla
+        with etapa('perfilado') as medicion:
+            medicion['filas'], perfiles = perfilar_tabla(conn, 'tabla_unificada_2025')
+        
         # Procesar información de columnas
         for columna in columnas_info:
             col_name = columna[1]
@@ -85,12 +168,13 @@ def crear_diccionario_datos():
             col_notnull = bool(columna[3])
             col_default = columna[4]
             col_pk = bool(columna[5])
+            perfil = perfiles[col_name]
+            frecuentes = [item['valor'] for item in perfil['valores_frecuentes']]
             
-            # Obtener valores únicos para columnas categóricas
+            # Valores distintos de las columnas categóricas: con pocos valores el top-k es exacto
             valores_unicos = None
-            if col_type == 'TEXT' and col_name in ['estado', 'descripcion_calificacion']:
-                cursor.execute(f"SELECT DISTINCT {col_name} FROM tabla_unificada_2025 WHERE {col_name} IS NOT NULL LIMIT 10")
-                valores_unicos = [row[0] for row in cursor.fetchall()]
+            if col_type == 'TEXT' and col_name in COLUMNAS_CATEGORICAS:
+                valores_unicos = frecuentes
             
             diccionario_datos["estructura_columnas"][col_name] = {
                 "tipo_dato": col_type,
@@ -98,19 +182,23 @@ def crear_diccionario_datos():
                 "permite_nulos": not col_notnull,
                 "valor_por_defecto": col_default,
                 "es_clave_primaria": col_pk,
-                "valores_unicos_ejemplo": valores_unicos
+                "valores_unicos_ejemplo": valores_unicos,
+                "valores_frecuentes_ejemplo": frecuentes,
+                "perfil": perfil
             }
         
         # Obtener muestra de datos
-        cursor.execute("SELECT * FROM tabla_unificada_2025 LIMIT 3")
-        for row in cursor.fetchall():
+        with etapa('ejemplos'):
+            cursor.execute("SELECT * FROM tabla_unificada_2025 ORDER BY fecha_insercion DESC LIMIT 3")
+            ejemplos = cursor.fetchall()
+        for row in ejemplos:
             registro = {}
             for i, columna in enumerate(columnas_info):
                 registro[columna[1]] = row[i]
             diccionario_datos["ejemplos_datos"].append(registro)
         
         # Guardar diccionario en archivo JSON
-        with open('diccionario_datos_tabla_unificada.json', 'w', encoding='utf-8') as f:
+        with etapa('json'), open('diccionario_datos_tabla_unificada.json', 'w', encoding='utf-8') as f:
             json.dump(diccionario_datos, f, ensure_ascii=False, indent=2)
         
         print("Diccionario de datos creado exitosamente")
@@ -118,7 +206,7 @@ def crear_diccionario_datos():
         print(f"Total registros: {total_registros:,}")
         print(f"Usuarios únicos: {estadisticas[0]:,}")
         print(f"Tipos cuestionario: {estadisticas[1]}")
-        print(f"Calificación promedio: {estadisticas[2]:.2f}")
+        print(f"Calificación promedio: {estadisticas[2] or 0:.2f}")
         
         return diccionario_datos
         
@@ -127,7 +215,7 @@ def crear_diccionario_datos():
         return None
     
     finally:
-        if 'conn' in locals():
+        if propia and conn is not None:
             conn.close()
 
 def obtener_descripcion_columna(nombre_columna):
@@ -157,10 +245,23 @@ def obtener_descripcion_columna(nombre_columna):
     }
     return descripciones.get(nombre_columna, 'Columna sin descripción definida')
 
+def agregar_argumentos_punto4(parser):
+    """Agrega las opciones del Punto 4 a un parser de argparse (también las usa ejecutar_puntos.py)"""
+    parser.add_argument('--archivos-mensuales', nargs='?', const='', default=None, metavar='DIRECTORIO',
+                        help=f"Calcula las estadísticas en paralelo sobre los archivos SQLite por mes "
+                             f"(por defecto en {NOMBRE_DIRECTORIO} junto a la base; ver archivos_mensuales.py)")
+
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Genera el diccionario de datos de la tabla unificada")
+    agregar_argumentos_punto4(parser)
+    agregar_argumentos_instrumentacion(parser, 'reporte_punto4.json')
+    args = parser.parse_args()
+    iniciar_desde_argumentos(args, 'punto4_diccionario_datos')
+    
     # Crear diccionario de datos
-    diccionario = crear_diccionario_datos()
+    diccionario = crear_diccionario_datos(directorio_mensual=args.archivos_mensuales)
+    finalizar_desde_argumentos(args)
      
     print(f"\n" + "="*60)
     print("PUNTO 4 COMPLETADO")
@@ -172,6 +273,8 @@ def main():
     print("   Para aplicaciones web/API: Usar archivo JSON")
     print("   Para scripts Python: Usar diccionario directo")
     print("   Para funciones específicas: Usar parámetros filtrados")
+    print("   Para volúmenes grandes: Usar la exportación columnar (Punto 3 --exportar)")
+    print("   Para tableros con muchas consultas concurrentes: servicio_consultas.py (HTTP/JSON)")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,424 @@
+"""
+Servicio HTTP/JSON de solo lectura sobre la tabla unificada y las tablas base.
+
+Es la forma de entregar los datos a las aplicaciones (tableros, APIs) sin pasar por
+archivos JSON: un servidor asyncio sin dependencias externas que atiende muchas
+peticiones concurrentes.
+
+- Las consultas corren en un pool de conexiones SQLite de solo lectura (mode=ro,
+  query_only) en un ThreadPoolExecutor; el bucle de eventos nunca espera a SQLite.
+- La base se pasa a modo WAL al iniciar, así los lectores no bloquean a la carga y
+  la carga no bloquea a los lectores.
+- Los resultados se guardan en una caché LRU con vencimiento (TTL). Un vigía revisa
+  PRAGMA data_version cada segundo y vacía la caché cuando otra conexión confirma
+  cambios (un lote nuevo de la carga, la reconstrucción del Punto 3, etc.).
+
+Endpoints (GET, respuesta JSON):
+    /salud                          estado, versión de datos y estadísticas de la caché
+    /encuestas                      encuestas de las tablas base
+    /tabla_unificada                filas de tabla_unificada_2025 (Punto 3)
+    /usuarios?q=texto               usuarios cuyo nombre, email o teléfono contienen el texto
+    /usuarios/<id>                  un usuario con el resumen de las encuestas que respondió
+    /usuarios/<id>/encuestas        encuestas del usuario con sus calificaciones (más recientes primero)
+    /resumen?meses=2025-06,2025-07  estadísticas de los resúmenes mensuales (Punto 2)
+
+/encuestas y /tabla_unificada aceptan los filtros desde y hasta (fecha_insercion,
+rango [desde, hasta)), usuario_id, id_cuestionario e id_calificacion, y se paginan
+por id_encuesta: limite (máximo LIMITE_MAXIMO) y despues_de=<último id recibido>;
+la respuesta trae 'siguiente' con el valor a pedir en la próxima página. En
+/tabla_unificada cada página une en orden las particiones mensuales por su índice de
+id_encuesta (ver Punto 3), así el costo de una página no crece con las anteriores.
+/usuarios?q= y /usuarios/<id>/encuestas usan el índice de búsqueda y el índice por
+usuario de busqueda_usuarios.py (Punto 2); aceptan limite, y las encuestas también desde y hasta.
+
+Uso:
+    python servicio_consultas.py --puerto 8080 --conexiones 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+
+# Los resúmenes mensuales se mantienen junto al cargador del Punto 2
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Punto 2'))
+from rollups_encuestas import resumen_meses, rollups_al_dia
+from almacenamiento import configuracion_bd
+from busqueda_usuarios import buscar_usuarios, encuestas_de_usuario, resumen_usuario
+
+# Base configurada en ENCUESTAS_BD (ver almacenamiento.py); el servicio lee solo SQLite
+RUTA_BD = configuracion_bd().get('ruta')
+
+HOST = '127.0.0.1'
+PUERTO = 8080
+CONEXIONES = 4
+
+# Caché de resultados: entradas máximas y segundos de vigencia (0 = sin caché)
+CAPACIDAD_CACHE = 1024
+TTL_CACHE = 30.0
+
+# Cada cuánto se revisa si la base cambió
+INTERVALO_VERSION = 1.0
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+
+# Columnas que devuelve /encuestas (tablas base con sus dimensiones)
+SELECCION_ENCUESTAS = '''
+    SELECT
+        e.id_encuesta, e.id_estado_encuesta, de.estado, e.id_cuestionario,
+        dq.descripcion AS descripcion_cuestionario, e.id_calificacion,
+        dc.calificacion AS calificacion_valor, e.fecha_limite, e.fecha_creado, e.hora_creado,
+        e.fecha_modificado, e.hora_modificado, e.fecha_insercion, e.usuario_id
+    FROM encuestas e
+    LEFT JOIN dimension_estados de ON de.id_estado_encuesta = e.id_estado_encuesta
+    LEFT JOIN dimension_cuestionarios dq ON dq.id_cuestionario = e.id_cuestionario
+    LEFT JOIN dimension_calificaciones dc ON dc.id_calificacion = e.id_calificacion
+'''
+
+# Endpoint -> (consulta base, alias de la tabla para los filtros)
+FUENTES = {
+    '/encuestas': (SELECCION_ENCUESTAS, 'e.'),
+    '/tabla_unificada': ('SELECT * FROM tabla_unificada_2025', ''),
+}
+
+FILTROS_ENTEROS = ['usuario_id', 'id_cuestionario', 'id_calificacion']
+
+class ErrorPeticion(ValueError):
+    """Parámetros inválidos en la petición (respuesta 400)"""
+
+def preparar_base(ruta):
+    """Pasa la base a journal WAL (queda guardado en el archivo)"""
+    conn = sqlite3.connect(ruta)
+    modo = conn.execute('PRAGMA journal_mode = WAL;').fetchone()[0]
+    conn.close()
+    return modo
+
+def conexion_lectura(ruta):
+    """Conexión de solo lectura que se puede usar desde los hilos del executor"""
+    conn = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute('PRAGMA query_only = ON;')
+    return conn
+
+def nuevo_pool(ruta, cantidad):
+    """Pool de conexiones de solo lectura: una cola asyncio y su executor de hilos"""
+    conexiones = asyncio.Queue()
+    for _ in range(cantidad):
+        conexiones.put_nowait(conexion_lectura(ruta))
+    return {
+        'conexiones': conexiones,
+        'executor': ThreadPoolExecutor(max_workers=cantidad, thread_name_prefix='sqlite'),
+        'cantidad': cantidad,
+    }
+
+async def en_pool(pool, funcion, *argumentos):
+    """Ejecuta funcion(conn, *argumentos) en un hilo con una conexión libre del pool"""
+    conn = await pool['conexiones'].get()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool['executor'], funcion, conn, *argumentos)
+    finally:
+        pool['conexiones'].put_nowait(conn)
+
+def cerrar_pool(pool):
+    pool['executor'].shutdown(wait=True)
+    while not pool['conexiones'].empty():
+        pool['conexiones'].get_nowait().close()
+
+def nuevo_cache(capacidad=CAPACIDAD_CACHE, ttl=TTL_CACHE):
+    """Caché LRU con vencimiento; 'generacion' cambia cada vez que se invalida"""
+    return {'entradas': OrderedDict(), 'capacidad': capacidad, 'ttl': ttl, 'generacion': 0,
+            'aciertos': 0, 'fallos': 0, 'invalidaciones': 0}
+
+def cache_obtener(cache, clave):
+    """Valor vigente de la clave, o None"""
+    entrada = cache['entradas'].get(clave)
+    if entrada is None or entrada[0] < time.monotonic():
+        if entrada is not None:
+            del cache['entradas'][clave]
+        cache['fallos'] += 1
+        return None
+    cache['entradas'].move_to_end(clave)
+    cache['aciertos'] += 1
+    return entrada[1]
+
+def cache_guardar(cache, clave, valor, generacion):
+    """Guarda el valor si la caché no se invalidó mientras se calculaba"""
+    if cache['ttl'] <= 0 or generacion != cache['generacion']:
+        return
+    cache['entradas'][clave] = (time.monotonic() + cache['ttl'], valor)
+    cache['entradas'].move_to_end(clave)
+    while len(cache['entradas']) > cache['capacidad']:
+        cache['entradas'].popitem(last=False)
+
+def cache_invalidar(cache):
+    cache['entradas'].clear()
+    cache['generacion'] += 1
+    cache['invalidaciones'] += 1
+
+def version_datos(conn):
+    """PRAGMA data_version: cambia cuando otra conexión confirma cambios en la base"""
+    return conn.execute('PRAGMA data_version').fetchone()[0]
+
+async def vigilar_version(estado):
+    """Vacía la caché cuando la base cambia (por ejemplo, al llegar un lote de la carga)"""
+    conn = conexion_lectura(estado['ruta'])
+    try:
+        while True:
+            await asyncio.sleep(INTERVALO_VERSION)
+            version = await asyncio.get_running_loop().run_in_executor(
+                estado['pool']['executor'], version_datos, conn)
+            if version != estado['version']:
+                estado['version'] = version
+                estado['ultimo_cambio'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                cache_invalidar(estado['cache'])
+    finally:
+        conn.close()
+
+def validar_fecha(texto, nombre):
+    try:
+        return datetime.strptime(texto, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise ErrorPeticion(f"{nombre} debe tener el formato YYYY-MM-DD: {texto!r}")
+
+def validar_entero(texto, nombre, minimo=None, maximo=None):
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise ErrorPeticion(f"{nombre} debe ser un entero: {texto!r}")
+    if (minimo is not None and valor < minimo) or (maximo is not None and valor > maximo):
+        raise ErrorPeticion(f"{nombre} debe estar entre {minimo} y {maximo}")
+    return valor
+
+def parametro(parametros, nombre):
+    valores = parametros.get(nombre)
+    return valores[-1] if valores else None
+
+def construir_consulta(ruta, parametros):
+    """SQL y parámetros de /encuestas o /tabla_unificada a partir de la query string"""
+    base, alias = FUENTES[ruta]
+    condiciones, valores = [], []
+    desde, hasta = parametro(parametros, 'desde'), parametro(parametros, 'hasta')
+    if desde:
+        condiciones.append(f"{alias}fecha_insercion >= ?")
+        valores.append(validar_fecha(desde, 'desde'))
+    if hasta:
+        condiciones.append(f"{alias}fecha_insercion < ?")
+        valores.append(validar_fecha(hasta, 'hasta'))
+    for nombre in FILTROS_ENTEROS:
+        valor = parametro(parametros, nombre)
+        if valor is not None:
+            condiciones.append(f"{alias}{nombre} = ?")
+            valores.append(validar_entero(valor, nombre))
+    despues_de = parametro(parametros, 'despues_de')
+    if despues_de is not None:
+        condiciones.append(f"{alias}id_encuesta > ?")
+        valores.append(validar_entero(despues_de, 'despues_de'))
+    limite = limite_peticion(parametros)
+
+    donde = f" WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    return f"{base}{donde} ORDER BY {alias}id_encuesta LIMIT ?", valores + [limite], limite
+
+def consultar_filas(conn, sql, valores, limite):
+    """Página de filas como diccionarios, con la llave de la página siguiente"""
+    cursor = conn.execute(sql, valores)
+    columnas = [descripcion[0] for descripcion in cursor.description]
+    filas = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+    siguiente = filas[-1]['id_encuesta'] if len(filas) == limite else None
+    return {'filas': filas, 'cantidad': len(filas), 'siguiente': siguiente}
+
+def consultar_usuario(conn, usuario_id):
+    cursor = conn.execute("SELECT id_usuario, nombre, telefono, email FROM usuarios WHERE id_usuario = ?",
+                          (usuario_id,))
+    fila = cursor.fetchone()
+    if fila is None:
+        return None
+    return dict({'id_usuario': fila[0], 'nombre': fila[1], 'telefono': fila[2], 'email': fila[3]},
+                **resumen_usuario(conn, usuario_id))
+
+def consultar_busqueda_usuarios(conn, texto, limite):
+    usuarios = buscar_usuarios(conn, texto, limite)
+    return {'usuarios': usuarios, 'cantidad': len(usuarios)}
+
+def consultar_encuestas_usuario(conn, usuario_id, desde, hasta, limite):
+    encuestas = encuestas_de_usuario(conn, usuario_id, desde, hasta, limite)
+    return {'usuario_id': usuario_id, 'encuestas': encuestas, 'cantidad': len(encuestas)}
+
+def limite_peticion(parametros):
+    limite = parametro(parametros, 'limite')
+    return LIMITE_POR_DEFECTO if limite is None else validar_entero(limite, 'limite', 1, LIMITE_MAXIMO)
+
+def consultar_resumen(conn, meses):
+    # resumen_meses actualizaría los resúmenes si están atrasados, y esta conexión no escribe
+    if not rollups_al_dia(conn):
+        raise RuntimeError("Los resúmenes mensuales están desactualizados; termine la carga (Punto 2)")
+    return dict(resumen_meses(conn, meses), meses=meses)
+
+async def resolver(estado, ruta, parametros):
+    """Calcula la respuesta (código, cuerpo) de una ruta, usando la caché"""
+    if ruta == '/salud':
+        cache = estado['cache']
+        consultas = cache['aciertos'] + cache['fallos']
+        return 200, {
+            'estado': 'ok',
+            'version_datos': estado['version'],
+            'ultimo_cambio': estado['ultimo_cambio'],
+            'conexiones': estado['pool']['cantidad'],
+            'cache': {
+                'entradas': len(cache['entradas']), 'capacidad': cache['capacidad'], 'ttl': cache['ttl'],
+                'aciertos': cache['aciertos'], 'fallos': cache['fallos'],
+                'tasa_aciertos': round(cache['aciertos'] / consultas, 3) if consultas else None,
+                'invalidaciones': cache['invalidaciones'],
+            },
+        }
+
+    if ruta in FUENTES:
+        sql, valores, limite = construir_consulta(ruta, parametros)
+        clave = (sql, tuple(valores))
+        calcular = lambda: en_pool(estado['pool'], consultar_filas, sql, valores, limite)
+    elif ruta == '/usuarios':
+        texto = (parametro(parametros, 'q') or '').strip()
+        if not texto:
+            raise ErrorPeticion("Indique q=<nombre, email o teléfono>")
+        limite = limite_peticion(parametros)
+        clave = ('busqueda_usuarios', texto, limite)
+        calcular = lambda: en_pool(estado['pool'], consultar_busqueda_usuarios, texto, limite)
+    elif ruta.startswith('/usuarios/') and ruta.endswith('/encuestas'):
+        usuario_id = validar_entero(ruta[len('/usuarios/'):-len('/encuestas')], 'usuario')
+        desde, hasta = parametro(parametros, 'desde'), parametro(parametros, 'hasta')
+        desde = validar_fecha(desde, 'desde') if desde else None
+        hasta = validar_fecha(hasta, 'hasta') if hasta else None
+        limite = limite_peticion(parametros)
+        clave = ('encuestas_usuario', usuario_id, desde, hasta, limite)
+        calcular = lambda: en_pool(estado['pool'], consultar_encuestas_usuario, usuario_id, desde, hasta, limite)
+    elif ruta.startswith('/usuarios/'):
+        usuario_id = validar_entero(ruta[len('/usuarios/'):], 'usuario')
+        clave = ('usuario', usuario_id)
+        calcular = lambda: en_pool(estado['pool'], consultar_usuario, usuario_id)
+    elif ruta == '/resumen':
+        meses = [mes for mes in (parametro(parametros, 'meses') or '').split(',') if mes]
+        for mes in meses:
+            validar_fecha(f"{mes}-01", 'meses')
+        if not meses:
+            raise ErrorPeticion("Indique meses=YYYY-MM[,YYYY-MM...]")
+        clave = ('resumen', tuple(meses))
+        calcular = lambda: en_pool(estado['pool'], consultar_resumen, meses)
+    else:
+        return 404, {'error': f"Ruta desconocida: {ruta}"}
+
+    cuerpo = cache_obtener(estado['cache'], clave)
+    if cuerpo is None:
+        generacion = estado['cache']['generacion']
+        resultado = await calcular()
+        if resultado is None:
+            return 404, {'error': f"No existe: {ruta}"}
+        cuerpo = json.dumps(resultado, ensure_ascii=False).encode('utf-8')
+        cache_guardar(estado['cache'], clave, cuerpo, generacion)
+    return 200, cuerpo
+
+RAZONES = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+def respuesta_http(codigo, cuerpo, mantener):
+    if not isinstance(cuerpo, bytes):
+        cuerpo = json.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+    encabezado = (f"HTTP/1.1 {codigo} {RAZONES[codigo]}\r\n"
+                  f"Content-Type: application/json; charset=utf-8\r\n"
+                  f"Content-Length: {len(cuerpo)}\r\n"
+                  f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n")
+    return encabezado.encode('ascii') + cuerpo
+
+async def atender(estado, lector, escritor):
+    """Atiende una conexión HTTP/1.1 (con keep-alive) hasta que el cliente la cierre"""
+    try:
+        while True:
+            linea = await lector.readline()
+            if not linea:
+                return
+            encabezados = {}
+            while True:
+                cabecera = await lector.readline()
+                if cabecera in (b'\r\n', b'\n', b''):
+                    break
+                nombre, _, valor = cabecera.decode('latin-1').partition(':')
+                encabezados[nombre.strip().lower()] = valor.strip()
+
+            partes = linea.decode('latin-1').split()
+            mantener = len(partes) == 3 and encabezados.get('connection', '').lower() != 'close'
+            if len(partes) != 3 or partes[0] != 'GET':
+                codigo, cuerpo = 405, {'error': "Solo se aceptan peticiones GET"}
+            else:
+                url = urlsplit(partes[1])
+                try:
+                    codigo, cuerpo = await resolver(estado, url.path.rstrip('/') or '/', parse_qs(url.query))
+                except ErrorPeticion as e:
+                    codigo, cuerpo = 400, {'error': str(e)}
+                except RuntimeError as e:
+                    codigo, cuerpo = 503, {'error': str(e)}
+                except Exception as e:
+                    print(f"Error atendiendo {partes[1]}: {str(e)}")
+                    codigo, cuerpo = 500, {'error': str(e)}
+            escritor.write(respuesta_http(codigo, cuerpo, mantener))
+            await escritor.drain()
+            if not mantener:
+                return
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        escritor.close()
+
+async def servir(ruta_bd=RUTA_BD, host=HOST, puerto=PUERTO, conexiones=CONEXIONES,
+                 capacidad_cache=CAPACIDAD_CACHE, ttl_cache=TTL_CACHE):
+    """Levanta el servicio y atiende hasta que se cancele"""
+    if ruta_bd is None:
+        raise RuntimeError("El servicio solo lee bases SQLite; usa --bd o una URL sqlite:/// en ENCUESTAS_BD")
+    if not os.path.exists(ruta_bd):
+        raise FileNotFoundError(f"No existe la base {ruta_bd}. Ejecuta primero la carga del Punto 2")
+    modo = preparar_base(ruta_bd)
+    pool = nuevo_pool(ruta_bd, conexiones)
+    conn = conexion_lectura(ruta_bd)
+    estado = {
+        'ruta': ruta_bd,
+        'pool': pool,
+        'cache': nuevo_cache(capacidad_cache, ttl_cache),
+        'version': version_datos(conn),
+        'ultimo_cambio': None,
+    }
+    conn.close()
+
+    vigia = asyncio.create_task(vigilar_version(estado))
+    servidor = await asyncio.start_server(lambda lector, escritor: atender(estado, lector, escritor), host, puerto)
+    print(f"Servicio de consultas en http://{host}:{puerto} (journal {modo}, {conexiones} conexiones, "
+          f"caché {capacidad_cache} entradas / {ttl_cache:g} s)")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        vigia.cancel()
+        cerrar_pool(pool)
+
+def main():
+    """Lee las opciones de línea de comandos y levanta el servicio"""
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de consultas sobre la tabla unificada")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--puerto', type=int, default=PUERTO)
+    parser.add_argument('--conexiones', type=int, default=CONEXIONES, help="Conexiones de lectura en el pool")
+    parser.add_argument('--cache', type=int, default=CAPACIDAD_CACHE, help="Entradas máximas de la caché")
+    parser.add_argument('--ttl', type=float, default=TTL_CACHE, help="Segundos de vigencia en caché (0 = sin caché)")
+    parser.add_argument('--bd', default=RUTA_BD, help="Ruta de la base de datos")
+    args = parser.parse_args()
+    try:
+        asyncio.run(servir(args.bd, args.host, args.puerto, args.conexiones, args.cache, args.ttl))
+    except KeyboardInterrupt:
+        print("Servicio detenido")
+    except Exception as e:
+        print(f"Error: {str(e)}")
+
+if __name__ == "__main__":
+    main()
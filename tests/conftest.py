@@ -0,0 +1,77 @@
+"""
+Configuración común de las pruebas.
+
+Los scripts de cada Punto se importan como en la línea de comandos: con sus carpetas en
+sys.path. Los datos son CSV sintéticos pequeños (generar_datos_sinteticos.py) y la carga
+corre el cargador real sobre una base temporal apuntada con ENCUESTAS_BD.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for punto in ('Punto 2', 'Punto 3', 'Punto 4'):
+    sys.path.insert(0, os.path.join(RAIZ, punto))
+
+from generar_datos_sinteticos import generar_datos
+from cargar_datos_simplificado import agregar_argumentos_carga, conectar_bd, ejecutar_carga
+
+FILAS_PRUEBA = 3000
+USUARIOS_PRUEBA = 100
+
+def renombrar_usuarios(datos):
+    ruta = datos / 'usuarios.csv'
+    texto = ruta.read_text(encoding='utf-8-sig')
+    ruta.write_text(texto.replace('Usuario ', 'Cliente '), encoding='utf-8-sig')
+
+def cambiar_calificaciones_julio(datos):
+    """Cambia las calificaciones no nulas de julio sin cambiar cuántas filas hay"""
+    ruta = datos / 'encuestas.csv'
+    lineas = ruta.read_text(encoding='utf-8-sig').splitlines(keepends=True)
+    cambiadas = 0
+    for i, linea in enumerate(lineas[1:], start=1):
+        campos = linea.split(';')
+        if campos[10].startswith('2025-07') and campos[4] != 'NULL':
+            campos[4] = str(int(campos[4]) % 5 + 1)
+            lineas[i] = ';'.join(campos)
+            cambiadas += 1
+    ruta.write_text(''.join(lineas), encoding='utf-8-sig')
+    return cambiadas
+
+@pytest.fixture
+def datos(tmp_path):
+    """Directorio con usuarios.csv, encuestas.csv y dimension_calificaciones.csv sintéticos"""
+    directorio = tmp_path / 'datos'
+    generar_datos(str(directorio), filas=FILAS_PRUEBA, usuarios=USUARIOS_PRUEBA, semilla=7)
+    shutil.copy(os.path.join(RAIZ, 'Punto 2', 'dimension_calificaciones.csv'), directorio)
+    return directorio
+
+@pytest.fixture
+def ruta_bd(tmp_path, monkeypatch):
+    """Base SQLite temporal configurada en ENCUESTAS_BD"""
+    ruta = tmp_path / 'encuestas.db'
+    monkeypatch.setenv('ENCUESTAS_BD', f"sqlite:///{ruta}")
+    return ruta
+
+@pytest.fixture
+def cargar(ruta_bd, datos):
+    """Función que ejecuta el cargador con las opciones de línea de comandos indicadas"""
+    def cargar(*opciones, encuestas=None):
+        parser = argparse.ArgumentParser()
+        agregar_argumentos_carga(parser)
+        args = parser.parse_args([
+            '--encuestas', str(encuestas or datos / 'encuestas.csv'),
+            '--usuarios', str(datos / 'usuarios.csv'),
+            '--calificaciones', str(datos / 'dimension_calificaciones.csv'),
+            *opciones,
+        ])
+        conn = conectar_bd(perfil=args.perfil)
+        try:
+            ejecutar_carga(conn, args)
+        finally:
+            conn.close()
+    return cargar
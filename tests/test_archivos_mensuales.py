@@ -0,0 +1,52 @@
+"""Marcas de agua de los archivos por mes y de dimensiones.db (archivos_mensuales.py)"""
+
+import sqlite3
+
+from conftest import renombrar_usuarios, cambiar_calificaciones_julio
+from archivos_mensuales import ARCHIVO_DIMENSIONES, ruta_archivo_mes, sincronizar_archivos_mensuales
+
+def sincronizar(ruta_bd, directorio):
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        return sincronizar_archivos_mensuales(conn, str(directorio))
+    finally:
+        conn.close()
+
+def consultar(ruta, consulta):
+    conn = sqlite3.connect(ruta)
+    try:
+        return sorted(conn.execute(consulta).fetchall())
+    finally:
+        conn.close()
+
+def test_carga_completa_reescribe_meses_y_dimensiones(cargar, ruta_bd, datos, tmp_path):
+    directorio = tmp_path / 'mensuales'
+    cargar()
+    meses = sincronizar(ruta_bd, directorio)
+    assert meses
+    assert sincronizar(ruta_bd, directorio) == []
+
+    renombrar_usuarios(datos)
+    assert cambiar_calificaciones_julio(datos) > 0
+    cargar()
+
+    assert sincronizar(ruta_bd, directorio) == meses
+    julio = consultar(ruta_archivo_mes(str(directorio), '2025-07'), "SELECT id_encuesta, id_calificacion FROM encuestas")
+    base = consultar(ruta_bd, "SELECT id_encuesta, id_calificacion FROM encuestas "
+                              "WHERE fecha_insercion >= '2025-07-01' AND fecha_insercion < '2025-08-01'")
+    assert julio == base
+    assert consultar(ruta_bd, "SELECT * FROM usuarios") == \
+        consultar(directorio / ARCHIVO_DIMENSIONES, "SELECT * FROM usuarios")
+
+def test_usuario_editado_reescribe_solo_dimensiones(cargar, ruta_bd, datos, tmp_path):
+    directorio = tmp_path / 'mensuales'
+    cargar()
+    sincronizar(ruta_bd, directorio)
+
+    renombrar_usuarios(datos)
+    cargar('--incremental')
+
+    assert sincronizar(ruta_bd, directorio) == []
+    usuarios = consultar(directorio / ARCHIVO_DIMENSIONES, "SELECT * FROM usuarios")
+    assert usuarios == consultar(ruta_bd, "SELECT * FROM usuarios")
+    assert all(fila[1].startswith('Cliente ') for fila in usuarios)
@@ -0,0 +1,11 @@
+"""El cargador informa la base configurada en ENCUESTAS_BD, no el nombre por defecto"""
+
+import os
+
+from almacenamiento import NOMBRE_BD_SQLITE
+
+def test_resumen_muestra_la_base_configurada(cargar, ruta_bd, capsys):
+    cargar()
+    salida = capsys.readouterr().out
+    assert f" Base de datos: {os.path.realpath(ruta_bd)}" in salida
+    assert NOMBRE_BD_SQLITE not in salida
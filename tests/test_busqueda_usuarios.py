@@ -0,0 +1,32 @@
+"""Búsqueda de usuarios con y sin el índice FTS5 (busqueda_usuarios.py)"""
+
+import sqlite3
+
+import busqueda_usuarios
+from busqueda_usuarios import buscar_usuarios, indice_usuarios_disponible
+
+def test_carga_sin_fts5_busca_con_like(cargar, ruta_bd, monkeypatch, capsys):
+    # Simula un SQLite sin el tokenizador trigram (anterior a 3.34)
+    monkeypatch.setattr(busqueda_usuarios, 'TOKENIZADOR', 'tokenizador_inexistente')
+    cargar()
+    cargar('--incremental')
+    assert 'la búsqueda de usuarios usará LIKE' in capsys.readouterr().out
+
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        assert not indice_usuarios_disponible(conn)
+        assert conn.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0] > 0
+        encontrados = buscar_usuarios(conn, 'Usuario 1')
+        assert encontrados and encontrados == buscar_usuarios(conn, 'Usuario 1', usar_indice=False)
+    finally:
+        conn.close()
+
+def test_indice_fts5_coincide_con_like(cargar, ruta_bd):
+    cargar()
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        assert indice_usuarios_disponible(conn)
+        encontrados = buscar_usuarios(conn, 'Usuario 1')
+        assert encontrados and encontrados == buscar_usuarios(conn, 'Usuario 1', usar_indice=False)
+    finally:
+        conn.close()
@@ -0,0 +1,64 @@
+"""Estadísticas del diccionario de datos del Punto 4 sobre la ventana de la vista del Punto 3"""
+
+import sqlite3
+
+from ejecutar_punto3 import materializar_ventana
+from punto4_diccionario_datos import crear_diccionario_datos
+
+TABLA = 'tabla_unificada_2025'
+
+def diccionario_y_vista(ruta_bd, desde, hasta, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        materializar_ventana(conn, desde, hasta, TABLA)
+        diccionario = crear_diccionario_datos(conn)
+        vista = conn.execute(f"SELECT COUNT(*), MIN(fecha_insercion), MAX(fecha_insercion) FROM {TABLA}").fetchone()
+        return diccionario['metadatos'], vista
+    finally:
+        conn.close()
+
+def test_ventana_de_meses_parciales(cargar, ruta_bd, tmp_path, monkeypatch):
+    cargar()
+    metadatos, (total, minima, maxima) = diccionario_y_vista(ruta_bd, '2025-06-15', '2025-09-01',
+                                                             tmp_path, monkeypatch)
+    assert metadatos['ventana'] == {'desde': '2025-06-15', 'hasta': '2025-09-01'}
+    assert metadatos['total_registros'] == total
+    assert metadatos['estadisticas']['fecha_minima'] == minima >= '2025-06-15'
+    assert metadatos['estadisticas']['fecha_maxima'] == maxima
+
+def test_ventana_de_meses_completos(cargar, ruta_bd, tmp_path, monkeypatch):
+    cargar()
+    metadatos, (total, minima, _) = diccionario_y_vista(ruta_bd, '2025-07-01', '2025-09-01',
+                                                        tmp_path, monkeypatch)
+    assert metadatos['total_registros'] == total
+    assert metadatos['estadisticas']['fecha_minima'] == minima >= '2025-07-01'
+
+def test_valores_frecuentes_ejemplo(cargar, ruta_bd, tmp_path, monkeypatch):
+    cargar()
+    monkeypatch.chdir(tmp_path)
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        materializar_ventana(conn, '2025-01-01', '2026-01-01', TABLA)
+        columnas = crear_diccionario_datos(conn)['estructura_columnas']
+        frecuencias = dict(conn.execute(f"SELECT id_calificacion, COUNT(*) FROM {TABLA} "
+                                        "WHERE id_calificacion IS NOT NULL GROUP BY id_calificacion").fetchall())
+    finally:
+        conn.close()
+    ejemplo = columnas['id_calificacion']['valores_frecuentes_ejemplo']
+    assert columnas['id_calificacion']['valores_unicos_ejemplo'] is None
+    assert sorted(ejemplo) == sorted(frecuencias)
+    assert [frecuencias[valor] for valor in ejemplo] == sorted(frecuencias.values(), reverse=True)
+
+def test_valores_unicos_ejemplo_de_columnas_categoricas(cargar, ruta_bd, tmp_path, monkeypatch):
+    cargar()
+    monkeypatch.chdir(tmp_path)
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        materializar_ventana(conn, '2025-01-01', '2026-01-01', TABLA)
+        columnas = crear_diccionario_datos(conn)['estructura_columnas']
+        distintos = {fila[0] for fila in conn.execute(f"SELECT DISTINCT estado FROM {TABLA} WHERE estado IS NOT NULL")}
+    finally:
+        conn.close()
+    assert set(columnas['estado']['valores_unicos_ejemplo']) == distintos
+    assert columnas['descripcion_calificacion']['valores_unicos_ejemplo']
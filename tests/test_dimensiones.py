@@ -0,0 +1,25 @@
+"""Reporte de las dimensiones al final de la carga (dimensiones.reportar_dimensiones)"""
+
+import pytest
+
+def invalidar_estados(datos, cantidad):
+    """Cambia IdEstadoEncuesta por un valor no numérico en las primeras filas; devuelve sus textos"""
+    ruta = datos / 'encuestas.csv'
+    lineas = ruta.read_text(encoding='utf-8-sig').splitlines(keepends=True)
+    textos = []
+    for i in range(1, cantidad + 1):
+        campos = lineas[i].split(';')
+        campos[0] = 'sin-id'
+        textos.append(campos[1])
+        lineas[i] = ';'.join(campos)
+    ruta.write_text(''.join(lineas), encoding='utf-8-sig')
+    return textos
+
+@pytest.mark.parametrize('motor', ['filas', 'columnas'])
+def test_estado_sin_id_se_reporta(motor, cargar, datos, capsys):
+    textos = invalidar_estados(datos, 5)
+    cargar('--modo', 'lotes', '--motor', motor)
+    salida = capsys.readouterr().out
+    linea = next(linea for linea in salida.splitlines() if 'sin id válido' in linea)
+    assert linea.startswith('   - dimension_estados: 5 encuestas')
+    assert all(repr(texto) in linea for texto in set(textos))
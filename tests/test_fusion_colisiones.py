@@ -0,0 +1,54 @@
+"""Colisiones de hash_unico en la carga por fusión (--fusionar, cambios_encuestas.py)"""
+
+import sqlite3
+
+import pytest
+
+from generar_datos_sinteticos import ENCABEZADO_ENCUESTAS
+
+FECHA = '2025-07-01 08:00:00.000'
+
+def encuesta(calificacion, hora_creado, fecha_modificado='20250701', usuario_id=5):
+    return (f"1;Pendiente;1;Atencion;{calificacion};20250701;20250701;{hora_creado};"
+            f"{fecha_modificado};11:00:00;{FECHA};{usuario_id}")
+
+def escribir(ruta, filas):
+    ruta.write_text('\n'.join([ENCABEZADO_ENCUESTAS, *filas]) + '\n', encoding='utf-8-sig')
+    return ruta
+
+@pytest.mark.parametrize('clave', ['md5', 'blake2b-64'])
+@pytest.mark.parametrize('tamano_lote, colisiones', [
+    # En un solo lote E choca con D dentro del lote y deduplicar_lote la descarta como duplicada
+    ('5000', [1]),
+    # Fila por lote: E choca con la versión de D que ya está en la tabla
+    ('1', [1, 4]),
+])
+def test_colision_de_hash_no_aborta_la_fusion(clave, tamano_lote, colisiones, cargar, ruta_bd, datos):
+    # Misma clave de deduplicación (usuario, fecha_insercion, cuestionario, calificación) salvo la calificación;
+    # la llave natural difiere en la hora de creación
+    inicial = escribir(datos / 'inicial.csv', [
+        encuesta(2, '10:00:00'),                # A: pasará a la calificación de B
+        encuesta(4, '10:30:00'),                # B
+        encuesta(1, '09:00:00'),                # D y E pasan a la misma calificación en el mismo lote
+        encuesta(5, '09:30:00'),
+        encuesta(1, '12:00:00', usuario_id=6),  # C: actualización sin colisión
+    ])
+    fusion = escribir(datos / 'fusion.csv', [
+        encuesta(4, '10:00:00', '20250702'),
+        encuesta(3, '09:00:00', '20250702'),
+        encuesta(3, '09:30:00', '20250702'),
+        encuesta(2, '12:00:00', '20250702', usuario_id=6),
+    ])
+    cargar('--clave-dedup', clave, encuestas=inicial)
+    cargar('--clave-dedup', clave, '--fusionar', '--tamano-lote', tamano_lote, encuestas=fusion)
+
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        calificaciones = conn.execute("SELECT id_calificacion FROM encuestas ORDER BY id_encuesta").fetchall()
+        assert [fila[0] for fila in calificaciones] == [2, 4, 3, 5, 2]
+        cambios = conn.execute("""
+            SELECT tipo, id_encuesta FROM cambios_encuestas WHERE tipo != 'insertada' ORDER BY tipo, id_encuesta
+        """).fetchall()
+        assert cambios == [('actualizada', 3), ('actualizada', 5)] + [('colision', i) for i in colisiones]
+    finally:
+        conn.close()
@@ -0,0 +1,23 @@
+"""Migración de la clave de deduplicación (--migrar-clave, claves_dedup.migrar_estrategia)"""
+
+import sqlite3
+
+def indices_encuestas(ruta_bd):
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        return sorted(conn.execute("""
+            SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'encuestas'
+        """).fetchall())
+    finally:
+        conn.close()
+
+def test_migrar_clave_conserva_indices(cargar, ruta_bd):
+    cargar()
+    # La fusión agrega el índice de la llave natural
+    cargar('--fusionar')
+    antes = indices_encuestas(ruta_bd)
+    assert 'idx_encuestas_llave_natural' in [nombre for nombre, _ in antes]
+
+    for estrategia in ('blake2b-64', 'blake2b-128'):
+        cargar('--migrar-clave', estrategia)
+        assert indices_encuestas(ruta_bd) == antes
@@ -0,0 +1,55 @@
+"""Prueba diferencial de los modos de carga: fila, lotes y paralelo dejan la misma base
+
+Las filas se comparan en orden de id_encuesta pero sin su valor: en lotes y paralelo cada
+duplicado ignorado por el índice consume un id (insertar_lote_encuestas), así que los ids
+pueden tener huecos respecto al modo 'fila'. Entre lotes y paralelo los ids son iguales.
+"""
+
+import pytest
+
+from cargar_datos_simplificado import (
+    conectar_bd, crear_tablas_simplificadas, cargar_usuarios, cargar_dimension_calificaciones,
+    cargar_encuestas_simplificadas, cargar_encuestas_por_lotes, cargar_encuestas_en_paralelo
+)
+
+# Lotes y shards pequeños para que los duplicados crucen lotes y shards
+TAMANO_LOTE = 97
+TAMANO_SHARD = 16 * 1024
+
+MODOS = {
+    'fila': lambda conn, ruta, motor: cargar_encuestas_simplificadas(conn, motor=motor, ruta=ruta),
+    'lotes': lambda conn, ruta, motor: cargar_encuestas_por_lotes(conn, tamano_lote=TAMANO_LOTE, motor=motor,
+                                                                  ruta=ruta),
+    'paralelo': lambda conn, ruta, motor: cargar_encuestas_en_paralelo(conn, procesos=2, tamano_lote=TAMANO_LOTE,
+                                                                       tamano_shard=TAMANO_SHARD, motor=motor,
+                                                                       ruta=ruta),
+}
+
+def cargar_modo(modo, motor, datos, tmp_path, monkeypatch):
+    """Carga los CSV en una base propia del modo; devuelve contadores, ids, filas sin id y hash_unico"""
+    monkeypatch.setenv('ENCUESTAS_BD', f"sqlite:///{tmp_path / f'{modo}_{motor}.db'}")
+    conn = conectar_bd()
+    try:
+        crear_tablas_simplificadas(conn)
+        cargar_usuarios(conn, ruta=str(datos / 'usuarios.csv'))
+        cargar_dimension_calificaciones(conn, ruta=str(datos / 'dimension_calificaciones.csv'))
+        contadores = MODOS[modo](conn, str(datos / 'encuestas.csv'), motor)
+        filas = conn.execute("SELECT * FROM encuestas ORDER BY id_encuesta").fetchall()
+        hashes = sorted(fila[0] for fila in conn.execute("SELECT hash_unico FROM encuestas"))
+        return contadores, [fila[0] for fila in filas], [fila[1:] for fila in filas], hashes
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize('motor', ['filas', 'columnas'])
+def test_modos_de_carga_equivalentes(motor, datos, tmp_path, monkeypatch):
+    contadores, _, filas, hashes = cargar_modo('fila', motor, datos, tmp_path, monkeypatch)
+    assert contadores[2] > 0, "los datos de prueba deben traer duplicados"
+    assert len(filas) == contadores[0]
+    assert len(set(hashes)) == len(hashes)
+
+    resultados = {modo: cargar_modo(modo, motor, datos, tmp_path, monkeypatch) for modo in ('lotes', 'paralelo')}
+    for modo, (contadores_modo, _, filas_modo, hashes_modo) in resultados.items():
+        assert contadores_modo == contadores, modo
+        assert filas_modo == filas, modo
+        assert hashes_modo == hashes, modo
+    assert resultados['lotes'][1] == resultados['paralelo'][1]
@@ -0,0 +1,77 @@
+"""Marcas de agua de las particiones mensuales del Punto 3 (ejecutar_punto3.materializar_ventana)"""
+
+import sqlite3
+
+from conftest import renombrar_usuarios, cambiar_calificaciones_julio
+from ejecutar_punto3 import SELECCION_UNIFICADA, materializar_ventana
+from generacion_datos import generacion_actual
+
+DESDE, HASTA = '2025-06-01', '2025-09-01'
+MESES = ['2025-06', '2025-07', '2025-08']
+TABLA = 'tabla_unificada_2025'
+
+def materializar(ruta_bd):
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        return materializar_ventana(conn, DESDE, HASTA, TABLA)
+    finally:
+        conn.close()
+
+def filas_vista_y_fuente(ruta_bd):
+    """Filas de la vista y de la consulta unificada sobre las tablas base, ordenadas por id_encuesta"""
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        vista = sorted(conn.execute(f"SELECT * FROM {TABLA}").fetchall())
+        fuente = sorted(conn.execute(SELECCION_UNIFICADA, (DESDE, HASTA)).fetchall())
+        return vista, fuente
+    finally:
+        conn.close()
+
+def test_sin_cambios_no_reconstruye(cargar, ruta_bd):
+    cargar()
+    assert materializar(ruta_bd) == (MESES, [])
+    assert materializar(ruta_bd) == ([], [])
+
+def test_carga_completa_reconstruye_particiones(cargar, ruta_bd, datos):
+    cargar()
+    materializar(ruta_bd)
+
+    renombrar_usuarios(datos)
+    assert cambiar_calificaciones_julio(datos) > 0
+    cargar()
+
+    reconstruidas, _ = materializar(ruta_bd)
+    assert reconstruidas == MESES
+    vista, fuente = filas_vista_y_fuente(ruta_bd)
+    assert vista == fuente
+    assert all(fila[15].startswith('Cliente ') for fila in vista)
+
+def test_usuario_editado_en_carga_incremental_reconstruye(cargar, ruta_bd, datos):
+    cargar()
+    materializar(ruta_bd)
+
+    renombrar_usuarios(datos)
+    cargar('--incremental')
+
+    reconstruidas, refrescadas = materializar(ruta_bd)
+    assert reconstruidas == MESES and refrescadas == []
+    vista, fuente = filas_vista_y_fuente(ruta_bd)
+    assert vista == fuente
+
+def test_carga_incremental_sin_cambios_no_reconstruye(cargar, ruta_bd):
+    cargar()
+    materializar(ruta_bd)
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        version = generacion_actual(conn)
+    finally:
+        conn.close()
+
+    # El upsert de usuarios no reescribe los que no cambiaron ni sube version_dimensiones
+    cargar('--incremental')
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        assert generacion_actual(conn) == version
+    finally:
+        conn.close()
+    assert materializar(ruta_bd) == ([], [])
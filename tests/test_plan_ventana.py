@@ -0,0 +1,73 @@
+"""Planes de la consulta de la ventana del Punto 3 (SELECCION_UNIFICADA) y de su vista"""
+
+import os
+import sqlite3
+
+import pytest
+
+from ejecutar_punto3 import INDICE_FECHA, SELECCION_UNIFICADA, materializar_ventana, verificar_plan_consulta
+
+PARAMETROS = ('2025-06-01', '2025-09-01')
+
+SCRIPT_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'Punto 3', 'punto3_consulta_2025.sql')
+
+def plan_ventana(conn):
+    return [fila[3] for fila in conn.execute(f"EXPLAIN QUERY PLAN {SELECCION_UNIFICADA}", PARAMETROS)]
+
+@pytest.mark.parametrize('analizar', [False, True], ids=['sin_estadisticas', 'con_analyze'])
+def test_ventana_usa_indice_de_fecha(cargar, ruta_bd, analizar):
+    cargar()
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        if analizar:
+            conn.execute("ANALYZE")
+        plan = plan_ventana(conn)
+        assert any(f"USING INDEX {INDICE_FECHA}" in paso or f"USING COVERING INDEX {INDICE_FECHA}" in paso
+                   for paso in plan), plan
+        assert not any(paso.startswith('SCAN e') for paso in plan), plan
+        verificar_plan_consulta(conn.cursor(), SELECCION_UNIFICADA, PARAMETROS)
+    finally:
+        conn.close()
+
+def test_verificar_plan_detecta_recorrido_completo(cargar, ruta_bd):
+    cargar()
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        conn.execute(f"DROP INDEX {INDICE_FECHA}")
+        assert any(paso.startswith('SCAN e') for paso in plan_ventana(conn))
+        with pytest.raises(RuntimeError, match='recorre completa'):
+            verificar_plan_consulta(conn.cursor(), SELECCION_UNIFICADA, PARAMETROS)
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize('consulta', [
+    'SELECT * FROM tabla_unificada_2025 LIMIT 5',
+    'SELECT * FROM tabla_unificada_2025 ORDER BY fecha_insercion DESC LIMIT 5',
+])
+def test_vista_no_ordena_particiones(consulta, cargar, ruta_bd):
+    cargar()
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        # Ventana que empieza a mitad de mes: una partición filtrada y dos completas
+        materializar_ventana(conn, '2025-06-15', '2025-09-01', 'tabla_unificada_2025')
+        plan = [fila[3] for fila in conn.execute(f"EXPLAIN QUERY PLAN {consulta}")]
+        assert not any('TEMP B-TREE' in paso for paso in plan), plan
+        fechas = [fila[0] for fila in conn.execute(
+            "SELECT fecha_insercion FROM tabla_unificada_2025 ORDER BY fecha_insercion DESC")]
+        assert fechas == sorted(fechas, reverse=True) and min(fechas) >= '2025-06-15'
+    finally:
+        conn.close()
+
+def test_script_sql_coincide_con_la_ventana(cargar, ruta_bd):
+    cargar()
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        esperadas = conn.execute(f"SELECT id_encuesta, calificacion_valor FROM ({SELECCION_UNIFICADA}) "
+                                 "ORDER BY id_encuesta", PARAMETROS).fetchall()
+        with open(SCRIPT_SQL, encoding='utf-8') as archivo:
+            conn.executescript(archivo.read())
+        assert conn.execute("SELECT id_encuesta, calificacion_valor FROM tabla_unificada_2025 "
+                            "ORDER BY id_encuesta").fetchall() == esperadas
+    finally:
+        conn.close()
@@ -0,0 +1,43 @@
+"""Los resúmenes mensuales siguen a la tabla de hechos tras cargas incrementales"""
+
+import sqlite3
+
+import pytest
+
+from conftest import cambiar_calificaciones_julio
+from rollups_encuestas import resumen_meses, rollups_al_dia
+
+def cambiar_valor_calificacion(datos):
+    """La calificación 5 pasa a valer 50 sin cambiar ninguna encuesta"""
+    ruta = datos / 'dimension_calificaciones.csv'
+    texto = ruta.read_text(encoding='utf-8-sig')
+    ruta.write_text(texto.replace('\n5;5;', '\n5;50;'), encoding='utf-8-sig')
+
+def agregado_directo(conn, anio_mes):
+    return conn.execute('''
+        SELECT COUNT(*), AVG(dc.calificacion), MIN(e.fecha_insercion), MAX(e.fecha_insercion)
+        FROM encuestas e
+        LEFT JOIN dimension_calificaciones dc ON e.id_calificacion = dc.id_calificacion
+        WHERE substr(e.fecha_insercion, 1, 7) = ? AND e.id_calificacion IS NOT NULL
+    ''', (anio_mes,)).fetchone()
+
+@pytest.mark.parametrize('cambio', [cambiar_valor_calificacion, cambiar_calificaciones_julio])
+def test_rollups_tras_carga_incremental(cambio, cargar, ruta_bd, datos):
+    cargar()
+    cambio(datos)
+    cargar('--incremental')
+
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        assert rollups_al_dia(conn)
+        meses = [fila[0] for fila in conn.execute(
+            "SELECT DISTINCT substr(fecha_insercion, 1, 7) FROM encuestas ORDER BY 1")]
+        assert '2025-07' in meses
+        for anio_mes in meses:
+            total, promedio, minima, maxima = agregado_directo(conn, anio_mes)
+            resumen = resumen_meses(conn, [anio_mes])
+            assert resumen['total_registros'] == total
+            assert resumen['calificacion_promedio'] == pytest.approx(promedio)
+            assert (resumen['fecha_minima'], resumen['fecha_maxima']) == (minima, maxima)
+    finally:
+        conn.close()
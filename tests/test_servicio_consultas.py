@@ -0,0 +1,44 @@
+"""Paginación de /tabla_unificada en el servicio de consultas del Punto 4"""
+
+import sqlite3
+
+from ejecutar_punto3 import materializar_ventana
+from servicio_consultas import construir_consulta, consultar_filas
+
+TABLA = 'tabla_unificada_2025'
+
+def abrir_ventana(ruta_bd):
+    conn = sqlite3.connect(ruta_bd)
+    materializar_ventana(conn, '2025-06-01', '2025-09-01', TABLA)
+    return conn
+
+def test_pagina_usa_indice_de_cada_particion(cargar, ruta_bd):
+    cargar()
+    conn = abrir_ventana(ruta_bd)
+    try:
+        sql, valores, _ = construir_consulta('/tabla_unificada', {'despues_de': ['100'], 'limite': ['50']})
+        plan = [fila[3] for fila in conn.execute(f"EXPLAIN QUERY PLAN {sql}", valores)]
+        busquedas = [paso for paso in plan if paso.startswith('SEARCH tabla_unificada_')]
+        assert len(busquedas) == 3 and all('_id_encuesta (id_encuesta>?)' in paso for paso in busquedas), plan
+        assert not any(paso.startswith('SCAN') or 'TEMP B-TREE' in paso for paso in plan), plan
+    finally:
+        conn.close()
+
+def test_paginas_recorren_la_vista_en_orden(cargar, ruta_bd):
+    cargar()
+    conn = abrir_ventana(ruta_bd)
+    try:
+        esperados = [fila[0] for fila in conn.execute(f"SELECT id_encuesta FROM {TABLA} ORDER BY id_encuesta")]
+        recibidos, despues_de = [], None
+        while True:
+            parametros = {'limite': ['257']}
+            if despues_de is not None:
+                parametros['despues_de'] = [str(despues_de)]
+            pagina = consultar_filas(conn, *construir_consulta('/tabla_unificada', parametros))
+            recibidos.extend(fila['id_encuesta'] for fila in pagina['filas'])
+            despues_de = pagina['siguiente']
+            if despues_de is None:
+                break
+        assert recibidos == esperados
+    finally:
+        conn.close()
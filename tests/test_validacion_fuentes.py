@@ -0,0 +1,35 @@
+"""Validación de las fuentes antes de crear el esquema (cargar_datos_simplificado.validar_fuentes)"""
+
+import gzip
+import shutil
+import sqlite3
+
+import pytest
+
+def total_encuestas(ruta_bd):
+    conn = sqlite3.connect(ruta_bd)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM encuestas").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_paralelo_con_comprimidos_no_borra_la_base(cargar, ruta_bd, datos):
+    cargar()
+    total = total_encuestas(ruta_bd)
+    comprimido = datos / 'encuestas.csv.gz'
+    with open(datos / 'encuestas.csv', 'rb') as origen, gzip.open(comprimido, 'wb') as destino:
+        shutil.copyfileobj(origen, destino)
+
+    with pytest.raises(ValueError, match='comprimidos'):
+        cargar('--modo', 'paralelo', encuestas=comprimido)
+    assert total_encuestas(ruta_bd) == total
+
+def test_fuente_inexistente_no_borra_la_base(cargar, ruta_bd, datos):
+    cargar()
+    total = total_encuestas(ruta_bd)
+
+    with pytest.raises(FileNotFoundError):
+        cargar(encuestas=datos / 'no_existe.csv')
+    with pytest.raises(FileNotFoundError):
+        cargar(encuestas=datos / 'no_existe_*.csv')
+    assert total_encuestas(ruta_bd) == total